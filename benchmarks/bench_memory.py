@@ -0,0 +1,65 @@
+"""
+Measure the memory held per Track for a synthetic in-memory library, as read_tags would build it: one StreamInfo and
+Xing per track, with artist, genre and release strings repeated across each release.
+
+    python benchmarks/bench_memory.py [--tracks N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from cleartag.StreamInfo import StreamInfo
+from cleartag.Track import Track
+from cleartag.Xing import Xing
+from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.TagType import TagType
+from cleartag.enums.XingHeader import XingHeader
+
+TRACKS_PER_RELEASE = 12
+
+
+def fresh(value: str) -> str:
+    """return an equal string which is a new object, as each file's tags would be"""
+    return "".join(list(value))
+
+
+def create_track(i: int) -> Track:
+    release = i // TRACKS_PER_RELEASE
+
+    xing = Xing(XingHeader.LAME, Mp3Method.VBR, 0, 9, fresh("3.100"), 0, 4, True, False, False, False)
+    stream_info = StreamInfo(TagType.ID3, 240.5, 245000, None, Mp3Method.VBR, xing)
+
+    return Track(artists=[fresh("Artist {0}".format(release % 5000))],
+                 release_artists=[fresh("Artist {0}".format(release % 5000))],
+                 date=fresh("2001"),
+                 release_title=fresh("Release {0}".format(release)),
+                 track_title="Track title {0}".format(i),
+                 track_number=i % TRACKS_PER_RELEASE + 1,
+                 total_tracks=TRACKS_PER_RELEASE,
+                 disc_number=1,
+                 total_discs=1,
+                 genres=[fresh("Electronic"), fresh("Ambient")],
+                 stream_info=stream_info)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tracks", type=int, default=1000000)
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    library = [create_track(i) for i in range(args.tracks)]
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print("{0:<10}{1:>14}{2:>16}".format("tracks", "MB", "bytes/track"))
+    print("{0:<10}{1:>14.1f}{2:>16.0f}".format(len(library), used / 1024 / 1024, used / len(library)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Measure read_tags, read_xing and write_tags on a deterministic synthetic library (see cleartag.tests.corpus), reporting
+files/sec, bytes read per file and peak RSS for each code path and kind of file. Each case runs in a fresh process, so
+peak RSS is not inherited from earlier cases. Bytes read come from /proc/self/io, and are only reported on Linux.
+
+    python benchmarks/bench_read.py [--files N] [--repeat N] [--art-size BYTES] [--corpus DIR]
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cleartag.ClearTag import read_tags, read_xing, write_tags
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.tests import corpus
+
+
+def read_full(path):
+    read_tags(path)
+
+
+def read_no_stream_info(path):
+    read_tags(path, stream_info=False)
+
+
+def read_native(path):
+    read_tags(path, backend=ReadBackend.NATIVE)
+
+
+def read_skip_artwork(path):
+    read_tags(path, skip_artwork=True)
+
+
+def read_lazy_xing(path):
+    read_tags(path, lazy_xing=True)
+
+
+def write_unchanged(path):
+    write_tags(path, read_tags(path))
+
+
+def write_changed(path):
+    track = read_tags(path)
+    track.track_title = "edited" if track.track_title != "edited" else "track"
+    write_tags(path, track)
+
+
+# name -> (function, whether it applies to every kind, or only MP3s)
+CODE_PATHS = {
+    "read_tags": (read_full, False),
+    "read_tags stream_info=False": (read_no_stream_info, False),
+    "read_tags native": (read_native, False),
+    "read_tags skip_artwork": (read_skip_artwork, False),
+    "read_tags lazy_xing": (read_lazy_xing, True),
+    "read_xing": (read_xing, True),
+    "write_tags unchanged": (write_unchanged, False),
+    "write_tags changed": (write_changed, False),
+}
+
+
+def get_bytes_read():
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_case(code_path, paths, repeat):
+    """run in a fresh process: time the code path over the files, returning (seconds, bytes read, peak RSS bytes)"""
+
+    function = CODE_PATHS[code_path][0]
+    try:
+        function(paths[0])  # warm up imports and the page cache
+    except Exception as e:
+        return None, None, "{0}: {1}".format(type(e).__name__, e)
+
+    bytes_before = get_bytes_read()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            function(path)
+    seconds = time.perf_counter() - start
+    bytes_after = get_bytes_read()
+
+    bytes_read = bytes_after - bytes_before if bytes_before is not None else None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024  # kilobytes on Linux
+
+    return seconds, bytes_read, peak_rss
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20, help="files per kind")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--art-size", type=int, default=1024 * 1024)
+    parser.add_argument("--corpus", help="directory for the generated library (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        library = corpus.make_library(args.corpus or temp_dir, args.files, args.art_size)
+
+        print("{0:<30}{1:<16}{2:>12}{3:>14}{4:>14}".format("code path", "kind", "files/s", "bytes/file",
+                                                          "peak RSS MB"))
+
+        context = multiprocessing.get_context("spawn")
+        for code_path, (_, mp3_only) in CODE_PATHS.items():
+            for kind, paths in library.items():
+                if mp3_only and not kind.startswith("mp3"):
+                    continue
+
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    seconds, bytes_read, peak_rss = executor.submit(run_case, code_path, paths, args.repeat).result()
+
+                if seconds is None:
+                    print("{0:<30}{1:<16}  {2}".format(code_path, kind, peak_rss))
+                    continue
+
+                calls = len(paths) * args.repeat
+                print("{0:<30}{1:<16}{2:>12.0f}{3:>14}{4:>14.1f}".format(
+                    code_path, kind, calls / seconds,
+                    "{0:.0f}".format(bytes_read / calls) if bytes_read is not None else "-",
+                    peak_rss / 1024 / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compare the byte-level Xing/LAME/VBRI parser against the bitstring parser, on the leading region of synthetic MP3s.
+
+    python benchmarks/bench_xing.py [--number N]
+"""
+import argparse
+import timeit
+
+from cleartag.ClearTag import parse_xing
+from cleartag.enums.XingParser import XingParser
+from cleartag.tests import corpus
+
+ID3_HEADER = b"ID3\x03\x00\x00\x00\x00\x10\x00"  # a 2KB tag
+
+
+def create_cases():
+    id3 = ID3_HEADER + bytes(2048)
+    silence = corpus.mp3_frame() * 24
+
+    return {
+        "LAME": id3 + corpus.mp3_frame(corpus.xing_payload()) + silence,
+        "Info": id3 + corpus.mp3_frame(corpus.xing_payload(header=b"Info")) + silence,
+        "VBRI": id3 + corpus.mp3_frame(corpus.vbri_payload()) + silence,
+        "none": id3 + silence,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print("{0:<8}{1:>16}{2:>16}{3:>10}".format("header", "bitstring us", "bytes us", "speedup"))
+    for name, data in create_cases().items():
+        assert parse_xing(data, XingParser.BITSTRING) == parse_xing(data, XingParser.BYTES)
+
+        timings = {}
+        for xing_parser in XingParser:
+            seconds = min(timeit.repeat(lambda: parse_xing(data, xing_parser), number=args.number, repeat=3))
+            timings[xing_parser] = seconds / args.number * 1e6
+
+        print("{0:<8}{1:>16.1f}{2:>16.1f}{3:>9.1f}x".format(name, timings[XingParser.BITSTRING],
+                                                            timings[XingParser.BYTES],
+                                                            timings[XingParser.BITSTRING] / timings[XingParser.BYTES]))
+
+
+if __name__ == "__main__":
+    main()
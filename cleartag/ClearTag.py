@@ -1,27 +1,68 @@
+import asyncio
+import contextvars
 import math
 import os
-from typing import Optional, Dict, Tuple
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from itertools import islice
+from typing import Optional, Dict, Tuple, Iterable, Iterator, List, AsyncIterator, Union, Callable, FrozenSet
 
-import bitstring
 import mutagen
 from mutagen.easyid3 import EasyID3
 from mutagen.easymp4 import EasyMP4Tags
 from mutagen.flac import VCFLACDict, FLAC
 from mutagen.mp3 import EasyMP3
+from mutagen.oggopus import OggOpusVComment
 from mutagen.oggvorbis import OggVCommentDict
+from mutagen._tags import PaddingInfo
 from ordered_set import OrderedSet
 
-from cleartag.Exceptions import ClearTagError
+from cleartag.CountingFile import CountingFile
+from cleartag.Exceptions import ClearTagError, IOBudgetExceeded
+from cleartag.FileReader import FileReader
+from cleartag.IOBudget import IOBudget
+from cleartag.IOStats import IOStats
+from cleartag.NativeFile import NativeFile
+from cleartag.PaddingPolicy import PaddingPolicy
+from cleartag.ReadResult import ReadResult
 from cleartag.StreamInfo import StreamInfo
-from cleartag.Track import Track
+from cleartag.Timings import Timings, FileTiming
+from cleartag.Track import Track, TRACK_FIELDS
+from cleartag.TrackCache import TrackCache
+from cleartag.WriteResult import WriteResult
 from cleartag.Xing import Xing
 from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.ReadBackend import ReadBackend
 from cleartag.enums.TagType import TagType
 from cleartag.enums.XingHeader import XingHeader
-from cleartag.functions import convert_bitrate_mode
-
-__id3v1_comment_key = "COMM:ID3v1 Comment:eng"
-__comment_keys = ["COMM", "TXXX:COMMENT"]
+from cleartag.enums.XingParser import XingParser
+from cleartag.flac import is_flac, read_flac
+from cleartag.functions import convert_bitrate_mode, decode_lame_version
+from cleartag.id3 import read_mp3, get_id3_comment, COMMENT_KEYS, ID3V1_COMMENT_KEY
+from cleartag.mp4 import is_mp4, read_mp4
+from cleartag.ogg import is_ogg, read_ogg, get_picture_size, VORBIS, OPUS
+from cleartag.mpeg import get_xing_search_range, locate_xing, read_xing_window, get_frame_length, XING_SEARCH_SIZE, \
+    get_id3_end
+
+try:
+    import bitstring
+except ImportError:  # optional, only required by XingParser.BITSTRING
+    bitstring = None
+
+AUDIO_EXTENSIONS = (".mp3", ".flac", ".m4a", ".mp4", ".ogg", ".opus")
+
+# the Track fields stored in each tag
+__tag_fields = {
+    "artist": ("artists",),
+    "albumartist": ("release_artists",),
+    "date": ("date",),
+    "album": ("release_title",),
+    "title": ("track_title",),
+    "tracknumber": ("track_number", "total_tracks"),
+    "discnumber": ("disc_number", "total_discs"),
+    "genre": ("genres",),
+}
 
 
 def get_comment(mutagen_file) -> Tuple[Optional[str], bool]:
@@ -30,21 +71,7 @@ def get_comment(mutagen_file) -> Tuple[Optional[str], bool]:
     if not isinstance(mutagen_file, EasyMP3):
         return (mutagen_file.tags["comment"][0], False) if "comment" in mutagen_file.tags else (None, False)
 
-    tags = mutagen_file.tags._EasyID3__id3._DictProxy__dict
-
-    always_write = __id3v1_comment_key in tags
-
-    keys = [x for x in tags if x in __comment_keys or x.startswith("COMM::")]
-    vals = {str(tags[x]) for x in keys}
-    if len(vals) > 1:
-        always_write = True
-
-    if "COMM::eng" in keys:
-        return str(tags["COMM::eng"]), always_write
-    elif len(keys):
-        return str(tags[next(iter(keys))]), always_write
-
-    return None, always_write
+    return get_id3_comment(mutagen_file.tags._EasyID3__id3._DictProxy__dict)
 
 
 def set_comment(mutagen_file, comment: str) -> None:
@@ -59,10 +86,10 @@ def set_comment(mutagen_file, comment: str) -> None:
 
     tags = mutagen_file.tags._EasyID3__id3._DictProxy__dict
 
-    keys = [x for x in tags if x in __comment_keys or x.startswith("COMM::")]
+    keys = [x for x in tags if x in COMMENT_KEYS or x.startswith("COMM::")]
 
-    if __id3v1_comment_key in tags:
-        del tags[__id3v1_comment_key]
+    if ID3V1_COMMENT_KEY in tags:
+        del tags[ID3V1_COMMENT_KEY]
 
     # if there are existing comments
     if keys:
@@ -81,14 +108,109 @@ def get_int(str_in):
     return int(str_in) if str_in.isdigit() else None
 
 
-def read_tags(file_path: str) -> Track:
-    assert os.path.isfile(file_path)
+def read_tags(file_path: str, io_stats: IOStats = None, xing_parser: XingParser = XingParser.BYTES,
+              cache: TrackCache = None, fields: Iterable[str] = None, stream_info: bool = True,
+              lazy_xing: bool = False, budget: IOBudget = None,
+              backend: ReadBackend = ReadBackend.MUTAGEN, skip_artwork: bool = False) -> Track:
+    """
+    Read a track's tags and stream info. The file is opened once, and its leading region is shared between mutagen
+    and the Xing/LAME parser. Pass an IOStats to collect the I/O performed, and the saving over the legacy path.
+    If a cache is given, an entry matching the file's stat is returned without opening the file.
+
+    fields selects the Track fields to load (see TRACK_FIELDS), and stream_info=False skips the stream analysis,
+    including the Xing/LAME parse. Fields which were not loaded are listed in the Track's unloaded_fields.
+    With lazy_xing, an MP3's Xing/LAME header is parsed on first access to stream_info.xing or mp3_method, from a
+    fresh read of the file's leading window. Such tracks are not stored in the cache.
+
+    A budget limits the bytes, reads and seeks of this call: in strict mode IOBudgetExceeded is raised before a read
+    would exceed it, otherwise the file is flagged in budget.violations.
+
+    With ReadBackend.NATIVE, formats which cleartag parses itself (FLAC, and MP3 with ID3v2.3/2.4 tags) are read
+    without mutagen's file classes, decoding only the metadata a Track needs. Other files are read with mutagen.
+
+    The Track's picture_count and picture_size describe the embedded artwork. With skip_artwork, picture data is
+    never read: as mutagen always loads pictures in full, formats with a native reader are read with it whatever the
+    backend.
+    """
+
+    if fields is None:
+        fields = frozenset(TRACK_FIELDS)
+    else:
+        fields = frozenset(fields)
+        if not fields <= set(TRACK_FIELDS):
+            raise ValueError("Unknown fields {0}".format(sorted(fields - set(TRACK_FIELDS))))
+
+    if skip_artwork:
+        backend = ReadBackend.NATIVE
+
+    # only complete tracks are cached: a lazily read track would be cached without its Xing header
+    complete = stream_info and not lazy_xing and len(fields) == len(TRACK_FIELDS)
+
+    timing = Timings.start(file_path, "read")
+
+    if cache is not None:
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            raise ClearTagError("Could not open {0}".format(file_path)) from e
+
+        track = cache.get(file_path, stat)
+        if timing:
+            timing.lap("cache")
+        if track is not None:
+            if timing:
+                timing.size = stat.st_size
+                timing.finish()
+            return track
 
     try:
-        file = mutagen.File(file_path, easy=True)
+        reader = FileReader(file_path, io_stats, budget, prefetch_tag=backend != ReadBackend.NATIVE)
+    except OSError as e:
+        raise ClearTagError("Could not open {0}".format(file_path)) from e
+
+    if timing:
+        timing.size = reader.size
+        timing.lap("open")
+
+    with reader:
+        track = __read_tags(file_path, reader, xing_parser, fields, stream_info, lazy_xing, backend, timing)
+
+    if cache is not None and complete:
+        cache.put(file_path, stat, track)
+
+    if timing:
+        timing.finish()
+
+    return track
+
+
+def __read_tags(file_path: str, reader: FileReader, xing_parser: XingParser, fields: FrozenSet[str],
+                load_stream_info: bool, lazy_xing: bool, backend: ReadBackend, timing: Optional[FileTiming]) -> Track:
+
+    # the legacy path stat'ed the file with os.path.isfile, then opened it by name
+    reader.io_stats.add_legacy(opens=1, stats=1)
+
+    try:
+        file = None
+        if backend == ReadBackend.NATIVE:
+            file = __read_native(reader)
+        if file is None:
+            reader.read_ahead = True
+            reader.seek(0)
+            file = mutagen.File(reader, easy=True)
+    except IOBudgetExceeded:
+        raise
     except Exception as e:
         raise ClearTagError("Could not read tags from {0}".format(file_path)) from e
 
+    if file is None:
+        raise ClearTagError("Unsupported file format {0}".format(file_path))
+
+    if timing:
+        timing.format = "Native{0}".format(file.tag_type.name) if isinstance(file, NativeFile) \
+            else type(file).__name__
+        timing.lap("tag_parse")
+
     artists = []
     release_artists = []
     date = None
@@ -104,22 +226,34 @@ def read_tags(file_path: str) -> Track:
 
     # if a file is untagged, file.tags will not be set
     if file.tags:
-        artists = file.tags["artist"] if "artist" in file.tags else []
-        release_artists = file.tags["albumartist"] if "albumartist" in file.tags else []
-        date = file.tags["date"][0] if "date" in file.tags else None
-        release_title = file.tags["album"][0] if "album" in file.tags else None
-        track_title = file.tags["title"][0] if "title" in file.tags else None
-        genres = file.tags["genre"] if "genre" in file.tags else []
-        comment, always_write = get_comment(file)
-
-        track_number = get_int(file.tags["tracknumber"][0].split("/")[0]) if "tracknumber" in file.tags else None
-        total_tracks = None
-        if "tracknumber" in file.tags and len(file.tags["tracknumber"][0].split("/")) == 2:
-            total_tracks = get_int(file.tags["tracknumber"][0].split("/")[1])
-        disc_number = get_int(file.tags["discnumber"][0].split("/")[0]) if "discnumber" in file.tags else None
-        total_discs = None
-        if "discnumber" in file.tags and len(file.tags["discnumber"][0].split("/")) == 2:
-            total_discs = get_int(file.tags["discnumber"][0].split("/")[1])
+        if "artists" in fields:
+            artists = file.tags["artist"] if "artist" in file.tags else []
+        if "release_artists" in fields:
+            release_artists = file.tags["albumartist"] if "albumartist" in file.tags else []
+        if "date" in fields:
+            date = file.tags["date"][0] if "date" in file.tags else None
+        if "release_title" in fields:
+            release_title = file.tags["album"][0] if "album" in file.tags else None
+        if "track_title" in fields:
+            track_title = file.tags["title"][0] if "title" in file.tags else None
+        if "genres" in fields:
+            genres = file.tags["genre"] if "genre" in file.tags else []
+        if "comment" in fields:
+            comment, always_write = (file.comment, file.always_write) if isinstance(file, NativeFile) \
+                else get_comment(file)
+
+        if "tracknumber" in file.tags:
+            track_numbering = file.tags["tracknumber"][0].split("/")
+            if "track_number" in fields:
+                track_number = get_int(track_numbering[0])
+            if "total_tracks" in fields and len(track_numbering) == 2:
+                total_tracks = get_int(track_numbering[1])
+        if "discnumber" in file.tags:
+            disc_numbering = file.tags["discnumber"][0].split("/")
+            if "disc_number" in fields:
+                disc_number = get_int(disc_numbering[0])
+            if "total_discs" in fields and len(disc_numbering) == 2:
+                total_discs = get_int(disc_numbering[1])
 
         # Convert any 0's to None
         track_number = track_number if track_number else None
@@ -136,44 +270,350 @@ def read_tags(file_path: str) -> Track:
         genres = [x for x in genres if x != '']
         comment = comment if comment != '' else None
 
+    pictures = file.pictures if isinstance(file, NativeFile) else __get_picture_sizes(file)
+
+    unloaded_fields = set(TRACK_FIELDS) - fields
+
+    if timing:
+        timing.lap("tag_extract")
+
+    stream_info = None
+    if load_stream_info:
+        stream_info = __read_stream_info(file_path, file, reader, xing_parser, lazy_xing)
+        if timing:
+            timing.lap("xing_parse")
+    else:
+        unloaded_fields.add("stream_info")
+
+    track = Track(artists=artists,
+                  release_artists=release_artists,
+                  date=date,
+                  release_title=release_title,
+                  track_title=track_title,
+                  track_number=track_number,
+                  total_tracks=total_tracks,
+                  disc_number=disc_number,
+                  total_discs=total_discs,
+                  genres=genres,
+                  comment=comment,
+                  always_write=always_write,
+                  stream_info=stream_info,
+                  unloaded_fields=unloaded_fields,
+                  picture_count=len(pictures),
+                  picture_size=sum(pictures))
+
+    if timing:
+        timing.lap("track_build")
+
+    return track
+
+
+def __get_picture_sizes(file) -> List[int]:
+    """return the size of each picture loaded by mutagen"""
+
+    if isinstance(file, EasyMP3):
+        return [len(x.data) for x in file.tags._EasyID3__id3.getall("APIC")] if file.tags is not None else []
+    if isinstance(file, FLAC):
+        return [len(x.data) for x in file.pictures]
+    if isinstance(file.tags, EasyMP4Tags):
+        return [len(x) for x in file.tags._EasyMP4Tags__mp4.get("covr", [])]
+
+    # Ogg pictures are base64 encoded comments: only the prefix holding the picture header is decoded
+    sizes = []
+    if file.tags is not None and "metadata_block_picture" in file.tags:
+        for value in file.tags["metadata_block_picture"]:
+            size = get_picture_size(value)
+            if size is not None:
+                sizes.append(size)
+
+    return sizes
+
+
+def __read_native(reader: FileReader) -> Optional[NativeFile]:
+    """read a file with cleartag's own parsers, or return None if none handles its format"""
+
+    if is_flac(reader.head):
+        return read_flac(reader)
+    if reader.head[:3] == b"ID3" or get_frame_length(reader.head[:4]):
+        return read_mp3(reader)
+    if is_mp4(reader.head):
+        return read_mp4(reader)
+    if is_ogg(reader.head):
+        return read_ogg(reader)
+
+    return None
+
+
+def __read_stream_info(file_path: str, file, reader: FileReader, xing_parser: XingParser,
+                       lazy_xing: bool) -> StreamInfo:
     xing = None
-    tag_type = TagType.UNKNOWN
-    bits_per_sample = None
+    xing_loader = None
     mp3_method = None
 
-    if isinstance(file, EasyMP3):
-        xing = read_xing(file_path)
-        tag_type = TagType.ID3
-        if xing:
-            mp3_method = xing.method
+    if isinstance(file, NativeFile):
+        tag_type = file.tag_type
+        length, bitrate, bits_per_sample, bitrate_mode, codec = file.length, file.bitrate, file.bits_per_sample, \
+            file.bitrate_mode, file.codec
+    else:
+        tag_type = TagType.UNKNOWN
+        length, bitrate, bits_per_sample, bitrate_mode, codec = file.info.length, file.info.bitrate, None, None, None
+
+        if isinstance(file, EasyMP3):
+            tag_type = TagType.ID3
+            bitrate_mode = file.info.bitrate_mode
+        elif isinstance(file.tags, VCFLACDict):
+            tag_type = TagType.FLAC
+            bits_per_sample = file.info.bits_per_sample
+        elif isinstance(file.tags, EasyMP4Tags):
+            tag_type = TagType.MP4
+            codec = file.info.codec or None
+            if codec == "alac":
+                bits_per_sample = file.info.bits_per_sample
+        elif isinstance(file.tags, OggVCommentDict):
+            tag_type = TagType.VORBIS
+            codec = VORBIS
+        elif isinstance(file.tags, OggOpusVComment):
+            tag_type = TagType.VORBIS
+            codec = OPUS
+
+    if tag_type == TagType.ID3:
+        # the legacy read_xing opened the file a second time and stat'ed it when an ID3 tag was present. Without
+        # an ID3 tag, it searched to the end of the file unless a header was found
+        search_start, search_end, has_id3 = get_xing_search_range(reader.head)
+        legacy_bytes = search_end - search_start
+
+        if lazy_xing:
+            # parsed from a fresh read of the file on first access to xing or mp3_method
+            xing_loader = partial(read_xing, file_path, xing_parser)
         else:
-            mp3_method = convert_bitrate_mode(file.info.bitrate_mode)
-    elif isinstance(file.tags, VCFLACDict):
-        tag_type = TagType.FLAC
-        bits_per_sample = file.info.bits_per_sample
-    elif isinstance(file.tags, EasyMP4Tags):
-        tag_type = TagType.MP4
-    elif isinstance(file.tags, OggVCommentDict):
-        tag_type = TagType.VORBIS
-
-    stream_info = StreamInfo(tag_type, file.info.length, file.info.bitrate, bits_per_sample, mp3_method, xing)
-
-    return Track(artists=artists,
-                 release_artists=release_artists,
-                 date=date,
-                 release_title=release_title,
-                 track_title=track_title,
-                 track_number=track_number,
-                 total_tracks=total_tracks,
-                 disc_number=disc_number,
-                 total_discs=total_discs,
-                 genres=genres,
-                 comment=comment,
-                 always_write=always_write,
-                 stream_info=stream_info)
-
-
-def write_tags(file_path: str, track: Track) -> None:
+            xing = __parse_reader_xing(reader, xing_parser)
+            mp3_method = xing.method if xing else convert_bitrate_mode(bitrate_mode)
+            if not has_id3 and xing.header_type == XingHeader.NONE:
+                legacy_bytes = reader.size
+
+        reader.io_stats.add_legacy(opens=1, stats=1 if has_id3 else 0, reads=1, bytes_read=legacy_bytes)
+
+    return StreamInfo(tag_type, length, bitrate, bits_per_sample, mp3_method, xing, xing_loader, codec)
+
+
+def __parse_reader_xing(reader: FileReader, xing_parser: XingParser) -> Xing:
+    """
+    parse the Xing/Info/VBRI header from the reader's leading region, or if that region ends inside the ID3 tag (as
+    when the tag was not prefetched), from a read of the window following the tag
+    """
+
+    id3_end = get_id3_end(reader.head)
+    if id3_end is None or id3_end + XING_SEARCH_SIZE <= len(reader.head) or len(reader.head) == reader.size:
+        return parse_xing(reader.head, xing_parser)
+
+    reader.seek(0)
+    window = read_xing_window(reader)
+    return __parse_xing_range(window, 0, len(window), xing_parser)
+
+
+def read_tags_many(paths: Iterable[str], workers: int = None, executor: str = "process", ordered: bool = True,
+                   chunk_size: int = 16, max_in_flight: int = None, **kwargs) -> Iterator[ReadResult]:
+    """
+    Read many files on a process or thread pool, yielding a ReadResult per path. Paths are submitted in chunks of
+    chunk_size, with at most max_in_flight chunks pending (default: twice the worker count), so paths may be a lazy
+    iterable of any length. Results are yielded in input order, or as they complete if ordered is False. A
+    ClearTagError is returned on its file's ReadResult, rather than stopping the batch. Additional keyword arguments
+    are passed to read_tags.
+
+    The arguments are checked on the call, raising ValueError; the pool is created when iteration starts.
+    """
+
+    if executor not in ("process", "thread"):
+        raise ValueError("Unknown executor '{0}', expected 'process' or 'thread'".format(executor))
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive, not {0}".format(chunk_size))
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be positive, not {0}".format(workers))
+    if max_in_flight is not None and max_in_flight < 1:
+        raise ValueError("max_in_flight must be positive, not {0}".format(max_in_flight))
+
+    max_in_flight = max_in_flight or 2 * (workers or os.cpu_count() or 1)
+
+    return __read_tags_many(iter(paths), workers, executor, ordered, chunk_size, max_in_flight, kwargs)
+
+
+def __read_tags_many(paths: Iterator[str], workers: Optional[int], executor: str, ordered: bool, chunk_size: int,
+                     max_in_flight: int, kwargs: Dict) -> Iterator[ReadResult]:
+    pending = deque()
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+
+    with pool_class(max_workers=workers) as pool:
+
+        def submit() -> bool:
+            chunk = list(islice(paths, chunk_size))
+            if chunk:
+                if executor == "thread":
+                    # so that a Timings collector active in the caller sees the reads
+                    pending.append(pool.submit(contextvars.copy_context().run, __read_chunk, chunk, kwargs))
+                else:
+                    pending.append(pool.submit(__read_chunk, chunk, kwargs))
+            return bool(chunk)
+
+        try:
+            while len(pending) < max_in_flight and submit():
+                pass
+
+            while pending:
+                if ordered:
+                    done = pending.popleft()
+                else:
+                    done = next(iter(wait(pending, return_when=FIRST_COMPLETED).done))
+                    pending.remove(done)
+
+                submit()
+                yield from done.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def __read_chunk(paths: List[str], kwargs: Dict) -> List[ReadResult]:
+    results = []
+
+    for path in paths:
+        try:
+            results.append(ReadResult(path, track=read_tags(path, **kwargs)))
+        except ClearTagError as e:
+            results.append(ReadResult(path, error=e))
+
+    return results
+
+
+async def async_read_tags(file_path: str, semaphore: asyncio.Semaphore = None, executor: Executor = None,
+                          **kwargs) -> Track:
+    """
+    Read a track without blocking the event loop, by running read_tags on an executor (the loop's default if None).
+    If a semaphore is given, it is held for the duration of the read, to cap concurrent file I/O. Cancelling the
+    caller returns immediately, while the blocking read already started completes in its worker.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    # run in a copy of the caller's context, so that a Timings collector sees the read
+    read = partial(contextvars.copy_context().run, read_tags, file_path, **kwargs)
+
+    if semaphore is None:
+        return await loop.run_in_executor(executor, read)
+
+    async with semaphore:
+        return await loop.run_in_executor(executor, read)
+
+
+async def async_read_tags_many(paths: Iterable[str], concurrency: int = 8, semaphore: asyncio.Semaphore = None,
+                               executor: Executor = None, **kwargs) -> AsyncIterator[ReadResult]:
+    """
+    Asynchronously iterate over ReadResults for many paths, in completion order. At most concurrency reads are in
+    flight. Pass a shared semaphore to cap file I/O across several concurrent scans. Pending reads are cancelled when
+    the iterator is closed or its consumer is cancelled.
+    """
+
+    assert concurrency > 0, "concurrency must be positive"
+    semaphore = semaphore or asyncio.Semaphore(concurrency)
+
+    paths = iter(paths)
+    pending = set()
+
+    try:
+        while True:
+            for path in islice(paths, concurrency - len(pending)):
+                pending.add(asyncio.ensure_future(__async_read_result(path, semaphore, executor, kwargs)))
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def __async_read_result(path: str, semaphore: asyncio.Semaphore, executor: Optional[Executor],
+                              kwargs: Dict) -> ReadResult:
+    try:
+        return ReadResult(path, track=await async_read_tags(path, semaphore, executor, **kwargs))
+    except ClearTagError as e:
+        return ReadResult(path, error=e)
+
+
+def walk_library(root: str, extensions: Iterable[str] = AUDIO_EXTENSIONS, follow_symlinks: bool = False,
+                 onerror: Callable[[OSError], None] = None) -> Iterator[str]:
+    """
+    Lazily yield the paths of audio files below root, walking with os.scandir and filtering on extension (case
+    insensitive) before anything is opened. Memory use is bounded by the directory depth, not the file count.
+    As with os.walk, directories which cannot be listed are skipped, after calling onerror if it is set.
+    """
+
+    for path, error in __walk(root, extensions, follow_symlinks):
+        if error is None:
+            yield path
+        elif onerror is not None:
+            onerror(error)
+
+
+def scan_library(root: str, extensions: Iterable[str] = AUDIO_EXTENSIONS, follow_symlinks: bool = False,
+                 **kwargs) -> Iterator[Tuple[str, Union[Track, ClearTagError]]]:
+    """
+    Lazily read every audio file below root, yielding (path, Track) or (path, ClearTagError) as each file is read.
+    Directories which cannot be listed are yielded with a ClearTagError. Additional keyword arguments are passed to
+    read_tags. For parallel reads, pass walk_library(...) to read_tags_many.
+    """
+
+    for path, error in __walk(root, extensions, follow_symlinks):
+        if error is not None:
+            clear_tag_error = ClearTagError("Could not scan {0}".format(path))
+            clear_tag_error.__cause__ = error
+            yield path, clear_tag_error
+            continue
+
+        try:
+            yield path, read_tags(path, **kwargs)
+        except ClearTagError as e:
+            yield path, e
+
+
+def __walk(root: str, extensions: Iterable[str], follow_symlinks: bool) -> Iterator[Tuple[str, Optional[OSError]]]:
+    extensions = tuple(x.lower() for x in extensions)
+    visited = set()
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
+
+        try:
+            # guard against symlink cycles
+            if follow_symlinks:
+                stat = os.stat(directory)
+                if (stat.st_dev, stat.st_ino) in visited:
+                    continue
+                visited.add((stat.st_dev, stat.st_ino))
+
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(extensions) and entry.is_file(follow_symlinks=follow_symlinks):
+                        yield entry.path, None
+        except OSError as e:
+            yield directory, e
+
+
+def write_tags(file_path: str, track: Track, padding: PaddingPolicy = None, io_stats: IOStats = None,
+               budget: IOBudget = None) -> WriteResult:
+    """
+    Write a track's tags to a file. If the file's tags and comment already match the track, the file is not saved.
+    padding decides the padding left after the tag (mutagen's default if None). The returned WriteResult is truthy if
+    the file was written, and reports whether the tag was written in place or the whole file was rewritten.
+    The file is opened once, for both loading and saving. Pass an IOStats to collect the I/O performed, and a budget
+    to limit the I/O of loading the existing tags.
+    """
+
     assert os.path.isfile(file_path)
     assert isinstance(track, Track), "A valid Track object is required"
 
@@ -192,15 +632,6 @@ def write_tags(file_path: str, track: Track) -> None:
     track.release_artists = list(dict.fromkeys([x for x in track.release_artists if isinstance(x, str) and x != ""]))
     track.genres = list(dict.fromkeys([x for x in track.genres if isinstance(x, str) and x != ""]))
 
-    file = mutagen.File(file_path, easy=True)
-    if not file.tags:
-        if isinstance(file, EasyMP3):
-            file.tags = EasyID3()
-        elif isinstance(file, FLAC):
-            file.tags = VCFLACDict()
-        else:
-            raise ValueError("Tags missing in unknown format {0}".format(type(file)))
-
     track_number = None
     if track.track_number:
         if track.total_tracks:
@@ -215,81 +646,153 @@ def write_tags(file_path: str, track: Track) -> None:
         else:
             disc_number = "{0}".format(track.disc_number)
 
-    if track.artists:
-        file.tags["artist"] = track.artists
-    elif "artist" in file.tags:
-        del file.tags["artist"]
+    # the target value of each tag, where an empty list removes the tag
+    values = {
+        "artist": track.artists,
+        "albumartist": track.release_artists,
+        "date": [track.date] if track.date else [],
+        "album": [track.release_title] if track.release_title else [],
+        "title": [track.track_title] if track.track_title else [],
+        "tracknumber": [track_number] if track_number else [],
+        "discnumber": [disc_number] if disc_number else [],
+        "genre": track.genres,
+    }
+
+    # fields which read_tags did not load are left as they are on disk
+    for key, track_fields in __tag_fields.items():
+        if not all(track.is_loaded(x) for x in track_fields):
+            del values[key]
+    write_comment = track.is_loaded("comment")
+
+    timing = Timings.start(file_path, "write")
 
-    if track.release_artists:
-        file.tags["albumartist"] = track.release_artists
-    elif "albumartist" in file.tags:
-        del file.tags["albumartist"]
+    try:
+        fileobj = CountingFile(file_path, "rb+", io_stats, budget)
+    except PermissionError:
+        # a read-only file can still be compared, and is only an error if it must be saved
+        fileobj = CountingFile(file_path, "rb", io_stats, budget)
 
-    if track.date:
-        file.tags["date"] = track.date
-    elif "date" in file.tags:
-        del file.tags["date"]
+    with fileobj:
+        result = __write_tags(file_path, fileobj, values, track, write_comment, padding, timing)
 
-    if track.release_title:
-        file.tags["album"] = track.release_title
-    elif "album" in file.tags:
-        del file.tags["album"]
+    if result:
+        TrackCache.invalidate_all(file_path)
 
-    if track.track_title:
-        file.tags["title"] = track.track_title
-    elif "title" in file.tags:
-        del file.tags["title"]
+    return result
 
-    if track_number:
-        file.tags["tracknumber"] = track_number
-    elif "tracknumber" in file.tags:
-        del file.tags["tracknumber"]
 
-    if disc_number:
-        file.tags["discnumber"] = disc_number
-    elif "discnumber" in file.tags:
-        del file.tags["discnumber"]
+def __write_tags(file_path: str, fileobj: CountingFile, values: Dict[str, List[str]], track: Track,
+                 write_comment: bool, padding: Optional[PaddingPolicy], timing: Optional[FileTiming]) -> WriteResult:
 
-    if track.genres:
-        file.tags["genre"] = track.genres
-    elif "genre" in file.tags:
-        del file.tags["genre"]
+    file = mutagen.File(fileobj, easy=True)
 
-    set_comment(file, track.comment)
+    if timing:
+        timing.size = os.path.getsize(file_path)
+        timing.format = type(file).__name__
+        timing.lap("tag_parse")
 
-    file.save()
+    unchanged = __tags_unchanged(file, values, track.comment, write_comment)
 
+    if timing:
+        timing.lap("compare")
 
-def decode_lame_version(bytes_in):
-    try:
-        return bytes_in.decode()
-    except UnicodeDecodeError:
-        pass
+    if unchanged:
+        if timing:
+            timing.finish()
+        return WriteResult(False)
+
+    if not file.tags:
+        if isinstance(file, EasyMP3):
+            file.tags = EasyID3()
+        elif isinstance(file, FLAC):
+            file.tags = VCFLACDict()
+        else:
+            raise ValueError("Tags missing in unknown format {0}".format(type(file)))
+
+    for key, value in values.items():
+        if value:
+            file.tags[key] = value
+        elif key in file.tags:
+            del file.tags[key]
+
+    if write_comment:
+        set_comment(file, track.comment)
+
+    result = WriteResult(True)
+
+    def padding_func(info: PaddingInfo) -> int:
+        new_padding = padding(info) if padding is not None else info.get_default_padding()
+        result.in_place = info.padding >= 0 and new_padding == info.padding
+        result.padding = new_padding
+        return new_padding
+
+    # mutagen expects a freshly opened file when saving
+    fileobj.enforce = False
+    fileobj.seek(0)
+    file.save(fileobj, padding=padding_func)
+    fileobj.flush()
+
+    if timing:
+        timing.lap("save")
+        timing.finish()
+
+    return result
+
+
+def __tags_unchanged(file, values: Dict[str, List[str]], comment: Optional[str], write_comment: bool) -> bool:
+    """return True if writing these tag values and comment would leave the file's tags as they are"""
+
+    if not file.tags:
+        return not any(values.values()) and not (write_comment and comment)
+
+    for key, value in values.items():
+        if (list(file.tags[key]) if key in file.tags else []) != value:
+            return False
+
+    if not write_comment:
+        return True
+
+    existing_comment, always_write = get_comment(file)
+
+    return not always_write and (existing_comment or None) == (comment or None)
+
+
+def read_xing(path, xing_parser: XingParser = XingParser.BYTES, io_stats: IOStats = None,
+              budget: IOBudget = None) -> Xing:
+    """read the Xing/Info/VBRI header from a fixed-size window following any ID3v2 tag"""
+
+    with CountingFile(path, "rb", io_stats, budget, buffering=0) as file:
+        window = read_xing_window(file)
+
+    return __parse_xing_range(window, 0, len(window), xing_parser)
+
+
+def parse_xing(data: bytes, xing_parser: XingParser = XingParser.BYTES) -> Xing:
+    """parse the Xing/Info/VBRI header from the leading region of an MP3 file, given as bytes or a memoryview"""
+
+    if not isinstance(data, bytes):
+        data = bytes(data)
+
+    search_start, search_end, _ = get_xing_search_range(data)
+    return __parse_xing_range(data, search_start, search_end, xing_parser)
 
-    return bytes_in.decode("windows-1252")
 
+def __parse_xing_range(data: bytes, search_start: int, search_end: int, xing_parser: XingParser) -> Xing:
 
-def read_xing(path) -> Xing:
+    if xing_parser == XingParser.BYTES:
+        return locate_xing(data, search_start, search_end)
 
-    stream = bitstring.ConstBitStream(filename=path)
+    if bitstring is None:
+        raise ClearTagError("XingParser.BITSTRING requires the bitstring package")
 
-    search_start = 0
-    search_end = stream.len
+    return __parse_xing_bitstring(data, search_start, search_end)
 
-    # detect the ID3 tag so we can skip it
-    id3_start = stream.find("0x494433", end=min(10*1000*8, stream.length), bytealigned=True)
-    if len(id3_start):
-        stream.bytepos += 6
-        id3_header_size = 0
-        for byte in stream.read("bytes:4"):
-            id3_header_size = (id3_header_size << 7) | byte
 
-        search_start = id3_start[0] + id3_header_size * 8
-        search_end = min(search_start + 10 * 1000 * 8, stream.length)  # search up to 10KB following the ID3 tag
+def __parse_xing_bitstring(data: bytes, search_start: int, search_end: int) -> Xing:
+    stream = bitstring.ConstBitStream(bytes=data)
 
-        # if the range is invalid, search the entire file
-        if os.path.getsize(path) < search_start * 8:
-            search_start = 0
+    search_start *= 8
+    search_end *= 8
 
     # look for Xing
     xing_header = __get_xing_header(stream, search_start, search_end)
@@ -308,7 +811,7 @@ def read_xing(path) -> Xing:
     return Xing(XingHeader.NONE, Mp3Method.CBR)
 
 
-def __get_xing_header(stream: bitstring.ConstBitStream, search_start: int, search_end: int) -> Optional[Xing]:
+def __get_xing_header(stream: "bitstring.ConstBitStream", search_start: int, search_end: int) -> Optional[Xing]:
     # look for Xing
     xing_header = stream.find("0x58696E67", bytealigned=True, start=search_start, end=search_end)
 
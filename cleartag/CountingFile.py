@@ -0,0 +1,56 @@
+import os
+
+from cleartag.IOBudget import IOBudget
+from cleartag.IOStats import IOStats
+
+
+class CountingFile:
+    """
+    File object which records each open, read, write and seek in an IOStats, and checks reads and seeks against an
+    optional IOBudget. Other file methods are passed through to the underlying file. Bytes moved through mmap (as
+    mutagen may do when resizing a file) are not seen.
+    """
+
+    def __init__(self, path: str, mode: str = "rb", io_stats: IOStats = None, budget: IOBudget = None,
+                 buffering: int = -1) -> None:
+        self.io_stats = io_stats if io_stats is not None else IOStats()
+        self.budget = budget
+        self.enforce = True  # check the budget; cleared while saving, so that a write is never interrupted
+
+        self.__flagged = False
+        self.__start = IOBudget.get_usage(self.io_stats)
+        self.__file = open(path, mode, buffering=buffering)
+        self.io_stats.opens += 1
+
+    def __check(self, read_bytes: int = 0, reads: int = 0, seeks: int = 0) -> None:
+        if self.budget is not None and self.enforce and not self.__flagged:
+            self.__flagged = self.budget.check(self.name, self.io_stats, read_bytes, reads, seeks, self.__start)
+
+    def read(self, size: int = -1) -> bytes:
+        self.__check(max(size, 0) if size is not None else 0, reads=1)
+
+        data = self.__file.read(size)
+        self.io_stats.reads += 1
+        self.io_stats.bytes_read += len(data)
+        return data
+
+    def write(self, data: bytes) -> int:
+        written = self.__file.write(data)
+        self.io_stats.writes += 1
+        self.io_stats.bytes_written += written if written is not None else len(data)
+        return written
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        self.__check(seeks=1)
+
+        self.io_stats.seeks += 1
+        return self.__file.seek(offset, whence)
+
+    def __getattr__(self, name: str):
+        return getattr(self.__file, name)
+
+    def __enter__(self) -> "CountingFile":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.__file.close()
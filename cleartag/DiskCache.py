@@ -0,0 +1,87 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+from cleartag.Track import Track
+from cleartag.TrackCache import TrackCache
+
+
+class DiskCache(TrackCache):
+    """
+    Persistent cache of read_tags results in a local SQLite database, keyed by (device, inode) and validated against
+    size and mtime_ns, so a file which is renamed within a filesystem stays cached. The connection is reopened in
+    each process, so a DiskCache can be passed to read_tags_many with either executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = None
+        self.__pid = None
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__connection is None or self.__pid != os.getpid():
+            self.__connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute("PRAGMA synchronous=NORMAL")
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS tracks (dev INTEGER, ino INTEGER, size INTEGER, "
+                                      "mtime_ns INTEGER, path TEXT, data TEXT, PRIMARY KEY (dev, ino))")
+            self.__connection.execute("CREATE INDEX IF NOT EXISTS tracks_path ON tracks (path)")
+            self.__pid = os.getpid()
+
+        return self.__connection
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[Track]:
+        dev, ino, size, mtime_ns = self.get_identity(stat)
+
+        with self.__lock:
+            row = self.__connect().execute("SELECT size, mtime_ns, data FROM tracks WHERE dev = ? AND ino = ?",
+                                           (dev, ino)).fetchone()
+
+            if row is None or row[0] != size or row[1] != mtime_ns:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return Track.from_dict(json.loads(row[2]))
+
+    def put(self, path: str, stat: os.stat_result, track: Track) -> None:
+        data = json.dumps(track.to_dict())
+
+        with self.__lock:
+            self.__connect().execute("INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?)",
+                                     self.get_identity(stat) + (path, data))
+
+    def invalidate(self, path: str, stat: os.stat_result = None) -> None:
+        with self.__lock:
+            connection = self.__connect()
+            connection.execute("DELETE FROM tracks WHERE path = ?", (path,))
+            if stat is not None:
+                connection.execute("DELETE FROM tracks WHERE dev = ? AND ino = ?", (stat.st_dev, stat.st_ino))
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connect().execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__connection is not None and self.__pid == os.getpid():
+                self.__connection.close()
+            self.__connection = None
+
+    def __enter__(self) -> "DiskCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        return {"path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"])
@@ -1,2 +1,14 @@
 class ClearTagError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class IOBudgetExceeded(ClearTagError):
+    """Raised in strict mode when reading a file would exceed its IOBudget"""
+
+    def __init__(self, path: str, reason: str) -> None:
+        super().__init__("I/O budget exceeded for {0}: {1}".format(path, reason))
+        self.path = path
+        self.reason = reason
+
+    def __reduce__(self):
+        return IOBudgetExceeded, (self.path, self.reason)
@@ -0,0 +1,188 @@
+import os
+
+from cleartag.IOBudget import IOBudget
+from cleartag.IOStats import IOStats
+from cleartag.mpeg import XING_SEARCH_SIZE, get_id3_end
+
+HEAD_SIZE = 16 * 1024
+LEGACY_BUFFER_SIZE = 8 * 1024  # io.DEFAULT_BUFFER_SIZE, as used by open() in the legacy path
+
+
+class FileReader:
+    """
+    Read-only file object which opens a file once, reads its leading region (any ID3v2 tag plus the Xing search window)
+    into a single buffer, and serves reads from that buffer before falling back to the file. With prefetch_tag=False,
+    only the first HEAD_SIZE bytes are buffered, for readers which seek past most of the tag. With read_ahead, which
+    defaults to prefetch_tag, reads past the head fill a buffer of at least LEGACY_BUFFER_SIZE bytes as the legacy
+    buffered reader did, so that mutagen's walks of small headers (MP4 atoms, say) cost no more reads than they used to;
+    native readers, which skip what they do not need, read only what they ask for. The reads and seeks made by consumers
+    are replayed against a model of the buffered file object mutagen opened in the legacy path, and recorded as the
+    legacy cost in io_stats, against which the reader's own I/O is compared on close. Reads from the file are checked
+    against budget, if given.
+    """
+
+    def __init__(self, path: str, io_stats: IOStats = None, budget: IOBudget = None,
+                 prefetch_tag: bool = True) -> None:
+        self.name = path
+        self.io_stats = io_stats if io_stats is not None else IOStats()
+        self.budget = budget
+        self.read_ahead = prefetch_tag
+        self.__flagged = False
+        self.__start = (self.io_stats.syscalls, self.io_stats.bytes_read)
+        self.__budget_start = IOBudget.get_usage(self.io_stats)
+
+        self.__file = open(path, "rb", buffering=0)
+        self.io_stats.opens += 1
+        try:
+            self.size = os.fstat(self.__file.fileno()).st_size
+            self.io_stats.stats += 1
+
+            self.__pos = 0
+            self.__file_pos = 0
+            self.__legacy_buffer = (0, 0)
+            self.__buffer = b""
+            self.__buffer_start = 0
+            self.head = b""
+            self.__prefetch(prefetch_tag)
+        except BaseException:
+            self.__file.close()
+            raise
+
+    def __prefetch(self, prefetch_tag: bool) -> None:
+        # the prefetch is speculative, so it takes at most half of a byte budget, leaving the rest to the parsers
+        limit = self.size
+        if self.budget is not None and self.budget.max_bytes is not None:
+            limit = min(limit, self.budget.max_bytes // 2)
+
+        self.head = self.__read_at(0, min(limit, HEAD_SIZE))
+        if not prefetch_tag:
+            return
+
+        # extend the buffer past the ID3 tag, so that the Xing search window is always covered
+        id3_end = get_id3_end(self.head)
+        if id3_end is not None:
+            wanted = min(limit, id3_end + XING_SEARCH_SIZE)
+            if wanted > len(self.head):
+                self.head += self.__read_at(len(self.head), wanted - len(self.head))
+
+    def __read_at(self, offset: int, size: int) -> bytes:
+        if self.budget is not None and not self.__flagged:
+            self.__flagged = self.budget.check(self.name, self.io_stats, size, reads=1,
+                                               seeks=1 if self.__file_pos != offset else 0,
+                                               start=self.__budget_start)
+
+        if self.__file_pos != offset:
+            self.__file.seek(offset)
+            self.io_stats.seeks += 1
+
+        chunks = []
+        while size > 0:
+            chunk = self.__file.read(size)
+            self.io_stats.reads += 1
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+
+        data = b"".join(chunks)
+        self.io_stats.bytes_read += len(data)
+        self.__file_pos = offset + len(data)
+
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = max(self.size - self.__pos, 0)
+        if size == 0:
+            return b""
+
+        end = min(self.__pos + size, self.size)
+        data = self.head[self.__pos:end] if self.__pos < len(self.head) else b""
+        if self.__pos + len(data) < end:
+            data += self.__read_buffered(self.__pos + len(data), end)
+
+        self.__replay_legacy_read(self.__pos, end)
+        self.__pos += len(data)
+
+        return data
+
+    def __read_buffered(self, start: int, end: int) -> bytes:
+        if not self.read_ahead:
+            return self.__read_at(start, end - start)
+
+        data = b""
+        if self.__buffer_start <= start < self.__buffer_start + len(self.__buffer):
+            data = self.__buffer[start - self.__buffer_start:end - self.__buffer_start]
+            start += len(data)
+
+        # as a buffered reader, the rest of a read which runs past the buffer refills it
+        if start < end:
+            self.__fill_buffer(start, end)
+            data += self.__buffer[:end - start]
+
+        return data
+
+    def __fill_buffer(self, start: int, end: int) -> None:
+        # reading ahead must not spend a byte budget the parser itself would not
+        limit = self.size - start
+        if self.budget is not None and self.budget.max_bytes is not None:
+            used = IOBudget.get_usage(self.io_stats)[0] - self.__budget_start[0]
+            limit = min(limit, self.budget.max_bytes - used)
+
+        self.__buffer = self.__read_at(start, max(min(LEGACY_BUFFER_SIZE, limit), end - start))
+        self.__buffer_start = start
+
+    def __replay_legacy_read(self, start: int, end: int) -> None:
+        buffer_start, buffer_end = self.__legacy_buffer
+        if buffer_start <= start and end <= buffer_end:
+            return
+
+        # a buffered reader fills its buffer from the first byte it does not hold
+        fill_start = start if not buffer_start <= start < buffer_end else buffer_end
+        fill_end = min(max(end, fill_start + LEGACY_BUFFER_SIZE), self.size)
+        self.io_stats.add_legacy(reads=1, bytes_read=fill_end - fill_start)
+        self.__legacy_buffer = (start if fill_start == start else buffer_start, fill_end)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            pos = offset
+        elif whence == os.SEEK_CUR:
+            pos = self.__pos + offset
+        elif whence == os.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError("Invalid whence ({0})".format(whence))
+
+        if pos < 0:
+            raise OSError("Negative seek position {0}".format(pos))
+
+        if whence == os.SEEK_END or not self.__legacy_buffer[0] <= pos <= self.__legacy_buffer[1]:
+            self.io_stats.add_legacy(seeks=1)
+        self.__pos = pos
+
+        return self.__pos
+
+    def tell(self) -> int:
+        return self.__pos
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        if not self.__file.closed:
+            self.io_stats.add_compared(self.io_stats.syscalls - self.__start[0],
+                                       self.io_stats.bytes_read - self.__start[1])
+        self.__file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def __enter__(self) -> "FileReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
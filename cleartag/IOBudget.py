@@ -0,0 +1,66 @@
+from typing import Optional, Tuple
+
+from cleartag.Exceptions import IOBudgetExceeded
+from cleartag.IOStats import IOStats
+
+
+class IOBudget:
+    """
+    Limits on the I/O of a single read_tags, read_xing or write_tags call, checked before each read and seek. In strict
+    mode, a read which would exceed the budget raises IOBudgetExceeded instead of being performed. Otherwise the read
+    goes ahead, and the file is flagged once in violations as (path, reason). For write_tags, the budget covers loading
+    the existing tags; saving is accounted in IOStats but never interrupted.
+
+    Only the I/O since the call opened its file counts, so one IOStats may collect many budgeted calls. read_tags
+    prefetches the first HEAD_SIZE (16KB) of a file, and with the mutagen backend any ID3v2 tag and the Xing search
+    window after it. The prefetch takes at most half of max_bytes, leaving the rest to the parsers, which also read
+    the end of the file; an MP3's stream info needs its 10KB Xing search window whatever the budget.
+    """
+
+    def __init__(self, max_bytes: int = None, max_reads: int = None, max_seeks: int = None,
+                 strict: bool = True) -> None:
+        self.max_bytes = max_bytes
+        self.max_reads = max_reads
+        self.max_seeks = max_seeks
+        self.strict = strict
+        self.violations = []
+
+    @staticmethod
+    def get_usage(io_stats: IOStats) -> Tuple[int, int, int]:
+        """return the bytes read, reads and seeks in io_stats, recorded as a call's start"""
+        return io_stats.bytes_read, io_stats.reads, io_stats.seeks
+
+    def get_violation(self, io_stats: IOStats, read_bytes: int = 0, reads: int = 0, seeks: int = 0,
+                      start: Tuple[int, int, int] = (0, 0, 0)) -> Optional[str]:
+        """return why the next operation would exceed the budget, counting from start (see get_usage), or None"""
+
+        start_bytes, start_reads, start_seeks = start
+        bytes_read = io_stats.bytes_read - start_bytes + read_bytes
+        if self.max_bytes is not None and bytes_read > self.max_bytes:
+            return "{0} bytes read, limit {1}".format(bytes_read, self.max_bytes)
+        if self.max_reads is not None and io_stats.reads - start_reads + reads > self.max_reads:
+            return "{0} reads, limit {1}".format(io_stats.reads - start_reads + reads, self.max_reads)
+        if self.max_seeks is not None and io_stats.seeks - start_seeks + seeks > self.max_seeks:
+            return "{0} seeks, limit {1}".format(io_stats.seeks - start_seeks + seeks, self.max_seeks)
+        return None
+
+    def check(self, path: str, io_stats: IOStats, read_bytes: int = 0, reads: int = 0, seeks: int = 0,
+              start: Tuple[int, int, int] = (0, 0, 0)) -> bool:
+        """
+        check the next operation of a call which started at start against the budget, raising in strict mode. Returns
+        True if the file was flagged by this check
+        """
+
+        reason = self.get_violation(io_stats, read_bytes, reads, seeks, start)
+        if reason is None:
+            return False
+
+        if self.strict:
+            raise IOBudgetExceeded(path, reason)
+
+        self.violations.append((path, reason))
+        return True
+
+    def __repr__(self) -> str:
+        return "IOBudget(max_bytes={0}, max_reads={1}, max_seeks={2}, strict={3}, violations={4})".format(
+            self.max_bytes, self.max_reads, self.max_seeks, self.strict, len(self.violations))
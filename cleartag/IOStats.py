@@ -0,0 +1,59 @@
+class IOStats:
+    """
+    I/O counters for a single read or write, compared against the legacy path (os.path.isfile, mutagen.File on the path,
+    then a second open and stat in read_xing). Counts are taken at the level of calls on an unbuffered handle, so
+    each open, stat, read and seek is one syscall. Only reads which record a legacy baseline (read_tags) are compared
+    against it, so the savings never count writes, or reads such as read_xing which have no legacy cost.
+    """
+
+    def __init__(self) -> None:
+        self.opens = 0
+        self.stats = 0
+        self.reads = 0
+        self.seeks = 0
+        self.bytes_read = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+        self.legacy_opens = 0
+        self.legacy_stats = 0
+        self.legacy_reads = 0
+        self.legacy_seeks = 0
+        self.legacy_bytes_read = 0
+
+        # the I/O of the reads which recorded a legacy baseline
+        self.compared_syscalls = 0
+        self.compared_bytes_read = 0
+
+    @property
+    def syscalls(self) -> int:
+        return self.opens + self.stats + self.reads + self.seeks + self.writes
+
+    @property
+    def legacy_syscalls(self) -> int:
+        return self.legacy_opens + self.legacy_stats + self.legacy_reads + self.legacy_seeks
+
+    @property
+    def saved_syscalls(self) -> int:
+        return self.legacy_syscalls - self.compared_syscalls
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.legacy_bytes_read - self.compared_bytes_read
+
+    def add_legacy(self, opens: int = 0, stats: int = 0, reads: int = 0, seeks: int = 0, bytes_read: int = 0) -> None:
+        self.legacy_opens += opens
+        self.legacy_stats += stats
+        self.legacy_reads += reads
+        self.legacy_seeks += seeks
+        self.legacy_bytes_read += bytes_read
+
+    def add_compared(self, syscalls: int, bytes_read: int) -> None:
+        self.compared_syscalls += syscalls
+        self.compared_bytes_read += bytes_read
+
+    def __repr__(self) -> str:
+        return "IOStats(opens={0}, stats={1}, reads={2}, seeks={3}, bytes_read={4}, writes={5}, bytes_written={6}, " \
+               "saved_syscalls={7}, saved_bytes={8})".format(self.opens, self.stats, self.reads, self.seeks,
+                                                             self.bytes_read, self.writes, self.bytes_written,
+                                                             self.saved_syscalls, self.saved_bytes)
@@ -0,0 +1,88 @@
+import copy
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from cleartag.Track import Track
+from cleartag.TrackCache import TrackCache
+
+TRACK_OVERHEAD = 1024  # approximate bytes for a Track, StreamInfo and Xing, excluding their strings
+
+
+class MemoryCache(TrackCache):
+    """
+    Thread-safe, in-process LRU cache of read_tags results, bounded by entry count and/or approximate size in bytes.
+    Entries are validated against os.stat, and copies are returned so that callers cannot modify cached entries.
+    """
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None) -> None:
+        assert max_entries or max_bytes, "A bound on entries or bytes is required"
+        super().__init__()
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.size_bytes = 0
+
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[Track]:
+        with self.__lock:
+            entry = self.__entries.get(path)
+
+            if entry is None or entry[0] != self.get_identity(stat):
+                if entry is not None:
+                    self.__remove(path)
+                self.misses += 1
+                return None
+
+            self.__entries.move_to_end(path)
+            self.hits += 1
+
+        return copy.deepcopy(entry[1])
+
+    def put(self, path: str, stat: os.stat_result, track: Track) -> None:
+        track = copy.deepcopy(track)
+        size = self.estimate_size(track)
+
+        with self.__lock:
+            if path in self.__entries:
+                self.__remove(path)
+
+            self.__entries[path] = (self.get_identity(stat), track, size)
+            self.size_bytes += size
+
+            while len(self.__entries) > 1 and \
+                    ((self.max_entries and len(self.__entries) > self.max_entries) or
+                     (self.max_bytes and self.size_bytes > self.max_bytes)):
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def invalidate(self, path: str, stat: os.stat_result = None) -> None:
+        with self.__lock:
+            if path in self.__entries:
+                self.__remove(path)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.size_bytes = 0
+
+    def __remove(self, path: str) -> None:
+        self.size_bytes -= self.__entries.pop(path)[2]
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def estimate_size(track: Track) -> int:
+        strings = track.artists + track.release_artists + track.genres + \
+                  [track.date, track.release_title, track.track_title, track.comment]
+        return TRACK_OVERHEAD + sum(sys.getsizeof(x) for x in strings if x is not None)
+
+    def __repr__(self) -> str:
+        return "MemoryCache(entries={0}, bytes={1}, hits={2}, misses={3}, evictions={4})".format(
+            len(self), self.size_bytes, self.hits, self.misses, self.evictions)
@@ -0,0 +1,34 @@
+from typing import Dict, List, Optional
+
+from mutagen.mp3 import BitrateMode
+
+from cleartag.enums.TagType import TagType
+
+
+class NativeFile:
+    """
+    The tags and stream properties of a file read by one of cleartag's own parsers (ReadBackend.NATIVE), in the
+    shape read_tags takes from mutagen: tags maps lower case "easy" keys, such as "artist" and "tracknumber", to
+    lists of strings, and pictures holds the size in bytes of each embedded picture, which is never read
+    """
+
+    __slots__ = ("tag_type", "tags", "comment", "always_write", "length", "bitrate", "bits_per_sample",
+                 "bitrate_mode", "codec", "pictures")
+
+    def __init__(self, tag_type: TagType, tags: Dict[str, List[str]], length: float, bitrate: int,
+                 bits_per_sample: int = None, comment: Optional[str] = None, always_write: bool = False,
+                 bitrate_mode: BitrateMode = None, pictures: List[int] = None, codec: str = None) -> None:
+        self.tag_type = tag_type
+        self.tags = tags
+        self.comment = comment
+        self.always_write = always_write
+        self.length = length
+        self.bitrate = bitrate
+        self.bits_per_sample = bits_per_sample
+        self.bitrate_mode = bitrate_mode  # MP3 only
+        self.codec = codec  # MP4 and Ogg only
+        self.pictures = pictures if pictures is not None else []
+
+    def __repr__(self) -> str:
+        return "NativeFile({0}, length={1}, bitrate={2}, tags={3})".format(self.tag_type.name, self.length,
+                                                                           self.bitrate, sorted(self.tags))
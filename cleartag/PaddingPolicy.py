@@ -0,0 +1,32 @@
+from mutagen._tags import PaddingInfo
+
+
+class PaddingPolicy:
+    """
+    Decide how much padding to leave after a tag when saving, as a mutagen padding callback. While an edit fits in
+    the existing padding, the padding is kept so the tag is rewritten in place. When the file has to be rewritten,
+    reserve_bytes plus reserve_percent of the audio size is reserved, so that later edits fit in place. Padding
+    beyond max_padding is only reclaimed if max_padding is set, since reclaiming it also rewrites the file.
+    """
+
+    def __init__(self, reserve_bytes: int = 8 * 1024, reserve_percent: float = 0.0, max_padding: int = None) -> None:
+        assert reserve_bytes >= 0 and reserve_percent >= 0, "Padding must not be negative"
+        assert max_padding is None or max_padding >= reserve_bytes, "max_padding must allow the reserved padding"
+
+        self.reserve_bytes = reserve_bytes
+        self.reserve_percent = reserve_percent
+        self.max_padding = max_padding
+
+    def get_reserve(self, size: int) -> int:
+        reserve = self.reserve_bytes + int(size * self.reserve_percent / 100)
+        return min(reserve, self.max_padding) if self.max_padding is not None else reserve
+
+    def __call__(self, info: PaddingInfo) -> int:
+        if info.padding >= 0 and (self.max_padding is None or info.padding <= self.max_padding):
+            return info.padding
+
+        return self.get_reserve(info.size)
+
+    def __repr__(self) -> str:
+        return "PaddingPolicy(reserve_bytes={0}, reserve_percent={1}, max_padding={2})".format(
+            self.reserve_bytes, self.reserve_percent, self.max_padding)
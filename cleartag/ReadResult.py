@@ -0,0 +1,22 @@
+from cleartag.Exceptions import ClearTagError
+from cleartag.Track import Track
+
+
+class ReadResult:
+    """The outcome of reading one file in a batch: either a Track, or the ClearTagError raised while reading it"""
+
+    def __init__(self, path: str, track: Track = None, error: ClearTagError = None) -> None:
+        assert (track is None) != (error is None), "A result holds either a track or an error"
+
+        self.path = path
+        self.track = track
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return "ReadResult({0})".format(self.path)
+        return "ReadResult({0}, error={1!r})".format(self.path, self.error)
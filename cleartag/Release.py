@@ -0,0 +1,114 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from cleartag.ClearTag import scan_library, AUDIO_EXTENSIONS
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.Track import Track
+
+
+class Release:
+    """
+    The tracks of one release, grouped by release artists, release title and date, and ordered by Track.sort_key.
+    Release-level facts are computed in a single pass when the release is built.
+    """
+
+    def __init__(self, tracks: Iterable[Track], paths: Iterable[Optional[str]] = None) -> None:
+        tracks = list(tracks)
+        paths = list(paths) if paths is not None else [None] * len(tracks)
+        assert len(paths) == len(tracks), "One path is required per track"
+
+        order = sorted(range(len(tracks)), key=lambda i: tracks[i].sort_key())
+        self.tracks = [tracks[i] for i in order]
+        self.paths = [paths[i] for i in order]
+
+        first = self.tracks[0] if self.tracks else Track()
+        self.release_artists = first.release_artists
+        self.release_title = first.release_title
+        self.date = first.date
+
+        self.codec_setting = None  # the (format, setting) shared by every track, or None if they differ
+        self.duplicate_track_numbers = []  # (disc number, track number) appearing more than once
+        self.missing_track_numbers = []  # (disc number, track number) absent from a disc's numbering
+
+        self.__analyse()
+
+    def __analyse(self) -> None:
+        codecs = set()
+        seen = set()
+        disc_tracks = OrderedDict()
+        disc_totals = {}
+
+        for track in self.tracks:
+            if track.stream_info is not None:
+                codecs.add(track.get_codec_setting())
+
+            if track.track_number is None:
+                continue
+
+            number = (track.disc_number, track.track_number)
+            if number in seen:
+                if not self.duplicate_track_numbers or self.duplicate_track_numbers[-1] != number:
+                    self.duplicate_track_numbers.append(number)
+            seen.add(number)
+
+            disc_tracks.setdefault(track.disc_number, []).append(track.track_number)
+            if track.total_tracks:
+                disc_totals[track.disc_number] = max(disc_totals.get(track.disc_number, 0), track.total_tracks)
+
+        if len(codecs) == 1:
+            self.codec_setting = codecs.pop()
+
+        # tracks are in key order, so each disc's numbers are sorted
+        for disc_number, numbers in disc_tracks.items():
+            last = max(numbers[-1], disc_totals.get(disc_number, 0))
+            present = set(numbers)
+            self.missing_track_numbers.extend((disc_number, x) for x in range(1, last + 1) if x not in present)
+
+    def get_key(self) -> Tuple[Tuple[str, ...], Optional[str], Optional[str]]:
+        return Release.get_track_key(self.tracks[0]) if self.tracks else ((), None, None)
+
+    @staticmethod
+    def get_track_key(track: Track) -> Tuple[Tuple[str, ...], Optional[str], Optional[str]]:
+        """return the key identifying a track's release: (release artists, release title, date)"""
+        return tuple(track.release_artists), track.release_title, track.date
+
+    @staticmethod
+    def group(tracks: Iterable[Union[Track, ReadResult, Tuple[str, Union[Track, ClearTagError]]]]) -> List["Release"]:
+        """
+        group tracks into releases, in order of first appearance. Accepts Tracks, read_tags_many results, or
+        scan_library's (path, Track) pairs; errors are skipped
+        """
+
+        groups = OrderedDict()  # type: Dict[tuple, Tuple[List[Track], List[Optional[str]]]]
+
+        for item in tracks:
+            path = None
+            if isinstance(item, ReadResult):
+                path, item = item.path, item.track
+            elif isinstance(item, tuple):
+                path, item = item
+
+            if not isinstance(item, Track):
+                continue
+
+            group_tracks, group_paths = groups.setdefault(Release.get_track_key(item), ([], []))
+            group_tracks.append(item)
+            group_paths.append(path)
+
+        return [Release(group_tracks, group_paths) for group_tracks, group_paths in groups.values()]
+
+    @staticmethod
+    def from_directory(root: str, extensions: Iterable[str] = AUDIO_EXTENSIONS, **kwargs) -> List["Release"]:
+        """scan a directory tree, and group its readable tracks into releases. kwargs are passed to read_tags"""
+        return Release.group(scan_library(root, extensions, **kwargs))
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __iter__(self):
+        return iter(self.tracks)
+
+    def __repr__(self) -> str:
+        return "Release({0} - {1} ({2}), tracks={3})".format(", ".join(self.release_artists), self.release_title,
+                                                             self.date, len(self.tracks))
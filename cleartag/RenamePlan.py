@@ -0,0 +1,168 @@
+import os
+from collections import OrderedDict
+from typing import Iterable, List, Tuple, Union
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.Release import Release
+from cleartag.Track import Track
+
+TEMP_SUFFIX = ".cleartag-rename"
+
+
+class RenamePlan:
+    """
+    Renames of many tracks to their Track.get_filename, planned up front. Tracks which are already correctly named
+    are left alone, and targets claimed by more than one track, or by a file outside the plan, are reported as
+    collisions rather than renamed. The remaining renames are ordered so that each is a single os.rename, with a
+    temporary name only where renames form a cycle.
+    """
+
+    def __init__(self) -> None:
+        self.operations = []  # (source, target) os.rename calls, in order
+        self.unchanged = []  # paths which already have their target name
+        self.collisions = []  # (target, [sources]) which were not renamed
+        self.skipped = []  # paths whose track lacks the fields for a filename
+
+    @staticmethod
+    def build(items: Iterable[Union[Release, ReadResult, Tuple[str, Track]]],
+              include_artist: bool = False) -> "RenamePlan":
+        """
+        plan renames for Releases, read_tags_many results, or (path, Track) pairs. Targets are in the same directory
+        as their source
+        """
+
+        plan = RenamePlan()
+        claims = OrderedDict()  # target -> [sources]
+
+        for path, track in RenamePlan.__iter_tracks(items):
+            filename = track.get_filename(include_artist)
+            if filename is None:
+                plan.skipped.append(path)
+                continue
+
+            target = os.path.join(os.path.dirname(path), filename)
+            if target == path:
+                plan.unchanged.append(path)
+                continue
+
+            claims.setdefault(target, []).append(path)
+
+        renames = OrderedDict()
+        for target, sources in claims.items():
+            if len(sources) > 1:
+                plan.collisions.append((target, sources))
+            else:
+                renames[sources[0]] = target
+
+        # a target may only exist if its current occupant is being renamed out of the way. Dropping a rename leaves
+        # its source in place, which may block a rename onto it, so repeat until nothing more is dropped
+        dropped = True
+        while dropped:
+            dropped = False
+            for source, target in list(renames.items()):
+                if target not in renames and os.path.lexists(target) and not RenamePlan.__same_file(source, target):
+                    plan.collisions.append((target, [source]))
+                    del renames[source]
+                    dropped = True
+
+        plan.operations = RenamePlan.__order(renames)
+        return plan
+
+    @staticmethod
+    def __iter_tracks(items) -> Iterable[Tuple[str, Track]]:
+        for item in items:
+            if isinstance(item, Release):
+                for path, track in zip(item.paths, item.tracks):
+                    assert path is not None, "Releases must be built with paths to be renamed"
+                    yield path, track
+            elif isinstance(item, ReadResult):
+                if item.ok:
+                    yield item.path, item.track
+            elif isinstance(item[1], Track):
+                yield item
+
+    @staticmethod
+    def __same_file(source: str, target: str) -> bool:
+        """True if target is source under another name, as with a case-only rename on a case-insensitive filesystem"""
+        try:
+            return os.path.samefile(source, target)
+        except OSError:
+            return False
+
+    @staticmethod
+    def __order(renames: "OrderedDict[str, str]") -> List[Tuple[str, str]]:
+        """order renames so that no target is overwritten while its occupant is still waiting to move"""
+
+        pending = OrderedDict(sorted(renames.items(), key=lambda x: os.path.dirname(x[0])))
+        operations = []
+
+        while pending:
+            progress = False
+            for source, target in list(pending.items()):
+                if target not in pending:
+                    operations.append((source, target))
+                    del pending[source]
+                    progress = True
+
+            if not progress:
+                # only cycles remain: break one by moving its first source to a temporary name
+                source, target = next(iter(pending.items()))
+                temp = source + TEMP_SUFFIX
+                operations.append((source, temp))
+                del pending[source]
+                pending[temp] = target
+
+        return operations
+
+    @staticmethod
+    def __check(operations: List[Tuple[str, str]]) -> None:
+        """
+        raise ClearTagError if a rename's source has gone, or its target has appeared since the plan was built. As
+        os.rename silently replaces files, every rename is checked before the first is made
+        """
+
+        sources = set(source for source, _ in operations)
+        renamed = set()
+        for source, target in operations:
+            if source not in renamed and not os.path.lexists(source):
+                raise ClearTagError("Rename source {0} does not exist".format(source))
+            if target.endswith(TEMP_SUFFIX):
+                if os.path.lexists(target):
+                    raise ClearTagError("Temporary rename target {0} already exists".format(target))
+            elif target not in sources and os.path.lexists(target) and not RenamePlan.__same_file(source, target):
+                raise ClearTagError("Rename target {0} already exists".format(target))
+            renamed.add(target)
+
+    def apply(self, dry_run: bool = False) -> List[Tuple[str, str]]:
+        """
+        perform the planned renames, or with dry_run, only return them. If any rename would replace a file, or its
+        source is missing, ClearTagError is raised before anything is renamed
+        """
+
+        if dry_run:
+            return list(self.operations)
+
+        RenamePlan.__check(self.operations)
+        for source, target in self.operations:
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                raise ClearTagError("Could not rename {0} to {1}".format(source, target)) from e
+
+        return list(self.operations)
+
+    def describe(self) -> List[str]:
+        """return the plan as human-readable lines, for a dry run"""
+
+        lines = ["rename {0} -> {1}".format(source, target) for source, target in self.operations]
+        lines.extend("collision {0} <- {1}".format(target, ", ".join(sources)) for target, sources in self.collisions)
+        lines.extend("skip {0}".format(path) for path in self.skipped)
+        return lines
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def __repr__(self) -> str:
+        return "RenamePlan(operations={0}, unchanged={1}, collisions={2}, skipped={3})".format(
+            len(self.operations), len(self.unchanged), len(self.collisions), len(self.skipped))
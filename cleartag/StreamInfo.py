@@ -1,25 +1,77 @@
+from typing import Dict, Callable
+
 from cleartag.Xing import Xing
 from cleartag.enums.Mp3Method import Mp3Method
 from cleartag.enums.TagType import TagType
 
 
 class StreamInfo:
+    """
+    Stream properties of a track. The Xing header may be given as xing_loader, a callable which is run on first
+    access to xing or mp3_method, so that reads which never inspect them do not parse it. to_dict does not run the
+    loader: it records the header as not loaded, and from_dict restores it as unavailable. For MP4, codec is the
+    sample entry's codec string, as reported by mutagen (e.g. "mp4a.40.2" or "alac"), and for Ogg, "vorbis" or
+    "opus".
+    """
+
+    __slots__ = ("tag_type", "length", "bitrate", "bits_per_sample", "codec", "__mp3_method", "__xing",
+                 "__xing_loader")
 
     def __init__(self, tag_type: TagType, length: float, bitrate: int, bits_per_sample: int = None,
-                 mp3_method: Mp3Method = None, xing: Xing = None) -> None:
+                 mp3_method: Mp3Method = None, xing: Xing = None, xing_loader: Callable[[], Xing] = None,
+                 codec: str = None) -> None:
 
         assert isinstance(tag_type, TagType)
         assert isinstance(length, float) and length > 0, "Invalid track length"
         assert isinstance(bitrate, int) and bitrate > 0, "Invalid bitrate"
         assert mp3_method != Mp3Method.UNKNOWN, "Unknown mp3 method"
         assert tag_type != TagType.UNKNOWN, "Unknown tag type '{0}'".format(tag_type)
+        assert xing is None or xing_loader is None, "Only one of xing and xing_loader may be given"
 
         self.tag_type = tag_type
         self.length = length
         self.bitrate = bitrate
         self.bits_per_sample = bits_per_sample
-        self.mp3_method = mp3_method
-        self.xing = xing
+        self.codec = codec
+        self.__mp3_method = mp3_method
+        self.__xing = xing
+        self.__xing_loader = xing_loader
+
+    @property
+    def xing(self) -> Xing:
+        self.__load_xing()
+        return self.__xing
+
+    @xing.setter
+    def xing(self, xing: Xing) -> None:
+        self.__xing = xing
+        self.__xing_loader = None
+
+    @property
+    def mp3_method(self) -> Mp3Method:
+        self.__load_xing()
+        return self.__mp3_method
+
+    @mp3_method.setter
+    def mp3_method(self, mp3_method: Mp3Method) -> None:
+        self.__mp3_method = mp3_method
+
+    def is_xing_loaded(self) -> bool:
+        return self.__xing_loader is None
+
+    def __load_xing(self) -> None:
+        if self.__xing_loader is None:
+            return
+
+        self.__xing = self.__xing_loader()
+        self.__xing_loader = None
+        if self.__mp3_method is None and self.__xing is not None:
+            self.__mp3_method = self.__xing.method
+
+    @staticmethod
+    def unavailable_xing() -> None:
+        """xing_loader of a StreamInfo restored from a record made before its Xing header was loaded"""
+        return None
 
     def get_ext(self):
         if self.tag_type == TagType.FLAC:
@@ -28,10 +80,37 @@ class StreamInfo:
             return "mp3"
         if self.tag_type == TagType.MP4:
             return "mp4"
+        if self.tag_type == TagType.VORBIS:
+            return "opus" if self.codec == "opus" else "ogg"
+
+    def to_dict(self) -> Dict:
+        # a lazy Xing header is not loaded here, so that caching or tabulating a track does not reopen its file
+        return {
+            "tag_type": self.tag_type.name,
+            "length": self.length,
+            "bitrate": self.bitrate,
+            "bits_per_sample": self.bits_per_sample,
+            "codec": self.codec,
+            "mp3_method": self.__mp3_method.name if self.__mp3_method else None,
+            "xing": self.__xing.to_dict() if self.__xing else None,
+            "xing_loaded": self.is_xing_loaded(),
+        }
+
+    @staticmethod
+    def from_dict(values: Dict) -> "StreamInfo":
+        return StreamInfo(tag_type=TagType[values["tag_type"]],
+                          length=values["length"],
+                          bitrate=values["bitrate"],
+                          bits_per_sample=values["bits_per_sample"],
+                          mp3_method=Mp3Method[values["mp3_method"]] if values["mp3_method"] else None,
+                          xing=Xing.from_dict(values["xing"]) if values["xing"] else None,
+                          xing_loader=None if values.get("xing_loaded", True) else StreamInfo.unavailable_xing,
+                          codec=values.get("codec"))
 
     def __eq__(self, other: "StreamInfo") -> bool:
         return self.tag_type == other.tag_type \
                and self.bits_per_sample == other.bits_per_sample \
+               and self.codec == other.codec \
                and self.xing == other.xing
 
     def __ne__(self, other: "StreamInfo") -> bool:
@@ -43,7 +122,9 @@ class StreamInfo:
                 Length:      {length} sec
                 Bitrate:     {bitrate}
                 Bits:        {bits_per_sample}
+                Codec:       {codec}
                 Mp3 method:  {mp3_method}
                 Xing:        {xing}""".format(tag_type=self.tag_type, length=self.length, bitrate=self.bitrate,
-                                              bits_per_sample=self.bits_per_sample, mp3_method=self.mp3_method,
+                                              bits_per_sample=self.bits_per_sample, codec=self.codec,
+                                              mp3_method=self.mp3_method,
                                               xing=self.xing))
@@ -0,0 +1,123 @@
+import contextvars
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+READ_PHASES = ("cache", "open", "tag_parse", "tag_extract", "xing_parse", "track_build")
+WRITE_PHASES = ("tag_parse", "compare", "save")
+
+
+class FileTiming:
+    """The time spent in each phase of one read_tags or write_tags call, with the file's size and mutagen format"""
+
+    __slots__ = ("path", "operation", "size", "format", "phases", "__timings", "__last")
+
+    def __init__(self, timings: "Timings", path: str, operation: str) -> None:
+        self.path = path
+        self.operation = operation
+        self.size = None
+        self.format = None
+        self.phases = {}  # phase -> seconds
+
+        self.__timings = timings
+        self.__last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """record the time since the previous lap (or the start) against a phase"""
+
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.__last
+        self.__last = now
+
+    def finish(self) -> None:
+        self.__timings.add(self)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def __repr__(self) -> str:
+        return "FileTiming({0}, {1}, {2})".format(self.operation, self.path, ", ".join(
+            "{0}={1:.6f}".format(phase, seconds) for phase, seconds in self.phases.items()))
+
+
+class Timings:
+    """
+    Collects per-phase timings of read_tags and write_tags calls made in the current context, while active as a
+    context manager. Each call produces a FileTiming, which is kept in records and/or passed to callback. When no
+    collector is active, the cost to a call is one context variable lookup.
+
+    The context is propagated to read_tags_many's thread executor and to async_read_tags, but not to worker
+    processes.
+    """
+
+    __current = contextvars.ContextVar("cleartag_timings", default=None)
+
+    def __init__(self, callback: Callable[[FileTiming], None] = None, keep: bool = True) -> None:
+        self.callback = callback
+        self.keep = keep
+        self.records = []  # type: List[FileTiming]
+
+        self.__tokens = []
+
+    def __enter__(self) -> "Timings":
+        self.__tokens.append(Timings.__current.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        Timings.__current.reset(self.__tokens.pop())
+
+    @staticmethod
+    def start(path: str, operation: str) -> Optional[FileTiming]:
+        """begin timing a call, or return None if no collector is active"""
+
+        timings = Timings.__current.get()
+        if timings is None:
+            return None
+        return FileTiming(timings, path, operation)
+
+    def add(self, timing: FileTiming) -> None:
+        if self.keep:
+            self.records.append(timing)
+        if self.callback is not None:
+            self.callback(timing)
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        return Timings.summarise(self.records, percentiles)
+
+    @staticmethod
+    def summarise(records: Iterable[FileTiming],
+                  percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        """
+        aggregate timings by "operation.phase", and "operation.total", into count, total, max and nearest-rank
+        percentiles such as "p50", in seconds
+        """
+
+        samples = {}
+        for record in records:
+            for phase, seconds in record.phases.items():
+                samples.setdefault("{0}.{1}".format(record.operation, phase), []).append(seconds)
+            samples.setdefault("{0}.total".format(record.operation), []).append(record.total)
+
+        summary = {}
+        for name, values in samples.items():
+            values.sort()
+            stats = {"count": len(values), "total": sum(values), "max": values[-1]}
+            for percentile in percentiles:
+                rank = max(1, math.ceil(percentile / 100 * len(values)))
+                stats["p{0:g}".format(percentile)] = values[rank - 1]
+            summary[name] = stats
+
+        return summary
+
+    @staticmethod
+    def format_summary(summary: Dict[str, Dict[str, float]]) -> str:
+        """render a summary as a table, in milliseconds"""
+
+        columns = [x for x in next(iter(summary.values()), {}) if x not in ("count", "total")] + ["total"]
+        lines = ["{0:<24}{1:>8}".format("phase", "count") + "".join("{0:>12}".format(x + " ms") for x in columns)]
+        for name, stats in summary.items():
+            lines.append("{0:<24}{1:>8}".format(name, stats["count"]) +
+                         "".join("{0:>12.3f}".format(stats[x] * 1000) for x in columns))
+
+        return "\n".join(lines)
@@ -1,19 +1,38 @@
-import copy
+import sys
 from textwrap import dedent
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict, Iterable
 
 from cleartag.StreamInfo import StreamInfo
 from cleartag.enums.Mp3Method import Mp3Method
 from cleartag.enums.TagType import TagType
 from cleartag.functions import normalize_path_chars
+from cleartag.mp4 import get_aac_profile
+
+# the fields which read_tags can load selectively
+TRACK_FIELDS = ("artists", "release_artists", "date", "release_title", "track_title", "track_number", "total_tracks",
+                "disc_number", "total_discs", "genres", "comment")
+
+# formats whose codec setting is the bit depth, shown before the format name, or None for 16 bit
+LOSSLESS_FORMATS = ("FLAC", "ALAC")
 
 
 class Track:
+    """
+    A track's tags and stream info. Tracks use __slots__ and share the StreamInfo they are given, rather than copying
+    it, to keep large in-memory libraries compact. Short repeated strings (artists, genres, dates, release titles) are
+    interned. picture_count and picture_size (the total bytes of picture data) describe the embedded artwork, or are
+    None if unknown.
+    """
+
+    __slots__ = ("artists", "release_artists", "date", "release_title", "track_title", "track_number", "total_tracks",
+                 "disc_number", "total_discs", "genres", "comment", "always_write", "stream_info", "unloaded_fields",
+                 "picture_count", "picture_size")
 
     def __init__(self, artists:List[str] = None, release_artists:List[str] = None, date:str = "",
                  release_title:str = "", track_title:str = None, track_number:int = None, total_tracks:int = None,
                  disc_number:int = None, total_discs:int = None, genres:List[str] = None, comment: str = None,
-                 always_write: bool = False, stream_info:StreamInfo = None) -> None:
+                 always_write: bool = False, stream_info:StreamInfo = None,
+                 unloaded_fields: Iterable[str] = None, picture_count: int = None, picture_size: int = None) -> None:
 
         assert artists is None or (isinstance(artists, list) and all(x != "" for x in artists))
         assert release_artists is None or (isinstance(release_artists, list) and all(x != "" for x in release_artists))
@@ -27,45 +46,45 @@ class Track:
         assert genres is None or (isinstance(genres, list) and all(x != "" for x in genres))
         assert comment is None or isinstance(comment, str)
         assert isinstance(always_write, bool)
+        assert picture_count is None or (isinstance(picture_count, int) and picture_count >= 0)
+        assert picture_size is None or (isinstance(picture_size, int) and picture_size >= 0)
 
-        self.artists = artists or []
-        self.release_artists = release_artists or []
-        self.date = date
-        self.release_title = release_title
+        self.artists = [sys.intern(x) for x in artists] if artists else []
+        self.release_artists = [sys.intern(x) for x in release_artists] if release_artists else []
+        self.date = sys.intern(date) if date else date
+        self.release_title = sys.intern(release_title) if release_title else release_title
         self.track_title = track_title
         self.track_number = track_number if isinstance(track_number, int) and track_number > 0 else None
-        self.total_tracks = total_tracks if isinstance(total_discs, int) and total_discs > 0 else None
+        self.total_tracks = total_tracks if isinstance(total_tracks, int) and total_tracks > 0 else None
         self.disc_number = disc_number if isinstance(disc_number, int) and disc_number > 0 else None
         self.total_discs = total_discs if isinstance(total_discs, int) and total_discs > 0 else None
-        self.genres = genres or []
+        self.genres = [sys.intern(x) for x in genres] if genres else []
         self.comment = comment
         self.always_write = always_write
-        self.stream_info = copy.deepcopy(stream_info)
+        self.stream_info = stream_info
+        self.unloaded_fields = frozenset(unloaded_fields or ())
+        self.picture_count = picture_count
+        self.picture_size = picture_size
 
         # Remove duplicates
         self.artists = list(dict.fromkeys(self.artists))
         self.release_artists = list(dict.fromkeys(self.release_artists))
         self.genres = list(dict.fromkeys(self.genres))
 
+    def sort_key(self) -> Tuple[bool, int, bool, int]:
+        """
+        Return a key ordering tracks within a release: tracks without a disc number first, then by disc number, then
+        by track number, with tracks lacking a track number last on their disc
+        """
+        return (self.disc_number is not None, self.disc_number or 0,
+                self.track_number is None, self.track_number or 0)
+
     def __lt__(self, other) -> bool:
-        if self.disc_number and other.disc_number and self.disc_number < other.disc_number:
-            return True
-        elif self.disc_number and other.disc_number and self.disc_number > other.disc_number:
-            return False
-        elif not self.disc_number and other.disc_number:
-            return True
-        elif self.disc_number and not other.disc_number:
-            return False
-        elif not self.disc_number and not other.disc_number:
-            return False
-
-        # at this point, both have a disc number set and they are equal
-        if self.track_number and other.track_number:
-            return self.track_number < other.track_number
-        elif not self.track_number and other.track_number:
-            return False
-        elif self.track_number and not other.track_number:
-            return True
+        return self.sort_key() < other.sort_key()
+
+    def is_loaded(self, field: str) -> bool:
+        """Return False if read_tags skipped this field (or "stream_info"), so that its value is not meaningful"""
+        return field not in self.unloaded_fields
 
     def validate(self) -> bool:
         return len(self.artists) \
@@ -78,7 +97,7 @@ class Track:
     def get_codec(self) -> str:
         codec_setting = self.get_codec_setting()
 
-        if codec_setting[0] == "FLAC" and codec_setting[1]:
+        if codec_setting[0] in LOSSLESS_FORMATS and codec_setting[1]:
             return "{0} {1}".format(codec_setting[1], codec_setting[0])
         return codec_setting[0]
 
@@ -86,11 +105,14 @@ class Track:
         """Return a the codec format/setting as a string"""
         codec_setting = self.get_codec_setting()
 
-        if codec_setting[0] == "FLAC":
+        if codec_setting[0] in LOSSLESS_FORMATS:
             if codec_setting[1]:
                 return "{0} {1}".format(codec_setting[1], codec_setting[0])
             return codec_setting[0]
 
+        if codec_setting[1] is None:
+            return codec_setting[0]
+
         if short:
             return codec_setting[1]
 
@@ -106,8 +128,21 @@ class Track:
             return "FLAC", None
 
         elif self.stream_info.tag_type == TagType.MP4:
+            if self.stream_info.codec == "alac":
+                if self.stream_info.bits_per_sample != 16:
+                    return "ALAC", "{0}bit".format(self.stream_info.bits_per_sample)
+
+                return "ALAC", None
+
+            aac_profile = get_aac_profile(self.stream_info.codec)
+            if aac_profile:
+                return "AAC", aac_profile
+
             return "MP4", "UNKNOWN"
 
+        elif self.stream_info.tag_type == TagType.VORBIS:
+            return ("Opus", None) if self.stream_info.codec == "opus" else ("Vorbis", None)
+
         elif self.stream_info.tag_type == TagType.ID3:
 
             if self.stream_info.xing.lame_version:
@@ -159,13 +194,14 @@ class Track:
         elif self.total_discs and self.total_discs > 9:
             disc_number = str(disc_number).zfill(2)
 
-        ext = self.stream_info.get_ext()
-
         if self.disc_number is None or self.disc_number == 0 \
                 or self.track_number is None or self.track_number == 0 or self.artists == [] \
-                or self.track_title is None or self.track_title == "" or (include_artist and not len(self.artists)):
+                or self.track_title is None or self.track_title == "" or (include_artist and not len(self.artists)) \
+                or self.stream_info is None:
             return None
 
+        ext = self.stream_info.get_ext()
+
         disc_track_prefix = "{disc_number}{track_number} - ".format(disc_number=disc_number,
                                                                     track_number=str(self.track_number).zfill(2))
         if self.disc_number == 1 and self.total_discs == 1 and self.track_number == 1 and self.total_tracks == 1:
@@ -184,6 +220,32 @@ class Track:
                                                 track_title=self.track_title,
                                                 ext=ext))
 
+    def to_dict(self) -> Dict:
+        return {
+            "artists": self.artists,
+            "release_artists": self.release_artists,
+            "date": self.date,
+            "release_title": self.release_title,
+            "track_title": self.track_title,
+            "track_number": self.track_number,
+            "total_tracks": self.total_tracks,
+            "disc_number": self.disc_number,
+            "total_discs": self.total_discs,
+            "genres": self.genres,
+            "comment": self.comment,
+            "always_write": self.always_write,
+            "stream_info": self.stream_info.to_dict() if self.stream_info else None,
+            "unloaded_fields": sorted(self.unloaded_fields),
+            "picture_count": self.picture_count,
+            "picture_size": self.picture_size,
+        }
+
+    @staticmethod
+    def from_dict(values: Dict) -> "Track":
+        values = dict(values)
+        values["stream_info"] = StreamInfo.from_dict(values["stream_info"]) if values.get("stream_info") else None
+        return Track(**values)
+
     def __eq__(self, other: "Track") -> bool:
         return self.artists == other.artists and self.release_artists == other.release_artists \
                and self.date == other.date and self.release_title == other.release_title \
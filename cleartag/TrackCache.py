@@ -0,0 +1,54 @@
+import abc
+import os
+import weakref
+from typing import Optional
+
+from cleartag.Track import Track
+
+
+class TrackCache(abc.ABC):
+    """
+    Base class for caches of read_tags results. Entries are validated against the file's identity, from os.stat:
+    (device, inode, size, mtime_ns). Every live cache is registered, so that write_tags can invalidate a file in all
+    of them.
+    """
+
+    __instances = weakref.WeakSet()
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+        TrackCache.__instances.add(self)
+
+    @staticmethod
+    def get_identity(stat: os.stat_result) -> tuple:
+        return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @abc.abstractmethod
+    def get(self, path: str, stat: os.stat_result) -> Optional[Track]:
+        pass
+
+    @abc.abstractmethod
+    def put(self, path: str, stat: os.stat_result, track: Track) -> None:
+        pass
+
+    @abc.abstractmethod
+    def invalidate(self, path: str, stat: os.stat_result = None) -> None:
+        pass
+
+    @staticmethod
+    def invalidate_all(path: str) -> None:
+        """invalidate a file in every live cache"""
+
+        caches = list(TrackCache.__instances)
+        if not caches:
+            return
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+
+        for cache in caches:
+            cache.invalidate(path, stat)
@@ -0,0 +1,336 @@
+from array import array
+from itertools import compress, count, repeat
+from operator import and_, eq, ge, le, ne
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.StreamInfo import StreamInfo
+from cleartag.Track import Track
+from cleartag.Xing import Xing
+from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.TagType import TagType
+
+try:
+    import numpy
+except ImportError:  # optional, required by TrackTable.to_numpy. Filters and sorts use it if it is installed
+    numpy = None
+
+# array typecodes of the numeric columns. Integer columns store None as 0, which Track also treats as unset, except
+# the picture columns, where 0 is meaningful and None is stored as -1
+NUMERIC_COLUMNS = {
+    "length": "d",
+    "bitrate": "q",
+    "bits_per_sample": "i",
+    "track_number": "i",
+    "total_tracks": "i",
+    "disc_number": "i",
+    "total_discs": "i",
+    "tag_type": "b",
+    "mp3_method": "b",
+    "always_write": "b",
+    "picture_count": "i",
+    "picture_size": "q",
+}
+
+# the xing column's value for a lazily read track whose Xing header was never loaded
+XING_NOT_LOADED = "not loaded"
+
+# columns stored as codes into a table of distinct values. Multi-valued fields are encoded as tuples, codec as the
+# (format, setting) tuple from Track.get_codec_setting (None for an MP3 whose Xing header was not loaded), and
+# stream_codec as StreamInfo.codec
+DICTIONARY_COLUMNS = ("artists", "release_artists", "genres", "date", "release_title", "track_title", "comment",
+                      "codec", "stream_codec", "xing", "unloaded_fields")
+
+
+class TrackTable:
+    """
+    Column-wise store of many tracks, filled from batch reads. Numeric fields are held in arrays, and string fields
+    are dictionary-encoded, so each distinct value is stored once. Filters and sorts work on whole columns, with NumPy
+    if it is installed, or else builtin iterators, and Tracks are only built when a row is requested.
+    """
+
+    def __init__(self) -> None:
+        self.paths = []
+        self.errors = []  # (path, ClearTagError) for rows which could not be read
+
+        self.__numeric = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+        self.__codes = {name: array("i") for name in DICTIONARY_COLUMNS}
+        self.__values = {name: [] for name in DICTIONARY_COLUMNS}
+        self.__lookup = {name: {} for name in DICTIONARY_COLUMNS}
+
+    @staticmethod
+    def from_results(results: Iterable[Union[ReadResult, Tuple[str, Union[Track, ClearTagError]]]]) -> "TrackTable":
+        """build a table from read_tags_many results, or scan_library's (path, Track or ClearTagError) pairs"""
+
+        table = TrackTable()
+        table.extend(results)
+        return table
+
+    def extend(self, results: Iterable[Union[ReadResult, Tuple[str, Union[Track, ClearTagError]]]]) -> None:
+        for result in results:
+            if isinstance(result, ReadResult):
+                path, result = result.path, result.track or result.error
+            else:
+                path, result = result
+
+            if isinstance(result, ClearTagError):
+                self.errors.append((path, result))
+            else:
+                self.append(result, path)
+
+    def append(self, track: Track, path: str = None) -> None:
+        # a lazy Xing header is not loaded, so that appending a track does not reopen its file
+        stream_info = track.stream_info
+        info = stream_info.to_dict() if stream_info else None
+
+        self.paths.append(path)
+
+        numeric = self.__numeric
+        numeric["length"].append(stream_info.length if stream_info else 0.0)
+        numeric["bitrate"].append(stream_info.bitrate if stream_info else 0)
+        numeric["bits_per_sample"].append(stream_info.bits_per_sample or 0 if stream_info else 0)
+        numeric["track_number"].append(track.track_number or 0)
+        numeric["total_tracks"].append(track.total_tracks or 0)
+        numeric["disc_number"].append(track.disc_number or 0)
+        numeric["total_discs"].append(track.total_discs or 0)
+        numeric["tag_type"].append(stream_info.tag_type.value if stream_info else 0)
+        numeric["mp3_method"].append(Mp3Method[info["mp3_method"]].value if info and info["mp3_method"] else 0)
+        numeric["always_write"].append(track.always_write)
+        numeric["picture_count"].append(track.picture_count if track.picture_count is not None else -1)
+        numeric["picture_size"].append(track.picture_size if track.picture_size is not None else -1)
+
+        xing = None
+        if info and not info["xing_loaded"]:
+            xing = XING_NOT_LOADED
+        elif info and info["xing"]:
+            xing = tuple(info["xing"].items())
+
+        self.__append_code("artists", tuple(track.artists))
+        self.__append_code("release_artists", tuple(track.release_artists))
+        self.__append_code("genres", tuple(track.genres))
+        self.__append_code("date", track.date)
+        self.__append_code("release_title", track.release_title)
+        self.__append_code("track_title", track.track_title)
+        self.__append_code("comment", track.comment)
+        self.__append_code("codec", track.get_codec_setting() if info and info["xing_loaded"] else None)
+        self.__append_code("stream_codec", stream_info.codec if stream_info else None)
+        self.__append_code("xing", xing)
+        self.__append_code("unloaded_fields", track.unloaded_fields)
+
+    def __append_code(self, column: str, value) -> None:
+        lookup = self.__lookup[column]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.__values[column])
+            self.__values[column].append(value)
+        self.__codes[column].append(code)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, row: int) -> Track:
+        return self.get_track(row)
+
+    def get_track(self, row: int) -> Track:
+        """materialise one row as a Track"""
+
+        numeric = {name: column[row] for name, column in self.__numeric.items()}
+        values = {name: self.__values[name][self.__codes[name][row]] for name in DICTIONARY_COLUMNS}
+
+        stream_info = None
+        if numeric["tag_type"]:
+            xing, xing_loader = None, None
+            if values["xing"] == XING_NOT_LOADED:
+                xing_loader = StreamInfo.unavailable_xing
+            elif values["xing"]:
+                xing = Xing.from_dict(dict(values["xing"]))
+            stream_info = StreamInfo(TagType(numeric["tag_type"]), numeric["length"], numeric["bitrate"],
+                                     numeric["bits_per_sample"] or None,
+                                     Mp3Method(numeric["mp3_method"]) if numeric["mp3_method"] else None, xing,
+                                     xing_loader, values["stream_codec"])
+
+        return Track(artists=list(values["artists"]),
+                     release_artists=list(values["release_artists"]),
+                     date=values["date"],
+                     release_title=values["release_title"],
+                     track_title=values["track_title"],
+                     track_number=numeric["track_number"] or None,
+                     total_tracks=numeric["total_tracks"] or None,
+                     disc_number=numeric["disc_number"] or None,
+                     total_discs=numeric["total_discs"] or None,
+                     genres=list(values["genres"]),
+                     comment=values["comment"],
+                     always_write=bool(numeric["always_write"]),
+                     stream_info=stream_info,
+                     unloaded_fields=values["unloaded_fields"],
+                     picture_count=numeric["picture_count"] if numeric["picture_count"] >= 0 else None,
+                     picture_size=numeric["picture_size"] if numeric["picture_size"] >= 0 else None)
+
+    def column(self, name: str) -> Union[array, List]:
+        """return a numeric column as an array, or a dictionary-encoded column decoded to a list"""
+
+        if name in self.__numeric:
+            return self.__numeric[name]
+
+        values = self.__values[name]
+        return [values[code] for code in self.__codes[name]]
+
+    def codes(self, name: str) -> Tuple[array, List]:
+        """return a dictionary-encoded column as (codes, distinct values)"""
+        return self.__codes[name], self.__values[name]
+
+    def indices(self, column: str, value) -> List[int]:
+        """return the rows where column equals value. Dictionary columns compare codes, encoding value once"""
+
+        if column in self.__numeric:
+            if isinstance(value, (TagType, Mp3Method)):
+                value = value.value
+            return TrackTable.__rows(TrackTable.__compare(self.__numeric[column], eq, value))
+
+        if isinstance(value, list):
+            value = tuple(value)
+        code = self.__lookup[column].get(value)
+        if code is None:
+            return []
+        return TrackTable.__rows(TrackTable.__compare(self.__codes[column], eq, code))
+
+    def indices_in_range(self, column: str, minimum: float = None, maximum: float = None) -> List[int]:
+        """return the rows where a numeric column is within [minimum, maximum]. A bound which is None is unbounded"""
+
+        values = self.__numeric[column]
+        if minimum is None and maximum is None:
+            return list(range(len(values)))
+        if minimum is None:
+            return TrackTable.__rows(TrackTable.__compare(values, le, maximum))
+        if maximum is None:
+            return TrackTable.__rows(TrackTable.__compare(values, ge, minimum))
+
+        lower, upper = TrackTable.__compare(values, ge, minimum), TrackTable.__compare(values, le, maximum)
+        return TrackTable.__rows(lower & upper if numpy is not None else map(and_, lower, upper))
+
+    def filter(self, column: str, value) -> "TrackTable":
+        return self.take(self.indices(column, value))
+
+    def filter_codec(self, codec_format: str, setting: Optional[str] = None) -> "TrackTable":
+        """return the rows whose get_codec_setting matches this format, and setting if given"""
+
+        matches = [bool(codec) and codec[0] == codec_format and (setting is None or codec[1] == setting)
+                   for codec in self.__values["codec"]]
+        return self.take(TrackTable.__rows(TrackTable.__gather(self.__codes["codec"], matches)))
+
+    def sort_order(self, columns: Sequence[str] = None) -> List[int]:
+        """
+        return the row order sorted on these columns, or by Track.sort_key if none are given. Numeric columns sort
+        unset values first, and dictionary columns sort on their values, with None last. The sort is stable
+        """
+
+        if columns is None:
+            discs = self.__numeric["disc_number"]
+            tracks = self.__numeric["track_number"]
+            keys = [TrackTable.__compare(discs, ne, 0), TrackTable.__vector(discs),
+                    TrackTable.__compare(tracks, eq, 0), TrackTable.__vector(tracks)]
+        else:
+            keys = []
+            for column in columns:
+                if column in self.__numeric:
+                    keys.append(TrackTable.__vector(self.__numeric[column]))
+                else:
+                    # rank the distinct values once, then sort rows on the integer ranks
+                    values = self.__values[column]
+                    order = sorted(range(len(values)), key=lambda x: TrackTable.__sort_key(values[x]))
+                    ranks = [0] * len(values)
+                    for rank, code in enumerate(order):
+                        ranks[code] = rank
+                    keys.append(TrackTable.__gather(self.__codes[column], ranks))
+
+        if not len(self) or not keys:
+            return list(range(len(self)))
+        if numpy is not None:
+            # lexsort sorts on its last key first
+            return numpy.lexsort(keys[::-1]).tolist()
+
+        rows = list(zip(*keys))
+        return sorted(range(len(self)), key=rows.__getitem__)
+
+    @staticmethod
+    def __sort_key(value) -> Tuple:
+        """
+        return a key ordering any dictionary column value: None last, numbers before strings before sequences, and
+        sets as their sorted members, so tuples holding None and tuples of differing lengths compare
+        """
+
+        if value is None:
+            return (3,)
+        if isinstance(value, (bool, int, float)):
+            return (0, value)
+        if isinstance(value, str):
+            return (1, value)
+        if isinstance(value, (set, frozenset)):
+            return (2, tuple(sorted(TrackTable.__sort_key(x) for x in value)))
+        return (2, tuple(TrackTable.__sort_key(x) for x in value))
+
+    @staticmethod
+    def __vector(column: array) -> Union[array, "numpy.ndarray"]:
+        return numpy.frombuffer(column, dtype=column.typecode) if numpy is not None else column
+
+    @staticmethod
+    def __compare(column: array, op, value) -> Iterable[bool]:
+        """compare every value in a column to value, as a NumPy mask, or else lazily"""
+
+        if numpy is not None:
+            return op(TrackTable.__vector(column), value)
+        return map(op, column, repeat(value))
+
+    @staticmethod
+    def __gather(codes: array, table: List) -> Iterable:
+        """map a column of codes through a table indexed by code"""
+
+        if numpy is not None:
+            return numpy.asarray(table)[TrackTable.__vector(codes)]
+        return map(table.__getitem__, codes)
+
+    @staticmethod
+    def __rows(mask: Iterable[bool]) -> List[int]:
+        """return the rows where a mask is true"""
+
+        if numpy is not None:
+            return numpy.flatnonzero(mask).tolist()
+        return list(compress(count(), mask))
+
+    def sort(self, columns: Sequence[str] = None) -> "TrackTable":
+        return self.take(self.sort_order(columns))
+
+    def take(self, rows: Iterable[int]) -> "TrackTable":
+        """return a new table of these rows, sharing this table's distinct values"""
+
+        rows = list(rows)
+        table = TrackTable()
+        table.paths = [self.paths[i] for i in rows]
+
+        for name, column in self.__numeric.items():
+            table.__numeric[name] = array(column.typecode, [column[i] for i in rows])
+        for name, codes in self.__codes.items():
+            table.__codes[name] = array("i", [codes[i] for i in rows])
+            table.__values[name] = self.__values[name]
+            table.__lookup[name] = self.__lookup[name]
+
+        return table
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """
+        return the numeric columns, and the codes of the dictionary columns, as NumPy arrays sharing the table's
+        memory. Requires numpy
+        """
+
+        if numpy is None:
+            raise ClearTagError("TrackTable.to_numpy requires numpy")
+
+        arrays = {name: numpy.frombuffer(column, dtype=column.typecode) for name, column in self.__numeric.items()}
+        for name, codes in self.__codes.items():
+            arrays[name] = numpy.frombuffer(codes, dtype=codes.typecode)
+
+        return arrays
+
+    def __repr__(self) -> str:
+        return "TrackTable(rows={0}, errors={1})".format(len(self), len(self.errors))
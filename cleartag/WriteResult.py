@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+class WriteResult:
+    """
+    The outcome of write_tags. It is truthy if the file was written. in_place is True if the tag fit in the
+    existing space, False if the file was rewritten to resize it, and None if nothing was written or the format
+    did not report its padding.
+    """
+
+    def __init__(self, written: bool, in_place: Optional[bool] = None, padding: Optional[int] = None) -> None:
+        self.written = written
+        self.in_place = in_place
+        self.padding = padding
+
+    @property
+    def rewritten(self) -> bool:
+        return self.in_place is False
+
+    def __bool__(self) -> bool:
+        return self.written
+
+    def __repr__(self) -> str:
+        return "WriteResult(written={0}, in_place={1}, padding={2})".format(self.written, self.in_place, self.padding)
@@ -1,4 +1,6 @@
+import sys
 from textwrap import dedent
+from typing import Dict
 
 from cleartag.enums.Mp3Method import Mp3Method
 from cleartag.enums.XingHeader import XingHeader
@@ -6,6 +8,10 @@ from cleartag.enums.XingHeader import XingHeader
 
 class Xing:
 
+    __slots__ = ("header_type", "method", "xing_vbr_v", "xing_vbr_q", "lame_version", "lame_version_major",
+                 "lame_version_minor", "lame_tag_revision", "lame_vbr_method", "lame_nspsytune", "lame_nssafejoint",
+                 "lame_nogap_next", "lame_nogap_previous")
+
     def __init__(self, header_type:XingHeader = None, method:Mp3Method = None, xing_vbr_v:int = None, xing_vbr_q:int = None,
                  lame_version:str = None, lame_tag_revision:int = None, lame_vbr_method:int = None,
                  lame_nspsytune:bool = None, lame_nssafejoint:bool = None, lame_nogap_next:bool = None,
@@ -14,7 +20,7 @@ class Xing:
         self.method = method
         self.xing_vbr_v = xing_vbr_v
         self.xing_vbr_q = xing_vbr_q
-        self.lame_version = lame_version
+        self.lame_version = sys.intern(lame_version) if lame_version else lame_version
         self.lame_version_major = 0
         self.lame_version_minor = 0
         self.lame_tag_revision = lame_tag_revision
@@ -32,6 +38,27 @@ class Xing:
                 if len(lame_version_minor) >= 2 and lame_version_minor[0:2].isdigit():
                     self.lame_version_minor = int(lame_version_minor[0:2])
 
+    def to_dict(self) -> Dict:
+        return {
+            "header_type": self.header_type.name if self.header_type else None,
+            "method": self.method.name if self.method else None,
+            "xing_vbr_v": self.xing_vbr_v,
+            "xing_vbr_q": self.xing_vbr_q,
+            "lame_version": self.lame_version,
+            "lame_tag_revision": self.lame_tag_revision,
+            "lame_vbr_method": self.lame_vbr_method,
+            "lame_nspsytune": self.lame_nspsytune,
+            "lame_nssafejoint": self.lame_nssafejoint,
+            "lame_nogap_next": self.lame_nogap_next,
+            "lame_nogap_previous": self.lame_nogap_previous,
+        }
+
+    @staticmethod
+    def from_dict(values: Dict) -> "Xing":
+        values = dict(values)
+        values["header_type"] = XingHeader[values["header_type"]] if values["header_type"] else None
+        values["method"] = Mp3Method[values["method"]] if values["method"] else None
+        return Xing(**values)
 
     def __eq__(self, other: "Xing") -> bool:
         return self.header_type == other.header_type and self.method == other.method \
@@ -1,3 +1,3 @@
-from cleartag.ClearTag import read_tags, write_tags
+from cleartag.ClearTag import read_tags, read_tags_many, async_read_tags, async_read_tags_many, scan_library, \
+    walk_library, write_tags
 from cleartag.Track import Track
-
@@ -0,0 +1,168 @@
+"""
+Command-line interface.
+
+    python -m cleartag scan <root> [--workers N] [--executor process|thread] [--output FILE [--resume]] [--quiet]
+
+scan reads every audio file below root in parallel, and writes one JSON object per file to stdout (or --output) as
+results complete: {"path", "track", "codec"} for a track, or {"path", "error"} for a file which could not be read.
+Progress and throughput are reported on stderr, unless --quiet is given. --output is replaced, unless --resume is given:
+then files already read into the output file are skipped and new results are appended, so an interrupted scan can be
+continued. Error records are removed on resume, so files which could not be read are tried again.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional, Set, List, TextIO
+
+from cleartag.ClearTag import read_tags_many, walk_library, AUDIO_EXTENSIONS
+from cleartag.ReadResult import ReadResult
+
+
+def result_to_dict(result: ReadResult) -> dict:
+    if not result.ok:
+        return {"path": result.path, "error": str(result.error)}
+
+    track = result.track
+    codec = None
+    if track.stream_info is not None and track.get_codec_setting() is not None:
+        codec = track.get_codec_setting_str(short=False)
+
+    return {"path": result.path, "track": track.to_dict(), "codec": codec}
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """
+    return the paths already read into an output file, and truncate any incomplete final line left by an interrupted
+    run, so that new results can be appended. Error records are removed, so that those files are read again
+    """
+
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    valid_end = 0
+    valid_lines = 0
+    error_lines = set()
+    with open(output_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line.decode("utf-8"))
+                path = record["path"]
+            except (ValueError, KeyError):
+                break
+            if "error" in record:
+                error_lines.add(valid_lines)
+            else:
+                completed.add(path)
+            valid_end += len(line)
+            valid_lines += 1
+
+    if error_lines:
+        temp_path = output_path + ".tmp"
+        with open(output_path, "rb") as f, open(temp_path, "wb") as temp:
+            for i, line in zip(range(valid_lines), f):
+                if i not in error_lines:
+                    temp.write(line)
+        os.replace(temp_path, output_path)
+    elif valid_end != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_end)
+
+    return completed
+
+
+class Progress:
+    """Reports files read, errors and throughput on a stream, at most once per interval. With no stream, only counts"""
+
+    def __init__(self, stream: Optional[TextIO], interval: float, skipped: int = 0) -> None:
+        self.stream = stream
+        self.interval = interval
+        self.skipped = skipped
+        self.files = 0
+        self.errors = 0
+
+        self.__start = time.perf_counter()
+        self.__last = self.__start
+
+    def update(self, result: ReadResult) -> None:
+        self.files += 1
+        if not result.ok:
+            self.errors += 1
+
+        now = time.perf_counter()
+        if now - self.__last >= self.interval:
+            self.__last = now
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        if self.stream is None:
+            return
+
+        elapsed = time.perf_counter() - self.__start
+        self.stream.write("{0}{1} files, {2} errors, {3:.1f} files/s{4}\n".format(
+            "done: " if final else "", self.files, self.errors, self.files / elapsed if elapsed else 0.0,
+            ", {0} skipped (already scanned)".format(self.skipped) if self.skipped else ""))
+        self.stream.flush()
+
+
+def scan(args: argparse.Namespace) -> int:
+    completed = set()
+    if args.resume:
+        if not args.output:
+            sys.stderr.write("--resume requires --output\n")
+            return 2
+        completed = load_completed(args.output)
+
+    paths = (x for x in walk_library(args.root, args.extensions, args.follow_symlinks) if x not in completed)
+    results = read_tags_many(paths, workers=args.workers, executor=args.executor, ordered=False)
+
+    output = open(args.output, "a" if args.resume else "w", encoding="utf-8") if args.output else sys.stdout
+    progress = Progress(None if args.quiet else sys.stderr, args.progress_interval, len(completed))
+
+    try:
+        for result in results:
+            output.write(json.dumps(result_to_dict(result), ensure_ascii=False) + "\n")
+            output.flush()
+            progress.update(result)
+    finally:
+        results.close()
+        if output is not sys.stdout:
+            output.close()
+
+    progress.report(final=True)
+
+    return 1 if progress.errors else 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cleartag")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    scan_parser = commands.add_parser("scan", help="read every audio file below a directory, as JSON lines")
+    scan_parser.add_argument("root")
+    scan_parser.add_argument("--workers", type=int, default=None, help="worker count (default: CPU count)")
+    scan_parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    scan_parser.add_argument("--extensions", nargs="+", default=list(AUDIO_EXTENSIONS))
+    scan_parser.add_argument("--follow-symlinks", action="store_true")
+    scan_parser.add_argument("--output", help="write to this file instead of stdout, replacing it")
+    scan_parser.add_argument("--resume", action="store_true",
+                             help="skip files already read into --output, and append to it. Failed files are retried")
+    scan_parser.add_argument("--progress-interval", type=float, default=1.0, help="seconds between progress lines")
+    scan_parser.add_argument("--quiet", action="store_true", help="do not report progress or the final summary")
+    scan_parser.set_defaults(func=scan)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class ReadBackend(Enum):
+    MUTAGEN = 1
+    NATIVE = 2
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class XingParser(Enum):
+    BYTES = 1
+    BITSTRING = 2
@@ -0,0 +1,133 @@
+import struct
+from typing import Optional
+
+from cleartag.NativeFile import NativeFile
+from cleartag.enums.TagType import TagType
+from cleartag.functions import decode_vorbis_comment
+from cleartag.mpeg import get_id3_end
+
+STREAMINFO = 0
+VORBIS_COMMENT = 4
+PICTURE = 6
+
+STREAMINFO_SIZE = 34
+
+__uint32 = struct.Struct(">I")
+
+
+def is_flac(data: bytes) -> bool:
+    """True if data starts a FLAC stream, optionally preceded by an ID3v2 tag"""
+    start = get_id3_end(data) if data[:3] == b"ID3" else 0
+    return start is not None and data[start:start + 4] == b"fLaC"
+
+
+def read_flac(fileobj) -> Optional[NativeFile]:
+    """
+    read a FLAC file's tags and stream info by walking its metadata block headers. Only STREAMINFO and the first
+    VORBIS_COMMENT are read; every other block is seeked past, and of PICTURE blocks only the fields preceding the
+    picture data are read, for its size. Returns None if the file is not a FLAC stream, or if its blocks are not
+    consistent with their sizes and the file's, which are left to mutagen: it parses comments and pictures whatever
+    their block sizes say
+    """
+
+    file_size = fileobj.seek(0, 2)
+    fileobj.seek(0)
+    head = fileobj.read(10)
+    pos = get_id3_end(head) if head[:3] == b"ID3" else 0
+
+    if pos is None:
+        return None
+
+    fileobj.seek(pos)
+    if fileobj.read(4) != b"fLaC":
+        return None
+    pos += 4
+
+    streaminfo = None
+    tags = None
+    pictures = []
+    last = False
+
+    while not last:
+        header = fileobj.read(4)
+        if len(header) < 4:
+            return None
+
+        last = bool(header[0] & 0x80)
+        block_type = header[0] & 0x7F
+        size = int.from_bytes(header[1:], "big")
+        pos += 4
+        if pos + size > file_size:
+            return None
+
+        if block_type == STREAMINFO and streaminfo is None:
+            streaminfo = fileobj.read(size)
+            if len(streaminfo) < STREAMINFO_SIZE:
+                return None
+        elif block_type == VORBIS_COMMENT and tags is None:
+            try:
+                tags = decode_vorbis_comment(fileobj.read(size))
+            except (ValueError, struct.error):
+                return None
+        else:
+            if block_type == PICTURE:
+                picture_size = read_picture_size(fileobj, pos, size)
+                if picture_size is None:
+                    return None
+                pictures.append(picture_size)
+            fileobj.seek(pos + size)
+
+        pos += size
+
+    if streaminfo is None:
+        return None
+
+    # 20 bits sample rate, 3 bits channels, 5 bits bits per sample, 36 bits total samples
+    packed = int.from_bytes(streaminfo[10:18], "big")
+    sample_rate = packed >> 44
+    bits_per_sample = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate:
+        return None
+
+    length = total_samples / float(sample_rate)
+
+    # as mutagen, the bitrate of the audio following the metadata blocks
+    bitrate = int((fileobj.seek(0, 2) - pos) * 8 / length) if length else 0
+
+    tags = tags if tags is not None else {}
+    comment = tags["comment"][0] if "comment" in tags else None
+
+    return NativeFile(TagType.FLAC, tags, length, bitrate, bits_per_sample, comment, pictures=pictures)
+
+
+def read_picture_size(fileobj, start: int, size: int) -> Optional[int]:
+    """
+    return the size of the picture data in a FLAC PICTURE block of size bytes at start, reading only its header
+    fields, or None if the picture does not fill the block exactly
+    """
+
+    # picture type, then the length-prefixed MIME type and description, then width, height, depth and colours
+    end = start + size
+    mime_length = __read_uint32(fileobj, start + 4, end)
+    if mime_length is None:
+        return None
+    description_length = __read_uint32(fileobj, start + 8 + mime_length, end)
+    if description_length is None:
+        return None
+    data_start = start + 32 + mime_length + description_length
+    data_length = __read_uint32(fileobj, data_start - 4, end)
+    if data_length is None or data_start + data_length != end:
+        return None
+
+    return data_length
+
+
+def __read_uint32(fileobj, pos: int, end: int) -> Optional[int]:
+    """return the integer at pos, or None if it runs past end"""
+
+    if pos + 4 > end:
+        return None
+    fileobj.seek(pos)
+    data = fileobj.read(4)
+    return __uint32.unpack(data)[0] if len(data) == 4 else None
@@ -1,27 +1,28 @@
+import struct
+from typing import Dict, List
+
 from mutagen.mp3 import BitrateMode
 
 from cleartag.enums.Mp3Method import Mp3Method
 
+__uint32_le = struct.Struct("<I")
 
-def normalize_path_chars(path):
-    tmp = path
-
-    replacements = {
-        ':': '：',
-        '/': '∕',
-        '\\': '⧵',
-        '*': "٭",
-        '?': '？',
-        '"': 'ˮ',
-        '<': '〈',
-        '>': '〉',
-        '|': '⏐'
-    }
+# characters which are invalid in filenames on common filesystems, mapped to lookalikes
+__path_chars = str.maketrans({
+    ':': '：',
+    '/': '∕',
+    '\\': '⧵',
+    '*': "٭",
+    '?': '？',
+    '"': 'ˮ',
+    '<': '〈',
+    '>': '〉',
+    '|': '⏐'
+})
 
-    for x in replacements:
-        tmp = tmp.replace(x, replacements[x])
 
-    return tmp
+def normalize_path_chars(path):
+    return path.translate(__path_chars)
 
 def convert_bitrate_mode(mutagen_mode):
     if mutagen_mode == BitrateMode.CBR:
@@ -34,3 +35,55 @@ def convert_bitrate_mode(mutagen_mode):
         return Mp3Method.CBR # probably CBR ¯\_(ツ)_/¯
     else:
         return Mp3Method.UNKNOWN
+
+
+def decode_syncsafe(bytes_in) -> int:
+    """decode an ID3v2 size field, as a sequence of 7-bit bytes"""
+    value = 0
+    for byte in bytes_in:
+        value = (value << 7) | byte
+    return value
+
+
+def decode_lame_version(bytes_in):
+    try:
+        return bytes_in.decode()
+    except UnicodeDecodeError:
+        pass
+
+    return bytes_in.decode("windows-1252")
+
+
+def decode_vorbis_comment(data: bytes) -> Dict[str, List[str]]:
+    """
+    decode a Vorbis comment block into lists of values by lower case key, as mutagen's VCommentDict presents them.
+    Entries without a "=" are skipped. Raises ValueError or struct.error unless the comments fill the block exactly
+    """
+
+    vendor_length = __uint32_le.unpack_from(data, 0)[0]
+    pos = 4 + vendor_length
+    count = __uint32_le.unpack_from(data, pos)[0]
+    pos += 4
+
+    comments = {}
+    for _ in range(count):
+        length = __uint32_le.unpack_from(data, pos)[0]
+        pos += 4
+        if pos + length > len(data):
+            raise ValueError("Vorbis comment overruns its block")
+
+        add_vorbis_comment(comments, data[pos:pos + length])
+        pos += length
+
+    if pos != len(data):
+        raise ValueError("Vorbis comment does not fill its block")
+
+    return comments
+
+
+def add_vorbis_comment(comments: Dict[str, List[str]], entry: bytes) -> None:
+    """add one "KEY=value" Vorbis comment entry to comments by lower case key, unless it has no "=" separator"""
+
+    key, sep, value = entry.decode("utf-8", "replace").partition("=")
+    if sep:
+        comments.setdefault(key.lower(), []).append(value)
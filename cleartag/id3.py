@@ -0,0 +1,218 @@
+import io
+import re
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import APIC, Frames, Frames_2_2, ID3Tags
+from mutagen.id3._id3v1 import find_id3v1
+from mutagen.id3._tags import ID3Header
+from mutagen.id3._util import ID3NoHeaderError, ID3UnsupportedVersionError, ID3JunkFrameError, \
+    ID3EncryptionUnsupportedError, unsynch
+from mutagen.mp3 import MPEGInfo
+
+from cleartag.NativeFile import NativeFile
+from cleartag.enums.TagType import TagType
+from cleartag.functions import decode_syncsafe
+from cleartag.mpeg import get_frame_length
+
+ID3V1_COMMENT_KEY = "COMM:ID3v1 Comment:eng"
+COMMENT_KEYS = ("COMM", "TXXX:COMMENT")
+
+# the frames behind the EasyID3 keys read_tags uses, the v2.3 date frames which are translated to TDRC, and the
+# frames which may hold a comment. Every other frame is seeked past
+FRAMES = frozenset(("TPE1", "TPE2", "TDRC", "TYER", "TDAT", "TIME", "TALB", "TIT2", "TRCK", "TPOS", "TCON",
+                    "COMM", "TXXX"))
+EASY_KEYS = ("artist", "albumartist", "date", "album", "title", "tracknumber", "discnumber", "genre")
+
+# bytes read from the start of an APIC frame to find where its picture data begins
+PICTURE_PREFIX_SIZE = 1024
+
+__frame_header = struct.Struct(">4sLH")
+__frame_id = re.compile(b"[A-Z0-9]{3}[A-Z0-9\x00]\\Z")
+
+
+def get_id3_comment(frames: Dict[str, object]) -> Tuple[Optional[str], bool]:
+    """
+    return the comment held in a mapping of ID3 frames by hash key, and a boolean which is True if the comments are
+    inconsistent, or an ID3v1 comment is present, and so must always be written
+    """
+
+    always_write = ID3V1_COMMENT_KEY in frames
+
+    keys = [x for x in frames if x in COMMENT_KEYS or x.startswith("COMM::")]
+    vals = {str(frames[x]) for x in keys}
+    if len(vals) > 1:
+        always_write = True
+
+    if "COMM::eng" in keys:
+        return str(frames["COMM::eng"]), always_write
+    elif len(keys):
+        return str(frames[next(iter(keys))]), always_write
+
+    return None, always_write
+
+
+def read_mp3(fileobj) -> Optional[NativeFile]:
+    """
+    read an MP3 file's ID3v2.3/2.4 tag by walking its frame headers. Only the frames in FRAMES are read and decoded,
+    with mutagen's frame classes, so that artwork and other large frames cost nothing: of APIC frames, only the fields
+    preceding the picture data are read, for its size. ID3v1 tags are merged and
+    v2.3 frames translated as mutagen does. Returns None for files this reader does not handle (ID3v2.2, tags whose
+    frames cannot be walked cleanly, or audio which does not start directly after the tag), which are left to mutagen
+    """
+
+    fileobj.seek(0)
+    try:
+        header = ID3Header(fileobj)
+    except ID3NoHeaderError:
+        header = None
+    except ID3UnsupportedVersionError:
+        return None
+
+    tags = ID3Tags()
+    pictures = []
+    if header is not None:
+        if header.version < ID3Header._V23:
+            return None
+
+        frames = __read_frames(fileobj, header, pictures)
+        if frames is None:
+            return None
+        for frame in frames:
+            tags._add(frame, False)
+
+    audio_start = 0
+    if header is not None:
+        audio_start = header.size + 10 if header.f_footer else header.size
+    fileobj.seek(audio_start)
+    if not get_frame_length(fileobj.read(4)):
+        return None
+
+    v1_frames, _ = find_id3v1(fileobj, 4 if header is None or header.version[1] == 4 else 3)
+    for frame in (v1_frames or {}).values():
+        if not tags.getall(frame.HashKey):
+            tags.add(frame)
+
+    tags.update_to_v24()
+
+    easy_tags = {}  # type: Dict[str, List[str]]
+    for key in EASY_KEYS:
+        try:
+            easy_tags[key] = EasyID3.Get[key](tags, key)
+        except KeyError:
+            pass
+
+    comment, always_write = get_id3_comment(tags._DictProxy__dict)
+
+    info = MPEGInfo(fileobj, header.size if header is not None else None)
+
+    return NativeFile(TagType.ID3, easy_tags, info.length, info.bitrate, comment=comment, always_write=always_write,
+                      bitrate_mode=info.bitrate_mode, pictures=pictures)
+
+
+def __read_frames(fileobj, header: ID3Header, pictures: List[int]) -> Optional[list]:
+    start = fileobj.tell()
+    end = header.size
+
+    # a v2.3 tag-level unsynchronisation covers the frame headers, so the whole tag must be read and decoded
+    if header.f_unsynch and header.version < ID3Header._V24:
+        data = fileobj.read(end - start)
+        try:
+            data = unsynch.decode(data)
+        except ValueError:
+            pass
+        fileobj, start, end = io.BytesIO(data), 0, len(data)
+
+    if header.version < ID3Header._V24:
+        positions = __walk_frames(fileobj, start, end, False)
+    else:
+        # some writers store v2.4 frame sizes as plain integers, as in v2.3
+        positions = __walk_frames(fileobj, start, end, True)
+        if positions is None:
+            positions = __walk_frames(fileobj, start, end, False)
+
+    if positions is None:
+        return None
+
+    frames = []
+    for name, flags, offset, size in positions:
+        try:
+            if name == "APIC":
+                pictures.append(__read_picture_size(fileobj, header, flags, offset, size))
+            else:
+                fileobj.seek(offset)
+                frames.append(Frames[name]._fromData(header, flags, fileobj.read(size)))
+        except (ID3JunkFrameError, ID3EncryptionUnsupportedError, NotImplementedError):
+            pass
+
+    return frames
+
+
+def __read_picture_size(fileobj, header: ID3Header, flags: int, offset: int, size: int) -> int:
+    """
+    return the picture data size of an APIC frame, decoding only its leading fields unless the frame is compressed
+    or unsynchronised
+    """
+
+    if header.version >= ID3Header._V24:
+        transformed = header.f_unsynch or flags & (APIC.FLAG24_COMPRESS | APIC.FLAG24_DATALEN | APIC.FLAG24_UNSYNCH)
+    else:
+        transformed = flags & APIC.FLAG23_COMPRESS
+
+    fileobj.seek(offset)
+    if not transformed:
+        prefix = fileobj.read(min(size, PICTURE_PREFIX_SIZE))
+        frame = APIC._fromData(header, flags, prefix)
+
+        # without any data, the description may have been cut short
+        if frame.data or len(prefix) == size:
+            return size - len(prefix) + len(frame.data)
+
+        fileobj.seek(offset)
+
+    frame = APIC._fromData(header, flags, fileobj.read(size))
+    return len(frame.data)
+
+
+def __walk_frames(fileobj, start: int, end: int, syncsafe: bool) -> Optional[List[Tuple[str, int, int, int]]]:
+    """
+    return (frame id, flags, data offset, data size) of the wanted frames and pictures in a tag, reading only frame
+    headers, or None if the walk finds an invalid frame id or runs past the end of the tag
+    """
+
+    positions = []
+    pos = start
+
+    while pos + 10 <= end:
+        fileobj.seek(pos)
+        header = fileobj.read(10)
+        if len(header) < 10:
+            return None
+
+        name, size, flags = __frame_header.unpack(header)
+        if name.strip(b"\x00") == b"":
+            break  # padding
+
+        if not __frame_id.match(name):
+            return None
+
+        if syncsafe:
+            size = decode_syncsafe(header[4:8])
+
+        pos += 10 + size
+        if pos > end:
+            return None
+
+        name = name.decode("ascii")
+        if name[-1] == "\x00":
+            # someone writes v2.3 frames with v2.2 names
+            frame = Frames_2_2.get(name[:-1])
+            if frame is None:
+                continue
+            name = frame.__base__.__name__
+
+        if (name in FRAMES or name == "APIC") and size:
+            positions.append((name, flags, pos - size, size))
+
+    return positions
@@ -0,0 +1,340 @@
+import io
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from mutagen._constants import GENRES
+from mutagen.mp4 import AtomDataType
+from mutagen.mp4._as_entry import AudioSampleEntry, ASEntryError
+from mutagen.mp4._atom import Atom, AtomError
+
+from cleartag.NativeFile import NativeFile
+from cleartag.enums.TagType import TagType
+
+# the ilst atoms behind the EasyMP4 keys read_tags uses. Every other atom, including covr, is seeked past
+TEXT_ATOMS = {b"\xa9ART": "artist", b"aART": "albumartist", b"\xa9day": "date", b"\xa9alb": "album",
+              b"\xa9nam": "title", b"\xa9gen": "genre", b"\xa9cmt": "comment"}
+PAIR_ATOMS = {b"trkn": "tracknumber", b"disk": "discnumber"}
+
+# audio object types of the mp4a.40.N codec strings, by N
+AAC_PROFILES = {"1": "Main", "2": "LC", "3": "SSR", "4": "LTP", "5": "HE", "23": "LD", "29": "HEv2", "39": "ELD"}
+# object type indications of MPEG-4 and MPEG-2 AAC
+AAC_OBJECT_TYPES = ("40", "66", "67", "68")
+
+__atom_header = struct.Struct(">I4s")
+__uint64 = struct.Struct(">Q")
+__data_header = struct.Struct(">I4sI")
+__duration_v0 = struct.Struct(">II")
+__duration_v1 = struct.Struct(">IQ")
+__pair = struct.Struct(">2H")
+__genre = struct.Struct(">h")
+
+# an atom's name, data offset and end offset
+AtomPosition = Tuple[bytes, int, int]
+
+
+def is_mp4(data: bytes) -> bool:
+    """True if data starts an MP4 file"""
+    return data[4:8] == b"ftyp"
+
+
+def get_aac_profile(codec: str) -> Optional[str]:
+    """return the AAC profile of an mp4a codec string, such as "LC" for "mp4a.40.2", or None if it is not AAC"""
+
+    parts = codec.split(".") if codec else []
+    if len(parts) < 2 or parts[0] != "mp4a" or parts[1] not in AAC_OBJECT_TYPES:
+        return None
+
+    return AAC_PROFILES.get(parts[2], "UNKNOWN") if len(parts) == 3 else "UNKNOWN"
+
+
+def read_mp4(fileobj) -> Optional[NativeFile]:
+    """
+    read an MP4 file's tags and stream info by walking its atom headers. Top-level atoms are seeked past until moov,
+    wherever it is in the file, and within it only mvhd, the sound track's hdlr, mdhd and stsd, and the ilst atoms
+    behind EasyMP4's keys are read. Of covr atoms, only the data atom headers are read, for the picture sizes. Returns
+    None for files whose atoms this reader cannot walk cleanly, which are left to mutagen
+    """
+
+    size = fileobj.seek(0, 2)
+
+    moov = None
+    pos = 0
+    while pos + 8 <= size:
+        atom = __read_header(fileobj, pos, size, True)
+        if atom is None:
+            return None
+        if atom[0] == b"moov":
+            moov = atom
+            break
+        pos = atom[2]
+
+    if moov is None or moov[2] > size:
+        return None
+
+    children = __read_children(fileobj, moov)
+    if children is None:
+        return None
+
+    info = __read_info(fileobj, children)
+    if info is None:
+        return None
+    length, bitrate, bits_per_sample, codec = info
+
+    tags = {}  # type: Dict[str, List[str]]
+    pictures = []  # type: List[int]
+
+    ilst = __find_path(fileobj, children, b"udta", b"meta", b"ilst")
+    if ilst is not None:
+        ilst_children = __read_children(fileobj, ilst)
+        if ilst_children is None or not __read_ilst(fileobj, ilst_children, tags, pictures):
+            return None
+
+    comment = tags["comment"][0] if "comment" in tags else None
+
+    return NativeFile(TagType.MP4, tags, length, bitrate, bits_per_sample, comment, pictures=pictures,
+                      codec=codec)
+
+
+def __read_info(fileobj, moov: List[AtomPosition]) -> Optional[Tuple[float, int, Optional[int], Optional[str]]]:
+    """
+    return the length, bitrate, bits per sample (ALAC only) and codec of the first sound track, as mutagen's MP4Info,
+    or the length from mvhd if there is none
+    """
+
+    for trak in (x for x in moov if x[0] == b"trak"):
+        mdia = __read_children(fileobj, __find_path(fileobj, [trak], b"trak", b"mdia"))
+        hdlr = __find(mdia, b"hdlr") if mdia is not None else None
+        if hdlr is None:
+            return None
+        if __read_data(fileobj, hdlr)[8:12] == b"soun":
+            break
+    else:
+        mvhd = __find(moov, b"mvhd")
+        length = __parse_duration(__read_data(fileobj, mvhd)) if mvhd is not None else 0.0
+        return (length, 0, None, None) if length is not None else None
+
+    mdhd = __find(mdia, b"mdhd")
+    if mdhd is None:
+        return None
+
+    length = __parse_duration(__read_data(fileobj, mdhd))
+    if length is None:
+        return None
+
+    stsd = __find_path(fileobj, mdia, b"minf", b"stbl", b"stsd")
+    if stsd is None:
+        return length, 0, None, None
+
+    data = __read_data(fileobj, stsd)
+    if len(data) < 8 or data[0] != 0:
+        return None
+    if not int.from_bytes(data[4:8], "big"):
+        return length, 0, None, None
+
+    # the sample entry is small, so mutagen's parser is used for its codec specific boxes (esds, the ALAC cookie)
+    entry_fileobj = io.BytesIO(data[8:])
+    try:
+        entry = AudioSampleEntry(Atom(entry_fileobj), entry_fileobj)
+    except (AtomError, ASEntryError):
+        return None
+
+    bits_per_sample = entry.sample_size if entry.codec == "alac" else None
+    return length, entry.bitrate, bits_per_sample, entry.codec or None
+
+
+def __parse_duration(data: bytes) -> Optional[float]:
+    """return the duration in seconds held in an mvhd or mdhd atom, 0 for an unknown version, or None if invalid"""
+
+    try:
+        if data[0] == 0:
+            timescale, duration = __duration_v0.unpack(data[12:20])
+        elif data[0] == 1:
+            timescale, duration = __duration_v1.unpack(data[20:32])
+        else:
+            return 0.0
+    except (IndexError, struct.error):
+        return None
+
+    return float(duration) / timescale if timescale else 0.0
+
+
+def __read_ilst(fileobj, ilst: List[AtomPosition], tags: Dict[str, List[str]], pictures: List[int]) -> bool:
+    """
+    add the wanted ilst atoms to tags, as EasyMP4 presents them, and the size of each cover to pictures. Atoms which
+    mutagen would reject are skipped as it does. Returns False if mutagen would fail to load the tag
+    """
+
+    for name, start, end in ilst:
+        if name == b"covr":
+            sizes = __read_cover_sizes(fileobj, start, end)
+            if sizes is None:
+                return False
+            pictures.extend(sizes)
+            continue
+
+        if name not in TEXT_ATOMS and name not in PAIR_ATOMS and name != b"gnre":
+            continue
+
+        values = __parse_data(__read_data(fileobj, (name, start, end)))
+        if values is None:
+            continue
+
+        if name in PAIR_ATOMS:
+            pairs = []
+            for flags, value in values:
+                if len(value) < 6:
+                    return False
+                track, total = __pair.unpack(value[2:6])
+                pairs.append("{0}/{1}".format(track, total) if total else str(track))
+            tags.setdefault(PAIR_ATOMS[name], []).extend(pairs)
+        elif name == b"gnre":
+            genres = __parse_genres(values)
+            if genres is not None:
+                tags.setdefault("genre", []).extend(genres)
+        else:
+            # as mutagen, text atoms may be flagged UTF-8 or implicit
+            try:
+                text = [value.decode("utf-8") for flags, value in values
+                        if flags in (AtomDataType.IMPLICIT, AtomDataType.UTF8)]
+            except UnicodeDecodeError:
+                continue
+            if len(text) == len(values):
+                tags.setdefault(TEXT_ATOMS[name], []).extend(text)
+
+    return True
+
+
+def __parse_data(data: bytes) -> Optional[List[Tuple[int, bytes]]]:
+    """return the (flags, value) of each data atom in an ilst atom, or None if it holds anything else"""
+
+    values = []
+    pos = 0
+    while pos < len(data):
+        if len(data) - pos < 12:
+            return None
+
+        length, name, flags = __data_header.unpack(data[pos:pos + 12])
+        if length < 1 or name != b"data":
+            return None
+
+        value = data[pos + 16:pos + length]
+        if len(value) != length - 16:
+            return None
+
+        values.append((flags & 0xFFFFFF, value))
+        pos += length
+
+    return values
+
+
+def __parse_genres(values: List[Tuple[int, bytes]]) -> Optional[List[str]]:
+    """return the ID3v1 genre names of a gnre atom's values, or None if any is invalid"""
+
+    genres = []
+    for flags, value in values:
+        if len(value) != 2:
+            return None
+        try:
+            genres.append(GENRES[__genre.unpack(value)[0] - 1])
+        except IndexError:
+            return None
+
+    return genres
+
+
+def __read_cover_sizes(fileobj, start: int, end: int) -> Optional[List[int]]:
+    """return the image sizes in a covr atom, reading only its data atom headers, or None if they are truncated"""
+
+    sizes = []
+    pos = start
+    while pos < end:
+        fileobj.seek(pos)
+        header = fileobj.read(12)
+        if len(header) < 12:
+            return None
+
+        length, name, _ = __data_header.unpack(header)
+        if length < 1 or name not in (b"data", b"name"):
+            return []  # mutagen skips the atom
+
+        if name == b"data":
+            sizes.append(max(min(pos + length, end) - pos - 16, 0))
+        pos += length
+
+    return sizes
+
+
+def __read_header(fileobj, pos: int, end: int, top_level: bool = False) -> Optional[AtomPosition]:
+    """return the atom at pos, whose parent ends at end, or None if its header is invalid"""
+
+    fileobj.seek(pos)
+    header = fileobj.read(8)
+    if len(header) < 8:
+        return None
+
+    length, name = __atom_header.unpack(header)
+    data_offset = pos + 8
+
+    if length == 1:
+        header = fileobj.read(8)
+        if len(header) < 8:
+            return None
+        length = __uint64.unpack(header)[0]
+        data_offset += 8
+        if length < 16:
+            return None
+    elif length == 0:
+        # only the last top-level atom may extend to the end of the file
+        if not top_level:
+            return None
+        length = end - pos
+    elif length < 8:
+        return None
+
+    if not top_level and pos + length > end:
+        return None
+
+    return name, data_offset, pos + length
+
+
+def __read_children(fileobj, atom: Optional[AtomPosition]) -> Optional[List[AtomPosition]]:
+    """return the child atoms of a container, reading only their headers, or None if they cannot be walked"""
+
+    if atom is None:
+        return None
+
+    name, pos, end = atom
+    if name == b"meta":
+        pos += 4  # a full atom: version and flags precede the children
+
+    children = []
+    while pos < end:
+        child = __read_header(fileobj, pos, end)
+        if child is None:
+            return None
+        children.append(child)
+        pos = child[2]
+
+    return children
+
+
+def __find(atoms: List[AtomPosition], name: bytes) -> Optional[AtomPosition]:
+    return next((x for x in atoms if x[0] == name), None)
+
+
+def __find_path(fileobj, atoms: List[AtomPosition], *names: bytes) -> Optional[AtomPosition]:
+    """return the atom at a path of names below atoms, walking only the containers on the path"""
+
+    atom = __find(atoms, names[0])
+    for name in names[1:]:
+        children = __read_children(fileobj, atom)
+        if children is None:
+            return None
+        atom = __find(children, name)
+
+    return atom
+
+
+def __read_data(fileobj, atom: AtomPosition) -> bytes:
+    fileobj.seek(atom[1])
+    return fileobj.read(atom[2] - atom[1])
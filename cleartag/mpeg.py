@@ -0,0 +1,231 @@
+import math
+import struct
+from typing import Optional, Tuple
+
+from cleartag.Xing import Xing
+from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.XingHeader import XingHeader
+from cleartag.functions import decode_lame_version, decode_syncsafe
+
+XING_SEARCH_SIZE = 10 * 1000
+VBRI_OFFSET = 36
+
+__uint32 = struct.Struct(">I")
+
+# kbps, indexed by [MPEG-1][layer][bitrate index]
+__bitrates = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+# Hz, indexed by [version bits][sample rate index]
+__sample_rates = {
+    0b11: (44100, 48000, 32000),   # MPEG-1
+    0b10: (22050, 24000, 16000),   # MPEG-2
+    0b00: (11025, 12000, 8000),    # MPEG-2.5
+}
+
+
+def get_id3_end(data: bytes) -> Optional[int]:
+    """return the position following an ID3v2 tag found near the start of data, or None if there is no tag"""
+
+    id3_start = data.find(b"ID3", 0, XING_SEARCH_SIZE)
+    if id3_start == -1 or len(data) < id3_start + 10:
+        return None
+
+    id3_end = id3_start + 10 + decode_syncsafe(data[id3_start + 6:id3_start + 10])
+    if data[id3_start + 5] & 0x10:  # footer present
+        id3_end += 10
+
+    return id3_end
+
+
+def get_xing_search_range(data: bytes) -> Tuple[int, int, bool]:
+    """return the byte range to search for a Xing/Info/VBRI header, and whether an ID3 tag was found"""
+
+    # detect the ID3 tag so we can skip it
+    search_start = get_id3_end(data)
+    if search_start is None:
+        return 0, min(len(data), XING_SEARCH_SIZE), False
+
+    search_end = min(search_start + XING_SEARCH_SIZE, len(data))  # search up to 10KB following the ID3 tag
+
+    # if the range is invalid, search from the start of the buffer
+    if search_start > len(data):
+        return 0, min(len(data), XING_SEARCH_SIZE), True
+
+    return search_start, search_end, True
+
+
+def read_xing_window(fileobj) -> bytes:
+    """read the fixed-size window following any ID3v2 tag at the start of a file, without reading the tag"""
+
+    data = fileobj.read(XING_SEARCH_SIZE)
+    id3_end = get_id3_end(data)
+    if id3_end is None:
+        return data
+
+    fileobj.seek(id3_end)
+    window = fileobj.read(XING_SEARCH_SIZE)
+
+    # if the tag size is invalid, search from the start of the file
+    return window or data
+
+
+def get_frame_length(header: bytes) -> Optional[int]:
+    """return the length of the MPEG audio frame starting with this 4-byte header, or None if it is not valid"""
+
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0b11
+    layer = 4 - ((header[1] >> 1) & 0b11)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0b11
+    padding = (header[2] >> 1) & 1
+
+    # reserved values, and free-format streams whose frame length cannot be derived from the header
+    if version == 0b01 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 0b11
+    bitrate = __bitrates[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = __sample_rates[version][sample_rate_index]
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def get_xing_offset(header: bytes) -> int:
+    """return the offset of the Xing/Info header from the start of a frame, which follows the side information"""
+
+    mpeg1 = (header[1] >> 3) & 0b11 == 0b11
+    mono = header[3] >> 6 == 0b11
+
+    if mpeg1:
+        return 21 if mono else 36
+    return 13 if mono else 21
+
+
+def find_frame_sync(data: bytes, start: int, end: int) -> Optional[int]:
+    """
+    return the position of the first valid MPEG audio frame in data[start:end]. A candidate is accepted when the
+    following frame also syncs with the same version, layer and sample rate, or when it runs past the buffer
+    """
+
+    pos = data.find(b"\xFF", start, end)
+    while pos != -1:
+        frame_length = get_frame_length(data[pos:pos + 4])
+        if frame_length:
+            next_header = data[pos + frame_length:pos + frame_length + 4]
+            if len(next_header) < 4:
+                return pos
+            if get_frame_length(next_header) and next_header[1] == data[pos + 1] \
+                    and next_header[2] & 0x0C == data[pos + 2] & 0x0C:
+                return pos
+
+        pos = data.find(b"\xFF", pos + 1, end)
+
+    return None
+
+
+def locate_xing(data: bytes, search_start: int, search_end: int) -> Xing:
+    """
+    find the first frame in data[search_start:search_end], and check for a Xing/Info header after its side
+    information, or a VBRI header at its fixed offset. Without a frame sync, fall back to searching the range
+    """
+
+    frame = find_frame_sync(data, search_start, search_end)
+    if frame is None:
+        return __search_xing(data, search_start, search_end)
+
+    xing_offset = frame + get_xing_offset(data[frame:frame + 4])
+    tag = data[xing_offset:xing_offset + 4]
+    if tag == b"Xing":
+        return __parse_xing_header(data, xing_offset)
+    if tag == b"Info":
+        return Xing(XingHeader.INFO, Mp3Method.CBR)
+
+    if data[frame + VBRI_OFFSET:frame + VBRI_OFFSET + 4] == b"VBRI":
+        return Xing(XingHeader.VBRI, Mp3Method.VBR)
+
+    # Assume CBR...
+    return Xing(XingHeader.NONE, Mp3Method.CBR)
+
+
+def __search_xing(data: bytes, search_start: int, search_end: int) -> Xing:
+
+    # look for Xing
+    pos = data.find(b"Xing", search_start, search_end)
+    if pos != -1:
+        return __parse_xing_header(data, pos)
+
+    if data.find(b"Info", search_start, search_end) != -1:
+        return Xing(XingHeader.INFO, Mp3Method.CBR)
+
+    if data.find(b"VBRI", search_start, search_end) != -1:
+        return Xing(XingHeader.VBRI, Mp3Method.VBR)
+
+    # Assume CBR...
+    return Xing(XingHeader.NONE, Mp3Method.CBR)
+
+
+def __parse_xing_header(data: bytes, pos: int) -> Xing:
+
+    xing_vbr_v = None
+    xing_vbr_q = None
+    lame_version = None
+    lame_tag_revision = None
+    lame_vbr_method = None
+    lame_nspsytune = None
+    lame_nssafejoint = None
+    lame_nogap_next = None
+    lame_nogap_previous = None
+
+    header_type = XingHeader.XING
+    method = Mp3Method.VBR
+    pos += 4
+    xing_flags = __uint32.unpack_from(data, pos)[0] if len(data) >= pos + 4 else 0  # a truncated header has no fields
+    pos += 4
+    if xing_flags & 1:                  # skip frames field
+        pos += 4
+    if xing_flags & 2:                  # skip bytes field
+        pos += 4
+    if xing_flags & 4:                  # skip TOC
+        pos += 100
+    if xing_flags & 8 and len(data) >= pos + 4:
+        xing_vbr_quality = __uint32.unpack_from(data, pos)[0]
+        pos += 4
+        xing_vbr_v = 10 - math.ceil(xing_vbr_quality/10)
+        xing_vbr_q = 10 - xing_vbr_quality % 10
+
+    # LAME versions < 3.90 do not contain encoder info, and will not be picked up by this. Treat as VBR
+    lame_version_bytes = data[pos:pos + 9]
+    if lame_version_bytes[0:4] == b"LAME" and len(data) >= pos + 20:
+        header_type = XingHeader.LAME
+
+        lame_version = decode_lame_version(lame_version_bytes[4:]).strip()
+        lame_tag_revision = data[pos + 9] >> 4
+        lame_vbr_method = data[pos + 9] & 0x0F
+        encoding_flags = data[pos + 19]
+        lame_nspsytune = bool(encoding_flags & 0x80)
+        lame_nssafejoint = bool(encoding_flags & 0x40)
+        lame_nogap_next = bool(encoding_flags & 0x20)
+        lame_nogap_previous = bool(encoding_flags & 0x10)
+
+        if lame_version.endswith("."):
+            lame_version = lame_version[:-1]
+
+    return Xing(header_type, method, xing_vbr_v, xing_vbr_q, lame_version, lame_tag_revision, lame_vbr_method,
+                lame_nspsytune, lame_nssafejoint, lame_nogap_next, lame_nogap_previous)
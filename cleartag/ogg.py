@@ -0,0 +1,320 @@
+import base64
+import binascii
+import io
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from cleartag.NativeFile import NativeFile
+from cleartag.enums.TagType import TagType
+from cleartag.functions import add_vorbis_comment
+
+PAGE_HEADER_SIZE = 27
+
+# as mutagen, the last page of an unmultiplexed stream is searched for in this many bytes from the end of the file
+LAST_PAGE_SEARCH_SIZE = 256 * 256
+
+# identification and comment header packet prefixes, by codec
+VORBIS = "vorbis"
+OPUS = "opus"
+ID_HEADERS = {VORBIS: b"\x01vorbis", OPUS: b"OpusHead"}
+COMMENT_HEADERS = {VORBIS: b"\x03vorbis", OPUS: b"OpusTags"}
+
+OPUS_SAMPLE_RATE = 48000
+
+PICTURE_KEY = b"metadata_block_picture="
+# bytes read from the start of a picture comment to find the size of its picture data
+PICTURE_PREFIX_SIZE = 1024
+
+FLAG_FIRST = 0x02
+
+__page_header = struct.Struct("<4sBBqIIIB")
+__uint32_le = struct.Struct("<I")
+__uint32_be = struct.Struct(">I")
+__vorbis_id = struct.Struct("<BI3i")
+__opus_id = struct.Struct("<BBHIhB")
+
+# a page header's flags, granule position, serial, segment table, data offset and end offset
+Page = Tuple[int, int, int, bytes, int, int]
+
+
+def is_ogg(data: bytes) -> bool:
+    """True if data starts an Ogg stream"""
+    return data[:4] == b"OggS"
+
+
+def read_ogg(fileobj) -> Optional[NativeFile]:
+    """
+    read an Ogg Vorbis or Opus file's tags and stream info from its header pages and its final page only. The
+    identification header is read from the first page, and the comment packet from the pages which follow, except for
+    METADATA_BLOCK_PICTURE comments, of which only a prefix is read, for the picture size. The final granule position
+    is taken from one read of the end of the file. Returns None for files this reader does not handle (other codecs,
+    multiplexed streams, or streams whose last page is not found there), which are left to mutagen
+    """
+
+    size = fileobj.seek(0, 2)
+
+    first = __read_page(fileobj, 0)
+    if first is None or not first[0] & FLAG_FIRST or __first_packet_size(first[3]) is None:
+        return None
+    _, _, serial, segments, data_offset, pos = first
+
+    fileobj.seek(data_offset)
+    id_header = fileobj.read(__first_packet_size(segments))
+    codec = next((x for x, prefix in ID_HEADERS.items() if id_header.startswith(prefix)), None)
+    if codec is None:
+        return None
+
+    spans, audio_start = __find_packet(fileobj, pos, serial)
+    if spans is None:
+        return None
+
+    comments = __read_comments(fileobj, spans, codec)
+    if comments is None:
+        return None
+    tags, pictures = comments
+
+    position = __read_last_position(fileobj, size, serial)
+    if position is None:
+        return None
+
+    if codec == VORBIS:
+        if len(id_header) < 28:
+            return None
+        _, sample_rate, max_bitrate, nominal_bitrate, min_bitrate = __vorbis_id.unpack(id_header[11:28])
+        if not sample_rate:
+            return None
+
+        length = position / float(sample_rate)
+        bitrate = __get_vorbis_bitrate(max(0, max_bitrate), max(0, nominal_bitrate), max(0, min_bitrate))
+    else:
+        if len(id_header) < 19:
+            return None
+        version, _, pre_skip, _, _, _ = __opus_id.unpack(id_header[8:19])
+        if version >> 4:
+            return None
+
+        # as mutagen, the bitrate of everything following the comment header pages
+        length = (position - pre_skip) / float(OPUS_SAMPLE_RATE)
+        bitrate = round((size - audio_start) * 8 / length) if length else 0
+
+    comment = tags["comment"][0] if "comment" in tags else None
+
+    return NativeFile(TagType.VORBIS, tags, length, bitrate, comment=comment, pictures=pictures, codec=codec)
+
+
+def get_picture_size(value: str) -> Optional[int]:
+    """
+    return the picture data size of a METADATA_BLOCK_PICTURE comment value already loaded, as by mutagen, decoding
+    only the prefix which holds the picture header, or None if it could not be decoded
+    """
+
+    try:
+        entry = PICTURE_KEY + value.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+
+    return __get_picture_size(io.BytesIO(entry), [(0, len(entry))], 0, len(entry), entry[:PICTURE_PREFIX_SIZE])
+
+
+def __get_vorbis_bitrate(max_bitrate: int, nominal_bitrate: int, min_bitrate: int) -> int:
+    """return the bitrate of a Vorbis identification header, as mutagen's OggVorbisInfo"""
+
+    if nominal_bitrate == 0:
+        return (max_bitrate + min_bitrate) // 2
+    if max_bitrate and max_bitrate < nominal_bitrate:
+        return max_bitrate  # the nominal bitrate is wrong
+    if min_bitrate > nominal_bitrate:
+        return min_bitrate
+    return nominal_bitrate
+
+
+def __read_page(fileobj, pos: int) -> Optional[Page]:
+    """return the page header at pos, or None if there is no valid page there"""
+
+    fileobj.seek(pos)
+    header = fileobj.read(PAGE_HEADER_SIZE)
+    if len(header) < PAGE_HEADER_SIZE:
+        return None
+
+    oggs, version, flags, position, serial, _, _, count = __page_header.unpack(header)
+    if oggs != b"OggS" or version != 0:
+        return None
+
+    segments = fileobj.read(count)
+    if len(segments) < count:
+        return None
+
+    data_offset = pos + PAGE_HEADER_SIZE + count
+    return flags, position, serial, segments, data_offset, data_offset + sum(segments)
+
+
+def __first_packet_size(segments: bytes) -> Optional[int]:
+    """return the size of the first packet on a page, or None if it continues onto the next page"""
+
+    size = 0
+    for segment in segments:
+        size += segment
+        if segment < 255:
+            return size
+    return None
+
+
+def __find_packet(fileobj, pos: int, serial: int) -> Tuple[Optional[List[Tuple[int, int]]], int]:
+    """
+    return the (offset, size) spans of the packet starting on the first page of the stream at or after pos, reading
+    only page headers, and the end of the page on which it finishes; or None if the file ends first
+    """
+
+    spans = []
+    while True:
+        page = __read_page(fileobj, pos)
+        if page is None:
+            return None, pos
+
+        _, _, page_serial, segments, offset, pos = page
+        if page_serial != serial:
+            continue
+
+        size = 0
+        for segment in segments:
+            size += segment
+            if segment < 255:
+                spans.append((offset, size))
+                return spans, pos
+
+        spans.append((offset, size))
+
+
+def __read_span(fileobj, spans: List[Tuple[int, int]], start: int, size: int) -> bytes:
+    """return size bytes from start in a packet spanning pages, reading only those bytes"""
+
+    chunks = []
+    for offset, length in spans:
+        if start < length and size > 0:
+            fileobj.seek(offset + start)
+            chunk = fileobj.read(min(length - start, size))
+            chunks.append(chunk)
+            size -= len(chunk)
+        start = max(start - length, 0)
+
+    return b"".join(chunks)
+
+
+def __read_comments(fileobj, spans: List[Tuple[int, int]], codec: str) \
+        -> Optional[Tuple[Dict[str, List[str]], List[int]]]:
+    """
+    return the comments in a comment header packet, by lower case key, and the size of each METADATA_BLOCK_PICTURE,
+    or None if the packet is invalid
+    """
+
+    packet_size = sum(x[1] for x in spans)
+    prefix = COMMENT_HEADERS[codec]
+    if __read_span(fileobj, spans, 0, len(prefix)) != prefix:
+        return None
+    pos = len(prefix)
+
+    vendor_length = __read_uint32(fileobj, spans, pos)
+    if vendor_length is None:
+        return None
+    pos += 4 + vendor_length
+
+    count = __read_uint32(fileobj, spans, pos)
+    if count is None:
+        return None
+    pos += 4
+
+    comments = {}  # type: Dict[str, List[str]]
+    pictures = []
+    for _ in range(count):
+        length = __read_uint32(fileobj, spans, pos)
+        if length is None or pos + 4 + length > packet_size:
+            return None
+        pos += 4
+
+        entry = __read_span(fileobj, spans, pos, min(length, PICTURE_PREFIX_SIZE))
+        if entry[:len(PICTURE_KEY)].lower() == PICTURE_KEY:
+            picture_size = __get_picture_size(fileobj, spans, pos, length, entry)
+            if picture_size is not None:
+                pictures.append(picture_size)
+        else:
+            if length > len(entry):
+                entry += __read_span(fileobj, spans, pos + len(entry), length - len(entry))
+            add_vorbis_comment(comments, entry)
+        pos += length
+
+    # Vorbis comment headers end with a framing bit
+    if codec == VORBIS:
+        framing = __read_span(fileobj, spans, pos, 1)
+        if not framing or not framing[0] & 0x01:
+            return None
+
+    return comments, pictures
+
+
+def __read_uint32(fileobj, spans: List[Tuple[int, int]], pos: int) -> Optional[int]:
+    data = __read_span(fileobj, spans, pos, 4)
+    return __uint32_le.unpack(data)[0] if len(data) == 4 else None
+
+
+def __get_picture_size(fileobj, spans: List[Tuple[int, int]], pos: int, length: int, prefix: bytes) -> Optional[int]:
+    """
+    return the picture data size of a base64 encoded FLAC picture comment at pos, decoding only the prefix which
+    holds the picture header if it is long enough, or None if mutagen could not decode or parse it
+    """
+
+    encoded_size = length - len(PICTURE_KEY)
+    if encoded_size % 4:
+        return None
+
+    encoded = prefix[len(PICTURE_KEY):]
+    if len(prefix) < length:
+        encoded = encoded[:len(encoded) // 4 * 4]
+        tail = __read_span(fileobj, spans, pos + length - 2, 2)
+    else:
+        tail = encoded[-2:]
+
+    try:
+        header = base64.b64decode(encoded)
+    except binascii.Error:
+        return None
+    decoded_size = encoded_size // 4 * 3 - tail.count(b"=")
+
+    # picture type and MIME type, description, width, height, depth and colours, then the data length
+    try:
+        mime_length = __uint32_be.unpack_from(header, 4)[0]
+        description_length = __uint32_be.unpack_from(header, 8 + mime_length)[0]
+        header_size = 32 + mime_length + description_length
+        data_length = __uint32_be.unpack_from(header, header_size - 4)[0]
+    except struct.error:
+        if len(prefix) == length:
+            return None
+        entry = __read_span(fileobj, spans, pos, length)
+        return __get_picture_size(fileobj, spans, pos, length, entry)
+
+    # mutagen rejects a picture whose data is truncated
+    return data_length if data_length <= decoded_size - header_size else None
+
+
+def __read_last_position(fileobj, size: int, serial: int) -> Optional[int]:
+    """
+    return the granule position of the last page of the stream, from one read of the end of the file, or None if
+    the last page found there is truncated, not in the stream or finishes no packet
+    """
+
+    start = max(size - LAST_PAGE_SEARCH_SIZE, 0)
+    fileobj.seek(start)
+    data = fileobj.read(size - start)
+
+    index = data.rfind(b"OggS")
+    if index < 0 or len(data) - index < PAGE_HEADER_SIZE:
+        return None
+
+    oggs, version, flags, position, page_serial, _, _, count = __page_header.unpack_from(data, index)
+    if version != 0 or page_serial != serial or position == -1:
+        return None
+
+    segments = data[index + PAGE_HEADER_SIZE:index + PAGE_HEADER_SIZE + count]
+    if len(segments) < count or index + PAGE_HEADER_SIZE + count + sum(segments) > len(data):
+        return None
+
+    return position
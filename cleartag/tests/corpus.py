@@ -0,0 +1,296 @@
+import base64
+import os
+import random
+import struct
+from typing import Dict, List
+
+from mutagen.easyid3 import EasyID3
+from mutagen.flac import FLAC, Picture
+from mutagen.id3 import ID3, APIC
+from mutagen.mp4 import MP4, MP4Cover
+from mutagen.ogg import OggPage
+from mutagen.oggopus import OggOpus
+from mutagen.oggvorbis import OggVorbis
+
+# MPEG-1 Layer III, 128kbps, 44.1kHz, no CRC
+MP3_BITRATE = 128000
+MP3_SAMPLE_RATE = 44100
+MP3_FRAME_LENGTH = 144 * MP3_BITRATE // MP3_SAMPLE_RATE
+
+
+def mp3_frame_header(mono: bool = False) -> bytes:
+    return bytes([0xFF, 0xFB, 0x90, 0xC0 if mono else 0x00])
+
+
+def xing_payload(header: bytes = b"Xing", lame_version: bytes = b"LAME3.99r", vbr_quality: int = 78,
+                 tag_revision: int = 0, vbr_method: int = 4, encoding_flags: int = 0b0001) -> bytes:
+    """build a Xing/Info header, with a LAME extension if lame_version is set"""
+
+    payload = header + struct.pack(">I", 0x0F) + struct.pack(">II", 1000, 1000 * MP3_FRAME_LENGTH)
+    payload += bytes(range(100)) + struct.pack(">I", vbr_quality)
+
+    if lame_version:
+        payload += lame_version.ljust(9, b" ")[:9]
+        payload += bytes([(tag_revision << 4) | vbr_method])
+        payload += bytes(9)
+        payload += bytes([encoding_flags << 4])
+
+    return payload
+
+
+def vbri_payload() -> bytes:
+    return b"VBRI" + struct.pack(">HHHII", 1, 0, 75, 1000 * MP3_FRAME_LENGTH, 1000)
+
+
+def mp3_frame(payload: bytes = b"", mono: bool = False, payload_offset: int = None) -> bytes:
+    """a single frame, with the payload placed where a decoder expects a Xing header (or a VBRI header)"""
+
+    header = mp3_frame_header(mono)
+    if payload_offset is None:
+        payload_offset = 21 if mono else 36
+
+    frame = header + bytes(payload_offset - len(header)) + payload
+    return frame.ljust(MP3_FRAME_LENGTH, b"\x00")
+
+
+def make_mp3(path: str, first_frame_payload: bytes = None, frames: int = 50, tags: dict = None,
+             mono: bool = False, payload_offset: int = None, art_size: int = 0) -> None:
+    """
+    write a playable-shaped MP3: an optional Xing/Info/VBRI frame followed by silent frames. art_size embeds a front
+    cover of that many bytes
+    """
+
+    with open(path, "wb") as f:
+        if first_frame_payload is not None:
+            f.write(mp3_frame(first_frame_payload, mono, payload_offset))
+        for _ in range(frames):
+            f.write(mp3_frame(mono=mono))
+
+    if tags is not None:
+        id3 = EasyID3()
+        for key, value in tags.items():
+            id3[key] = value
+        id3.save(path)
+
+    if art_size:
+        id3 = ID3(path) if tags is not None else ID3()
+        id3.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="cover", data=art_bytes(art_size)))
+        id3.save(path)
+
+
+def art_bytes(size: int) -> bytes:
+    """deterministic, incompressible stand-in for embedded artwork"""
+    return random.Random(size).getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+def make_flac(path: str, bits_per_sample: int = 16, seconds: int = 10, tags: dict = None, art_size: int = 0,
+              audio_size: int = 64 * 1024) -> None:
+    """write a FLAC stream: STREAMINFO, then placeholder frame data. Tags and artwork are added with mutagen"""
+
+    sample_rate = 44100
+    streaminfo = struct.pack(">HH", 4096, 4096) + (0).to_bytes(3, "big") + (0).to_bytes(3, "big")
+    streaminfo += ((sample_rate << 44) | (1 << 41) | ((bits_per_sample - 1) << 36) |
+                   (sample_rate * seconds)).to_bytes(8, "big")
+    streaminfo += bytes(16)  # MD5
+
+    with open(path, "wb") as f:
+        f.write(b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo)
+        f.write(b"\xFF\xF8" + bytes(audio_size - 2))
+
+    if tags is not None or art_size:
+        flac = FLAC(path)
+        for key, value in (tags or {}).items():
+            flac[key] = value
+        if art_size:
+            picture = Picture()
+            picture.type = 3
+            picture.mime = "image/jpeg"
+            picture.data = art_bytes(art_size)
+            flac.add_picture(picture)
+        flac.save()
+
+
+def atom(name: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + name + payload
+
+
+def full_atom(name: bytes, payload: bytes, version: int = 0, flags: int = 0) -> bytes:
+    return atom(name, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def __descriptor(tag: int, payload: bytes) -> bytes:
+    return bytes([tag, len(payload)]) + payload
+
+
+def make_mp4(path: str, codec: str = "aac", bits_per_sample: int = 16, seconds: int = 10, tags: dict = None,
+             audio_size: int = 64 * 1024, art_size: int = 0) -> None:
+    """
+    write an M4A with one sound track, whose sample entry is AAC (mp4a/esds) or ALAC. art_size embeds a covr image of
+    that many bytes
+    """
+
+    sample_rate = 44100
+    bitrate = 256000
+
+    entry = bytes(6) + struct.pack(">H", 1) + bytes(8) + struct.pack(">HHHHI", 2, bits_per_sample, 0, 0,
+                                                                    sample_rate << 16)
+    if codec == "aac":
+        audio_specific_config = bytes([0x12, 0x10])  # AAC LC, 44.1kHz, stereo
+        decoder_config = bytes([0x40, 0x15]) + (0).to_bytes(3, "big") + struct.pack(">II", bitrate, bitrate)
+        decoder_config += __descriptor(0x05, audio_specific_config)
+        es = struct.pack(">H", 1) + bytes([0]) + __descriptor(0x04, decoder_config) + __descriptor(0x06, b"\x02")
+        sample_entry = atom(b"mp4a", entry + full_atom(b"esds", __descriptor(0x03, es)))
+    elif codec == "alac":
+        cookie = struct.pack(">IBBBBBBHII", 4096, 0, bits_per_sample, 40, 10, 14, 2, 255, 0, bitrate)
+        cookie += struct.pack(">I", sample_rate)
+        sample_entry = atom(b"alac", entry + full_atom(b"alac", cookie))
+    else:
+        raise ValueError("Unknown codec {0}".format(codec))
+
+    duration = sample_rate * seconds
+    mvhd = full_atom(b"mvhd", struct.pack(">IIII", 0, 0, sample_rate, duration) + bytes(80))
+    mdhd = full_atom(b"mdhd", struct.pack(">IIII", 0, 0, sample_rate, duration) + bytes(4))
+    hdlr = full_atom(b"hdlr", bytes(4) + b"soun" + bytes(12) + b"\x00")
+    stsd = full_atom(b"stsd", struct.pack(">I", 1) + sample_entry)
+    stbl = atom(b"stbl", stsd + full_atom(b"stts", bytes(4)) + full_atom(b"stsc", bytes(4)) +
+                full_atom(b"stsz", bytes(8)) + full_atom(b"stco", bytes(4)))
+    trak = atom(b"trak", atom(b"mdia", mdhd + hdlr + atom(b"minf", stbl)))
+
+    with open(path, "wb") as f:
+        f.write(atom(b"ftyp", b"M4A " + bytes(4) + b"M4A mp42isom"))
+        f.write(atom(b"moov", mvhd + trak))
+        f.write(atom(b"mdat", bytes(audio_size)))
+
+    if tags is not None or art_size:
+        mp4 = MP4(path)
+        mp4.add_tags()
+        for key, value in (tags or {}).items():
+            mp4.tags[key] = value
+        if art_size:
+            mp4.tags["covr"] = [MP4Cover(art_bytes(art_size))]
+        mp4.save()
+
+
+def picture_comment(size: int, description: str = "cover") -> str:
+    """a base64 METADATA_BLOCK_PICTURE comment value holding a front cover of size bytes"""
+
+    picture = Picture()
+    picture.type = 3
+    picture.mime = "image/jpeg"
+    picture.desc = description
+    picture.data = art_bytes(size)
+    return base64.b64encode(picture.write()).decode("ascii")
+
+
+def make_ogg(path: str, codec: str = "vorbis", seconds: int = 10, tags: dict = None,
+             audio_size: int = 64 * 1024, art_size: int = 0) -> None:
+    """
+    write an Ogg Vorbis or Opus stream: identification and comment headers, then placeholder audio packets. art_size
+    embeds a METADATA_BLOCK_PICTURE comment holding a picture of that many bytes
+    """
+
+    serial = 0x636C7467
+    if codec == "vorbis":
+        sample_rate = 44100
+        headers = [b"\x01vorbis" + struct.pack("<IBIiiiBB", 0, 2, sample_rate, 0, 160000, 0, 0xB8, 1),
+                   b"\x03vorbis" + struct.pack("<I", 8) + b"cleartag" + struct.pack("<I", 0) + b"\x01",
+                   b"\x05vorbis" + bytes(32)]
+        position = sample_rate * seconds
+        file_type = OggVorbis
+    elif codec == "opus":
+        headers = [b"OpusHead" + struct.pack("<BBHIhB", 1, 2, 312, 48000, 0, 0),
+                   b"OpusTags" + struct.pack("<I", 8) + b"cleartag" + struct.pack("<I", 0)]
+        position = 48000 * seconds + 312
+        file_type = OggOpus
+    else:
+        raise ValueError("Unknown codec {0}".format(codec))
+
+    pages = [OggPage.from_packets([headers[0]], 0)[0]]
+    pages[0].first = True
+    pages += OggPage.from_packets(headers[1:], 1)
+    audio = OggPage.from_packets([bytes(4000)] * (audio_size // 4000), len(pages))
+    for page in pages + audio:
+        page.serial = serial
+    for i, page in enumerate(audio):
+        page.position = position * (i + 1) // len(audio)
+    audio[-1].last = True
+
+    with open(path, "wb") as f:
+        for page in pages + audio:
+            f.write(page.write())
+
+    if tags is not None or art_size:
+        ogg = file_type(path)
+        for key, value in (tags or {}).items():
+            ogg[key] = value
+        if art_size:
+            ogg["metadata_block_picture"] = [picture_comment(art_size)]
+        ogg.save()
+
+
+# the kinds of file in a benchmark library, by name
+LIBRARY_KINDS = ("mp3_lame", "mp3_xing", "mp3_info", "mp3_vbri", "mp3_cbr_no_id3", "mp3_art", "flac_16", "flac_24",
+                 "flac_art", "m4a_aac", "m4a_alac", "m4a_art", "ogg_vorbis", "ogg_opus", "ogg_art")
+
+
+def make_library(root: str, files_per_kind: int = 10, art_size: int = 1024 * 1024) -> Dict[str, List[str]]:
+    """write a deterministic library of each kind of file in LIBRARY_KINDS, returning the paths by kind"""
+
+    id3_tags = {"artist": ["artist"], "albumartist": ["artist"], "album": ["release"], "date": ["2001"],
+                "genre": ["genre"]}
+    vorbis_tags = {"artist": ["artist"], "albumartist": ["artist"], "album": ["release"], "date": ["2001"],
+                   "genre": ["genre"]}
+    mp4_tags = {"\xa9ART": ["artist"], "aART": ["artist"], "\xa9alb": ["release"], "\xa9day": ["2001"],
+                "\xa9gen": ["genre"]}
+
+    library = {}
+    for kind in LIBRARY_KINDS:
+        directory = os.path.join(root, kind)
+        os.makedirs(directory, exist_ok=True)
+        library[kind] = []
+
+        for i in range(1, files_per_kind + 1):
+            title = "track {0}".format(i)
+            number = "{0}/{1}".format(i, files_per_kind)
+            id3 = dict(id3_tags, title=[title], tracknumber=[number])
+            vorbis = dict(vorbis_tags, title=[title], tracknumber=[number])
+            mp4 = dict(mp4_tags, **{"\xa9nam": [title], "trkn": [(i, files_per_kind)]})
+
+            ext = {"flac": "flac", "m4a": "m4a", "ogg": "opus" if kind == "ogg_opus" else "ogg"}.get(
+                kind.split("_")[0], "mp3")
+            path = os.path.join(directory, "{0:02d}.{1}".format(i, ext))
+
+            if kind == "mp3_lame":
+                make_mp3(path, xing_payload(), 500, id3)
+            elif kind == "mp3_xing":
+                make_mp3(path, xing_payload(lame_version=None), 500, id3)
+            elif kind == "mp3_info":
+                make_mp3(path, xing_payload(header=b"Info"), 500, id3)
+            elif kind == "mp3_vbri":
+                make_mp3(path, vbri_payload(), 500, id3)
+            elif kind == "mp3_cbr_no_id3":
+                make_mp3(path, None, 500)
+            elif kind == "mp3_art":
+                make_mp3(path, xing_payload(), 500, id3, art_size=art_size)
+            elif kind == "flac_16":
+                make_flac(path, 16, tags=vorbis)
+            elif kind == "flac_24":
+                make_flac(path, 24, tags=vorbis)
+            elif kind == "flac_art":
+                make_flac(path, 16, tags=vorbis, art_size=art_size)
+            elif kind == "m4a_aac":
+                make_mp4(path, "aac", tags=mp4)
+            elif kind == "m4a_alac":
+                make_mp4(path, "alac", 24, tags=mp4)
+            elif kind == "m4a_art":
+                make_mp4(path, "aac", tags=mp4, art_size=art_size)
+            elif kind == "ogg_vorbis":
+                make_ogg(path, "vorbis", tags=vorbis)
+            elif kind == "ogg_opus":
+                make_ogg(path, "opus", tags=vorbis)
+            elif kind == "ogg_art":
+                make_ogg(path, "vorbis", tags=vorbis, art_size=art_size)
+
+            library[kind].append(path)
+
+    return library
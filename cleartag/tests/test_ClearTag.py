@@ -1,8 +1,9 @@
+import asyncio
 import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-import bitstring
 import mockito
 import mutagen
 from mockito.mocking import mock
@@ -10,11 +11,21 @@ from mutagen.easyid3 import EasyID3
 from mutagen.easymp4 import EasyMP4, EasyMP4Tags
 from mutagen.flac import FLAC, VCFLACDict
 from mutagen.mp3 import EasyMP3, BitrateMode
-
-from cleartag.ClearTag import read_tags, write_tags, read_xing
+from mutagen.mp4 import MP4Cover
+
+from cleartag import ClearTag
+from cleartag.ClearTag import read_tags, write_tags, read_xing, read_tags_many, async_read_tags, async_read_tags_many, \
+    scan_library, walk_library
+from cleartag.DiskCache import DiskCache
+from cleartag.Exceptions import ClearTagError
+from cleartag.IOStats import IOStats
 from cleartag.Track import Track
+from cleartag.TrackTable import TrackTable
 from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.enums.TagType import TagType
 from cleartag.enums.XingHeader import XingHeader
+from cleartag.tests import corpus
 
 test_metadata = {
     "artist": ["test artist"],
@@ -34,6 +45,10 @@ def create_file_mock(file_class, tag_class) -> MagicMock:
     mock_file.tags.__getitem__.side_effect = test_metadata.__getitem__
     mock_file.tags.__iter__.side_effect = test_metadata.__iter__
     mock_file.tags.__contains__.side_effect = test_metadata.__contains__
+    mock_file.tags.__len__.return_value = len(test_metadata)
+    mock_file.tags._EasyID3__id3 = MagicMock()
+    mock_file.tags._EasyID3__id3._DictProxy__dict = {}
+    mock_file.tags._EasyMP4Tags__mp4 = {}
 
     mock_file.info = MagicMock()
     mock_file.info.bitrate_mode = BitrateMode.CBR
@@ -43,17 +58,29 @@ def create_file_mock(file_class, tag_class) -> MagicMock:
     return mock_file
 
 
+def write_temp_file(data: bytes) -> str:
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(data)
+    return f.name
+
+
 class TestClearTag(unittest.TestCase):
 
+    def setUp(self):
+        self.path = write_temp_file(b"")
+
+    def tearDown(self):
+        mockito.unstub()
+        os.remove(self.path)
+
     def test_read_tags_mp3(self):
         easy_mp3 = create_file_mock(EasyMP3, EasyID3)
-        mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
         mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(easy_mp3)
 
-        mockMP3 = bitstring.ConstBitStream(hex="0x496E666F")
-        mockito.when(bitstring).ConstBitStream(filename=mockito.ANY).thenReturn(mockMP3)
+        with open(self.path, "wb") as f:
+            f.write(bytes.fromhex("496E666F"))
 
-        track = read_tags("placeholder/path")
+        track = read_tags(self.path)
 
         assert track.artists == test_metadata["artist"]
         assert track.release_artists == test_metadata["albumartist"]
@@ -69,10 +96,9 @@ class TestClearTag(unittest.TestCase):
 
     def test_read_tags_flac(self):
         flac = create_file_mock(FLAC, VCFLACDict)
-        mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
         mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(flac)
 
-        track = read_tags("placeholder/path")
+        track = read_tags(self.path)
 
         assert track.artists == test_metadata["artist"]
         assert track.release_artists == test_metadata["albumartist"]
@@ -88,10 +114,9 @@ class TestClearTag(unittest.TestCase):
 
     def test_read_tags_mp4(self):
         mp4 = create_file_mock(EasyMP4, EasyMP4Tags)
-        mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
         mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(mp4)
 
-        track = read_tags("placeholder/path")
+        track = read_tags(self.path)
 
         assert track.artists == test_metadata["artist"]
         assert track.release_artists == test_metadata["albumartist"]
@@ -107,7 +132,7 @@ class TestClearTag(unittest.TestCase):
 
     def test_write_tags(self):
         save_func = mock()
-        easy_mp3 = mock({'tags': test_metadata, 'save': save_func}, spec=mutagen.FileType)
+        easy_mp3 = mock({'tags': dict(test_metadata), 'save': save_func}, spec=mutagen.FileType)
         mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
         mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(easy_mp3)
 
@@ -122,71 +147,83 @@ class TestClearTag(unittest.TestCase):
                       total_discs=1,
                       genres=["witch house"])
 
-        write_tags("placeholder/path", track)
+        assert write_tags(self.path, track)
 
         save_func.assert_called_once()
 
         mockito.unstub()
 
+    def test_write_unchanged_tags(self):
+        save_func = mock()
+        easy_mp3 = mock({'tags': dict(test_metadata), 'save': save_func}, spec=mutagen.FileType)
+        mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
+        mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(easy_mp3)
+
+        track = Track(artists=test_metadata["artist"],
+                      release_artists=test_metadata["albumartist"],
+                      date=test_metadata["date"][0],
+                      release_title=test_metadata["album"][0],
+                      track_title=test_metadata["title"][0],
+                      track_number=1,
+                      total_tracks=1,
+                      disc_number=1,
+                      total_discs=1,
+                      genres=test_metadata["genre"])
+
+        assert not write_tags(self.path, track)
+
+        save_func.assert_not_called()
+
+        track.comment = "new comment"
+        assert write_tags(self.path, track)
+
     def test_write_empty_tags(self):
         save_func = mock()
-        easy_mp3 = mock({'tags': test_metadata, 'save': save_func}, spec=mutagen.FileType)
+        easy_mp3 = mock({'tags': dict(test_metadata), 'save': save_func}, spec=mutagen.FileType)
         mockito.when(os.path).isfile(mockito.ANY).thenReturn(True)
         mockito.when(mutagen).File(mockito.ANY, easy=True).thenReturn(easy_mp3)
 
         track = Track()
 
-        write_tags("placeholder/path", track)
+        write_tags(self.path, track)
 
         save_func.assert_called_once()
 
         mockito.unstub()
 
     def test_read_Xing_LAME(self):
-        mockMP3 = bitstring.ConstBitStream(hex="58696e670000000f000023430069e2a800010306080a0c0f1214171a1c1e21242628" +
-                                               "2a2d30323537393c3f4244474a4d505254575a5d5f616466696b6e707376787b7d80" +
-                                               "8284878a8c8f9295989b9d9fa2a4a7a8abadb0b2b5b7babcbfc2c4c7cacdd0d3d5d8" +
-                                               "dbdee0e2e5e8ebeef1f3f6fafdff0000004e4c414d4520454f532e03be0000000000" +
-                                               "00000034")
+        mp3_data = bytes.fromhex("58696e670000000f000023430069e2a800010306080a0c0f1214171a1c1e21242628" +
+                                 "2a2d30323537393c3f4244474a4d505254575a5d5f616466696b6e707376787b7d80" +
+                                 "8284878a8c8f9295989b9d9fa2a4a7a8abadb0b2b5b7babcbfc2c4c7cacdd0d3d5d8" +
+                                 "dbdee0e2e5e8ebeef1f3f6fafdff0000004e4c414d4520454f532e03be0000000000" +
+                                 "00000034")
 
-        mockito.when(bitstring).ConstBitStream(filename=mockito.ANY).thenReturn(mockMP3)
-        xing = read_xing("placeholder/path")
+        with open(self.path, "wb") as f:
+            f.write(mp3_data)
+        xing = read_xing(self.path)
 
         assert xing.lame_version == "EOS"
 
-        mockito.unstub()
-
     def test_read_Xing_Info(self):
-        mockMP3 = bitstring.ConstBitStream(hex="0x496E666F")
-
-        mockito.when(bitstring).ConstBitStream(filename=mockito.ANY).thenReturn(mockMP3)
-        xing = read_xing("placeholder/path")
+        with open(self.path, "wb") as f:
+            f.write(bytes.fromhex("496E666F"))
+        xing = read_xing(self.path)
 
         assert xing.header_type == XingHeader.INFO
 
-        mockito.unstub()
-
     def test_read_Xing_VBRI(self):
-        mockMP3 = bitstring.ConstBitStream(hex="0x56425249")
-
-        mockito.when(bitstring).ConstBitStream(filename=mockito.ANY).thenReturn(mockMP3)
-        xing = read_xing("placeholder/path")
+        with open(self.path, "wb") as f:
+            f.write(bytes.fromhex("56425249"))
+        xing = read_xing(self.path)
 
         assert xing.header_type == XingHeader.VBRI
 
-        mockito.unstub()
-
     def test_read_Xing_no_match(self):
-        mockMP3 = bitstring.ConstBitStream()
-
-        mockito.when(bitstring).ConstBitStream(filename=mockito.ANY).thenReturn(mockMP3)
-        xing = read_xing("placeholder/path")
+        xing = read_xing(self.path)
 
         assert xing.header_type == XingHeader.NONE
         assert xing.method == Mp3Method.CBR
 
-        mockito.unstub()
-
     def test_real(self):
 
         path = "C:\\testhash\\aps.mp3"
@@ -201,3 +238,288 @@ class TestClearTag(unittest.TestCase):
 
         track = read_tags(path)
         print(track)
+
+
+class TestReadTagsMany(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+
+        for i in range(10):
+            path = os.path.join(self.dir.name, "{0:02d}.mp3".format(i))
+            corpus.make_mp3(path, corpus.xing_payload(), tags={"title": ["track {0}".format(i)]})
+            self.paths.append(path)
+
+        # a corrupt file and a missing file, in the middle of the batch
+        corrupt = os.path.join(self.dir.name, "corrupt.mp3")
+        with open(corrupt, "wb") as f:
+            f.write(b"not an mp3")
+        self.paths[3:3] = [corrupt, os.path.join(self.dir.name, "missing.mp3")]
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def check_results(self, results):
+        assert sorted(x.path for x in results) == sorted(self.paths)
+
+        errors = [x for x in results if not x.ok]
+        assert sorted(os.path.basename(x.path) for x in errors) == ["corrupt.mp3", "missing.mp3"]
+        assert all(isinstance(x.error, ClearTagError) for x in errors)
+
+        tracks = {x.path: x.track for x in results if x.ok}
+        assert tracks[self.paths[0]].track_title == "track 0"
+
+    def test_read_tags_many_thread(self):
+        results = list(read_tags_many(self.paths, workers=2, executor="thread", chunk_size=3, max_in_flight=2))
+
+        assert [x.path for x in results] == self.paths
+        self.check_results(results)
+
+    def test_read_tags_many_process(self):
+        results = list(read_tags_many(self.paths, workers=2, executor="process", ordered=False, chunk_size=4))
+
+        self.check_results(results)
+
+    def test_invalid_arguments(self):
+        # raised on the call, before any pool is created
+        for kwargs in ({"executor": "fiber"}, {"chunk_size": 0}, {"workers": 0}, {"max_in_flight": -1}):
+            with patch("cleartag.ClearTag.ProcessPoolExecutor") as pool, self.assertRaises(ValueError):
+                read_tags_many(self.paths, **kwargs)
+            assert not pool.called
+
+    def test_async_read_tags(self):
+        track = asyncio.run(async_read_tags(self.paths[0], asyncio.Semaphore(1)))
+
+        assert track == read_tags(self.paths[0])
+
+    def test_async_read_tags_many(self):
+        async def collect():
+            return [x async for x in async_read_tags_many(self.paths, concurrency=3)]
+
+        self.check_results(asyncio.run(collect()))
+
+    def test_async_read_tags_many_close(self):
+        async def first():
+            results = async_read_tags_many(self.paths, concurrency=3)
+            result = await results.__anext__()
+            await results.aclose()
+            return result
+
+        assert asyncio.run(first()).path in self.paths
+
+
+class TestScanLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        root = self.dir.name
+
+        os.makedirs(os.path.join(root, "artist", "release", "CD1"))
+        corpus.make_mp3(os.path.join(root, "artist", "release", "CD1", "01.mp3"), tags={"title": ["one"]})
+        corpus.make_mp3(os.path.join(root, "artist", "release", "02.MP3"), tags={"title": ["two"]})
+        with open(os.path.join(root, "artist", "release", "cover.jpg"), "wb") as f:
+            f.write(b"jpeg")
+        with open(os.path.join(root, "corrupt.flac"), "wb") as f:
+            f.write(b"not a flac")
+
+        # a symlink cycle back to the root
+        os.symlink(root, os.path.join(root, "artist", "loop"))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_walk_library(self):
+        paths = sorted(os.path.relpath(x, self.dir.name) for x in walk_library(self.dir.name))
+
+        assert paths == [os.path.join("artist", "release", "02.MP3"), os.path.join("artist", "release", "CD1", "01.mp3"),
+                         "corrupt.flac"]
+        assert len(list(walk_library(self.dir.name, follow_symlinks=True))) == 3
+        assert list(walk_library(self.dir.name, extensions=[".ogg"])) == []
+
+    def test_walk_library_error(self):
+        errors = []
+        assert list(walk_library(os.path.join(self.dir.name, "missing"), onerror=errors.append)) == []
+        assert isinstance(errors[0], OSError)
+
+    def test_scan_library(self):
+        results = dict(scan_library(self.dir.name))
+
+        assert len(results) == 3
+        assert isinstance(results[os.path.join(self.dir.name, "corrupt.flac")], ClearTagError)
+        assert results[os.path.join(self.dir.name, "artist", "release", "02.MP3")].track_title == "two"
+
+
+class TestWriteTags(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"artist": ["artist"], "title": ["title"],
+                                                                  "tracknumber": ["1/10"], "date": ["2001"]})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_write_unchanged(self):
+        mtime_ns = os.stat(self.path).st_mtime_ns
+
+        assert not write_tags(self.path, read_tags(self.path))
+        assert os.stat(self.path).st_mtime_ns == mtime_ns
+
+    def test_write_changed(self):
+        track = read_tags(self.path)
+        track.comment = "comment"
+        track.genres = ["genre"]
+
+        assert write_tags(self.path, track)
+        assert read_tags(self.path) == track
+        assert not write_tags(self.path, track)
+
+
+class TestReadFields(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"artist": ["artist"], "title": ["title"],
+                                                                  "tracknumber": ["3/10"], "genre": ["genre"]})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_fields(self):
+        track = read_tags(self.path, fields=["track_title", "track_number"], stream_info=False)
+
+        assert track.track_title == "title"
+        assert track.track_number == 3
+        assert track.total_tracks is None
+        assert track.artists == []
+        assert track.stream_info is None
+        assert not track.is_loaded("artists")
+        assert not track.is_loaded("stream_info")
+        assert track.is_loaded("track_title")
+        assert Track.from_dict(track.to_dict()).unloaded_fields == track.unloaded_fields
+
+        assert read_tags(self.path).unloaded_fields == frozenset()
+
+    def test_lazy_xing(self):
+        track = read_tags(self.path, lazy_xing=True)
+
+        assert not track.stream_info.is_xing_loaded()
+        assert track.stream_info.get_ext() == "mp3"
+        assert track.stream_info.xing.header_type == XingHeader.LAME
+        assert track.stream_info.mp3_method == Mp3Method.VBR
+        assert track.stream_info == read_tags(self.path).stream_info
+
+    def test_lazy_xing_serialise(self):
+        cache = DiskCache(os.path.join(self.dir.name, "cache.db"))
+        table = TrackTable()
+        moved = self.path + ".moved"
+
+        with patch("cleartag.ClearTag.read_xing", wraps=ClearTag.read_xing) as loader:
+            track = read_tags(self.path, lazy_xing=True, cache=cache)
+            stat = os.stat(self.path)
+            assert len(cache) == 0
+
+            # serialising neither loads the header nor reopens the file, which may have moved
+            os.rename(self.path, moved)
+            cache.put(self.path, stat, track)
+            table.append(track)
+            assert loader.call_count == 0
+
+            for copy in (cache.get(self.path, stat), table[0]):
+                assert not copy.stream_info.is_xing_loaded()
+                assert copy.stream_info.xing is None
+
+            os.rename(moved, self.path)
+            assert track.stream_info.xing.header_type == XingHeader.LAME
+            assert loader.call_count == 1
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            read_tags(self.path, fields=["title"])
+
+    def test_write_partial(self):
+        track = read_tags(self.path, fields=["track_title", "track_number"], stream_info=False)
+        track.track_title = "new title"
+
+        assert write_tags(self.path, track)
+
+        written = read_tags(self.path)
+        assert written.track_title == "new title"
+        assert written.artists == ["artist"]
+        assert written.genres == ["genre"]
+        assert written.total_tracks == 10
+
+
+class TestSkipArtwork(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.art_size = 1024 * 1024
+
+        self.mp3 = os.path.join(self.dir.name, "art.mp3")
+        corpus.make_mp3(self.mp3, corpus.xing_payload(), tags={"title": ["title"]}, art_size=self.art_size)
+        self.flac = os.path.join(self.dir.name, "art.flac")
+        corpus.make_flac(self.flac, tags={"title": ["title"]}, art_size=self.art_size)
+        self.m4a = os.path.join(self.dir.name, "art.m4a")
+        corpus.make_mp4(self.m4a, tags={"\xa9nam": ["title"], "covr": [MP4Cover(corpus.art_bytes(1000))] * 2})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_picture_info(self):
+        for path in (self.mp3, self.flac):
+            track = read_tags(path)
+            assert (track.picture_count, track.picture_size) == (1, self.art_size)
+
+        track = read_tags(self.m4a)
+        assert (track.picture_count, track.picture_size) == (2, 2000)
+
+        corpus.make_mp3(self.mp3, corpus.xing_payload(), tags={"title": ["title"]})
+        track = read_tags(self.mp3, skip_artwork=True)
+        assert (track.picture_count, track.picture_size) == (0, 0)
+
+    def test_skip_artwork(self):
+        for path in (self.mp3, self.flac):
+            io_stats = IOStats()
+            track = read_tags(path, io_stats=io_stats, skip_artwork=True)
+
+            assert track.track_title == "title"
+            assert (track.picture_count, track.picture_size) == (1, self.art_size)
+            assert io_stats.bytes_read < 64 * 1024
+            assert track.to_dict() == read_tags(path).to_dict()
+
+        track = read_tags(self.m4a, skip_artwork=True)
+        assert track.track_title == "title"
+        assert (track.picture_count, track.picture_size) == (2, 2000)
+
+
+class TestFormats(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.library = corpus.make_library(self.dir.name, files_per_kind=1, art_size=1024)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_formats(self):
+        expected = {"flac_16": (TagType.FLAC, 16), "flac_24": (TagType.FLAC, 24), "m4a_aac": (TagType.MP4, None),
+                    "ogg_vorbis": (TagType.VORBIS, None), "ogg_opus": (TagType.VORBIS, None),
+                    "mp3_cbr_no_id3": (TagType.ID3, None)}
+
+        for kind, (tag_type, bits_per_sample) in expected.items():
+            track = read_tags(self.library[kind][0])
+
+            assert track.stream_info.tag_type == tag_type
+            assert track.stream_info.bits_per_sample == bits_per_sample
+            if kind != "mp3_cbr_no_id3":
+                assert track.track_title == "track 1"
+                assert track.artists == ["artist"]
+
+        for kind in ("mp3_art", "flac_art", "m4a_art", "ogg_art"):
+            for backend in ReadBackend:
+                track = read_tags(self.library[kind][0], backend=backend)
+                assert (track.picture_count, track.picture_size) == (1, 1024), (kind, backend)
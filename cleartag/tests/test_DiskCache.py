@@ -0,0 +1,73 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from cleartag.ClearTag import read_tags, write_tags, read_tags_many
+from cleartag.DiskCache import DiskCache
+from cleartag.tests import corpus
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"title": ["title"], "tracknumber": ["3/12"]})
+        self.cache = DiskCache(os.path.join(self.dir.name, "cache.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.dir.cleanup()
+
+    def test_hit(self):
+        track = read_tags(self.path, cache=self.cache)
+        assert self.cache.misses == 1
+
+        cached = read_tags(self.path, cache=self.cache)
+        assert self.cache.hits == 1
+        assert cached == track
+        assert cached.total_tracks == 12
+        assert cached.stream_info == track.stream_info
+        assert cached.stream_info.xing.lame_version == "3.99r"
+
+    def test_persistent(self):
+        read_tags(self.path, cache=self.cache)
+        self.cache.close()
+
+        with DiskCache(self.cache.path) as cache:
+            read_tags(self.path, cache=cache)
+            assert cache.hits == 1
+
+    def test_write_tags_invalidates(self):
+        track = read_tags(self.path, cache=self.cache)
+        stat = os.stat(self.path)
+
+        track.track_title = "new title"
+        write_tags(self.path, track)
+
+        # restore the old identity, so that only the explicit invalidation can cause a miss
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert len(self.cache) == 0
+        assert read_tags(self.path, cache=self.cache).track_title == "new title"
+
+    def test_stale(self):
+        read_tags(self.path, cache=self.cache)
+        with open(self.path, "ab") as f:
+            f.write(corpus.mp3_frame())
+
+        read_tags(self.path, cache=self.cache)
+        assert self.cache.misses == 2
+
+    def test_pickle(self):
+        read_tags(self.path, cache=self.cache)
+        cache = pickle.loads(pickle.dumps(self.cache))
+
+        assert cache.get(self.path, os.stat(self.path)) is not None
+        cache.close()
+
+    def test_read_tags_many(self):
+        read_tags(self.path, cache=self.cache)
+
+        results = list(read_tags_many([self.path], workers=1, executor="process", cache=self.cache))
+        assert results[0].track.track_title == "title"
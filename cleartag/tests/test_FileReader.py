@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from cleartag.ClearTag import read_tags, read_xing, write_tags
+from cleartag.FileReader import FileReader, HEAD_SIZE, LEGACY_BUFFER_SIZE
+from cleartag.IOStats import IOStats
+from cleartag.enums.XingHeader import XingHeader
+from cleartag.tests import corpus
+
+
+class TestFileReader(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_seek(self):
+        path = os.path.join(self.dir.name, "data.bin")
+        data = bytes(x % 251 for x in range(HEAD_SIZE * 3))
+        with open(path, "wb") as f:
+            f.write(data)
+
+        with FileReader(path) as reader:
+            assert reader.size == len(data)
+            assert reader.head == data[:HEAD_SIZE]
+
+            assert reader.read(10) == data[:10]
+            reader.seek(HEAD_SIZE - 5)
+            assert reader.read(10) == data[HEAD_SIZE - 5:HEAD_SIZE + 5]
+            reader.seek(-128, os.SEEK_END)
+            assert reader.read() == data[-128:]
+            assert reader.read(10) == b""
+            reader.seek(-20, os.SEEK_CUR)
+            assert reader.tell() == len(data) - 20
+
+        assert reader.closed
+
+    def test_read_ahead(self):
+        path = os.path.join(self.dir.name, "data.bin")
+        data = bytes(x % 251 for x in range(HEAD_SIZE * 3))
+        with open(path, "wb") as f:
+            f.write(data)
+
+        # small reads past the head are served from one buffer fill, as by a buffered file object
+        for read_ahead, reads in ((True, 1), (False, 16)):
+            io_stats = IOStats()
+            with FileReader(path, io_stats, prefetch_tag=read_ahead) as reader:
+                assert reader.read_ahead == read_ahead
+                start = io_stats.reads
+                for i in range(16):
+                    reader.seek(HEAD_SIZE + i * 64)
+                    assert reader.read(8) == data[HEAD_SIZE + i * 64:HEAD_SIZE + i * 64 + 8]
+                assert io_stats.reads - start == reads
+
+        # a read which runs past the buffer refills it from where the buffer ends
+        io_stats = IOStats()
+        with FileReader(path, io_stats) as reader:
+            pos = HEAD_SIZE + LEGACY_BUFFER_SIZE + 8
+            reader.seek(HEAD_SIZE)
+            assert reader.read(8) == data[HEAD_SIZE:HEAD_SIZE + 8]
+            assert reader.read(LEGACY_BUFFER_SIZE) == data[HEAD_SIZE + 8:pos]
+            start = io_stats.reads
+            assert reader.read(8) == data[pos:pos + 8]
+            assert io_stats.reads == start
+            assert reader.read(HEAD_SIZE) == data[pos + 8:pos + 8 + HEAD_SIZE]
+
+    def test_prefetch_covers_id3(self):
+        path = os.path.join(self.dir.name, "tagged.mp3")
+        corpus.make_mp3(path, corpus.xing_payload(), frames=2000, tags={"title": ["x" * HEAD_SIZE]})
+
+        io_stats = IOStats()
+        with FileReader(path, io_stats) as reader:
+            assert b"Xing" in reader.head
+            assert io_stats.opens == 1
+            assert io_stats.reads == 2
+
+    def test_read_tags_single_open(self):
+        path = os.path.join(self.dir.name, "lame.mp3")
+        corpus.make_mp3(path, corpus.xing_payload(), frames=2000, tags={"artist": ["artist"], "title": ["title"]})
+
+        io_stats = IOStats()
+        track = read_tags(path, io_stats)
+
+        assert track.artists == ["artist"]
+        assert track.stream_info.xing.header_type == XingHeader.LAME
+        assert io_stats.opens == 1
+        assert io_stats.stats == 1
+        assert io_stats.legacy_opens == 2
+        assert io_stats.saved_syscalls > 0
+        assert io_stats.saved_bytes > 0
+
+    def test_savings_never_negative(self):
+        library = corpus.make_library(self.dir.name, files_per_kind=1, art_size=64 * 1024)
+
+        for path in (x for paths in library.values() for x in paths):
+            io_stats = IOStats()
+            read_tags(path, io_stats, lazy_xing=True)
+            track = read_tags(path, io_stats)
+            assert io_stats.saved_syscalls >= 0 and io_stats.saved_bytes >= 0, path
+
+            # writes and read_xing have no legacy baseline, and are not compared against it
+            saved = io_stats.saved_syscalls, io_stats.saved_bytes
+            track.track_title = "changed"
+            write_tags(path, track, io_stats=io_stats)
+            if path.endswith(".mp3"):
+                read_xing(path, io_stats=io_stats)
+            assert io_stats.writes > 0
+            assert (io_stats.saved_syscalls, io_stats.saved_bytes) == saved
@@ -0,0 +1,105 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from cleartag.ClearTag import read_tags, write_tags, read_xing, read_tags_many
+from cleartag.Exceptions import ClearTagError, IOBudgetExceeded
+from cleartag.FileReader import HEAD_SIZE
+from cleartag.IOBudget import IOBudget
+from cleartag.IOStats import IOStats
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.mpeg import XING_SEARCH_SIZE
+from cleartag.tests import corpus
+
+
+class TestIOBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        self.art_path = os.path.join(self.dir.name, "art.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"title": ["title"]})
+        corpus.make_mp3(self.art_path, corpus.xing_payload(), tags={"title": ["title"]}, art_size=100 * 1024)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_strict(self):
+        budget = IOBudget(max_bytes=64 * 1024)
+
+        assert read_tags(self.path, budget=budget).track_title == "title"
+        with self.assertRaises(IOBudgetExceeded) as context:
+            read_tags(self.art_path, budget=budget)
+
+        assert isinstance(context.exception, ClearTagError)
+        assert context.exception.path == self.art_path
+
+        results = list(read_tags_many([self.path, self.art_path], executor="thread", budget=budget))
+        assert results[0].ok
+        assert isinstance(results[1].error, IOBudgetExceeded)
+
+    def test_flag(self):
+        budget = IOBudget(max_bytes=64 * 1024, strict=False)
+        io_stats = IOStats()
+
+        assert read_tags(self.art_path, io_stats, budget=budget).track_title == "title"
+        assert len(budget.violations) == 1
+        assert budget.violations[0][0] == self.art_path
+        assert io_stats.bytes_read > 64 * 1024
+
+    def test_shared_io_stats(self):
+        # the budget applies to each call, not to the totals of an IOStats shared between them
+        budget = IOBudget(max_bytes=50000, max_reads=32, max_seeks=32)
+        io_stats = IOStats()
+
+        for _ in range(10):
+            track = read_tags(self.path, io_stats, budget=budget)
+            read_xing(self.path, io_stats=io_stats, budget=budget)
+        track.track_title = "new title"
+        assert write_tags(self.path, track, io_stats=io_stats, budget=budget)
+
+        assert io_stats.bytes_read > 50000 and io_stats.reads > 32 and io_stats.seeks > 32
+
+    def test_below_head_size(self):
+        # the prefetch takes half the budget, leaving the rest to the parsers
+        flac_path = os.path.join(self.dir.name, "track.flac")
+        corpus.make_flac(flac_path, tags={"title": ["title"]})
+
+        for path, max_bytes in ((flac_path, 4096), (self.path, HEAD_SIZE)):
+            for backend in ReadBackend:
+                io_stats = IOStats()
+                track = read_tags(path, io_stats, budget=IOBudget(max_bytes=max_bytes), backend=backend)
+                assert track.track_title == "title"
+                assert io_stats.bytes_read <= max_bytes
+
+    def test_read_xing(self):
+        io_stats = IOStats()
+
+        read_xing(self.art_path, io_stats=io_stats)
+
+        assert io_stats.opens == 1
+        assert io_stats.bytes_read <= 2 * XING_SEARCH_SIZE
+
+        with self.assertRaises(IOBudgetExceeded):
+            read_xing(self.art_path, budget=IOBudget(max_seeks=0))
+
+    def test_write_tags(self):
+        io_stats = IOStats()
+        track = read_tags(self.art_path)
+        track.track_title = "new title"
+
+        assert write_tags(self.art_path, track, io_stats=io_stats, budget=IOBudget(max_bytes=256 * 1024))
+
+        assert io_stats.opens == 1
+        assert io_stats.writes > 0 and io_stats.bytes_written > 0
+        assert read_tags(self.art_path).track_title == "new title"
+
+        with self.assertRaises(IOBudgetExceeded):
+            write_tags(self.art_path, track, budget=IOBudget(max_bytes=1024))
+
+    def test_pickle(self):
+        error = pickle.loads(pickle.dumps(IOBudgetExceeded("path", "reason")))
+
+        assert error.path == "path" and error.reason == "reason"
+        assert str(error) == "I/O budget exceeded for path: reason"
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from cleartag.ClearTag import read_tags, write_tags
+from cleartag.MemoryCache import MemoryCache
+from cleartag.TrackCache import TrackCache
+from cleartag.tests import corpus
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.dir.name, "{0}.mp3".format(i))
+            corpus.make_mp3(path, tags={"title": ["title {0}".format(i)]})
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_hit_miss(self):
+        cache = MemoryCache(max_entries=10)
+
+        track = read_tags(self.paths[0], cache=cache)
+        cached = read_tags(self.paths[0], cache=cache)
+
+        assert cached == track
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # cached entries are copies
+        cached.genres.append("edited")
+        assert read_tags(self.paths[0], cache=cache).genres == []
+
+    def test_lru_entries(self):
+        cache = MemoryCache(max_entries=2)
+
+        read_tags(self.paths[0], cache=cache)
+        read_tags(self.paths[1], cache=cache)
+        read_tags(self.paths[0], cache=cache)
+        read_tags(self.paths[2], cache=cache)
+
+        assert len(cache) == 2
+        assert cache.evictions == 1
+        assert cache.get(self.paths[1], os.stat(self.paths[1])) is None
+        assert cache.get(self.paths[0], os.stat(self.paths[0])) is not None
+
+    def test_max_bytes(self):
+        track = read_tags(self.paths[0])
+        cache = MemoryCache(max_bytes=2 * MemoryCache.estimate_size(track))
+
+        for path in self.paths:
+            read_tags(path, cache=cache)
+
+        assert len(cache) == 2
+        assert cache.size_bytes <= cache.max_bytes
+
+    def test_stale(self):
+        cache = MemoryCache(max_entries=10)
+        read_tags(self.paths[0], cache=cache)
+
+        with open(self.paths[0], "ab") as f:
+            f.write(corpus.mp3_frame())
+
+        assert cache.get(self.paths[0], os.stat(self.paths[0])) is None
+        assert len(cache) == 0
+
+    def test_write_tags_evicts(self):
+        cache = MemoryCache(max_entries=10)
+        track = read_tags(self.paths[0], cache=cache)
+
+        track.track_title = "new title"
+        write_tags(self.paths[0], track)
+
+        assert len(cache) == 0
+        assert "hits=0" in cache.__repr__()
+
+    def test_abstract(self):
+        class Incomplete(TrackCache):
+            def get(self, path, stat):
+                return None
+
+        for cache_class in (TrackCache, Incomplete):
+            with self.assertRaises(TypeError):
+                cache_class()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from mutagen._tags import PaddingInfo
+
+from cleartag.ClearTag import read_tags, write_tags
+from cleartag.PaddingPolicy import PaddingPolicy
+from cleartag.tests import corpus
+
+
+class TestPaddingPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"title": ["title"]})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_call(self):
+        policy = PaddingPolicy(reserve_bytes=1000, reserve_percent=1)
+
+        assert policy(PaddingInfo(padding=500, size=100000)) == 500
+        assert policy(PaddingInfo(padding=-10, size=100000)) == 2000
+        assert PaddingPolicy(reserve_bytes=1000, max_padding=1500)(PaddingInfo(padding=5000, size=0)) == 1000
+
+    def test_in_place(self):
+        track = read_tags(self.path)
+        track.track_title = "a slightly longer title"
+
+        result = write_tags(self.path, track)
+
+        assert result.written
+        assert result.in_place
+
+    def test_rewrite_reserves_padding(self):
+        track = read_tags(self.path)
+        track.comment = "x" * 20000
+
+        result = write_tags(self.path, track, padding=PaddingPolicy(reserve_bytes=32 * 1024))
+        assert result.rewritten
+        assert result.padding == 32 * 1024
+
+        size = os.path.getsize(self.path)
+        track.comment = "y" * 40000
+
+        result = write_tags(self.path, track, padding=PaddingPolicy(reserve_bytes=32 * 1024))
+        assert result.in_place
+        assert os.path.getsize(self.path) == size
+        assert read_tags(self.path).comment == track.comment
+
+    def test_unchanged(self):
+        result = write_tags(self.path, read_tags(self.path))
+
+        assert not result
+        assert result.in_place is None
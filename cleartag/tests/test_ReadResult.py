@@ -0,0 +1,16 @@
+import unittest
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.tests import test_Track
+
+
+class TestReadResult(unittest.TestCase):
+
+    def test_init(self):
+        result = ReadResult("path", track=test_Track.create_test_track())
+        assert result.ok
+
+        result = ReadResult("path", error=ClearTagError("error"))
+        assert not result.ok
+        assert "error" in result.__repr__()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.Release import Release
+from cleartag.StreamInfo import StreamInfo
+from cleartag.Track import Track
+from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.TagType import TagType
+from cleartag.tests import corpus, test_Xing
+
+
+def create_track(track_number, disc_number=1, total_tracks=5, release_title="release", stream_info=None):
+    stream_info = stream_info or StreamInfo(TagType.ID3, 100.0, 128000, None, Mp3Method.VBR, test_Xing.create_xing())
+    return Track(release_artists=["artist"], release_title=release_title, date="2001", track_number=track_number,
+                 total_tracks=total_tracks, disc_number=disc_number, stream_info=stream_info)
+
+
+class TestRelease(unittest.TestCase):
+
+    def test_order(self):
+        release = Release([create_track(3), create_track(1), create_track(2, disc_number=2)], ["c", "a", "b"])
+
+        assert [x.track_number for x in release] == [1, 3, 2]
+        assert release.paths == ["a", "c", "b"]
+        assert release.get_key() == (("artist",), "release", "2001")
+
+    def test_analyse(self):
+        release = Release([create_track(1), create_track(2), create_track(2), create_track(4)])
+
+        assert release.codec_setting == ("MP3", "APS")
+        assert release.duplicate_track_numbers == [(1, 2)]
+        assert release.missing_track_numbers == [(1, 3), (1, 5)]
+
+        flac = StreamInfo(TagType.FLAC, 100.0, 900000, 16)
+        assert Release([create_track(1), create_track(2, stream_info=flac)]).codec_setting is None
+
+    def test_group(self):
+        releases = Release.group([
+            ReadResult("1.mp3", create_track(1)),
+            ReadResult("broken.mp3", error=ClearTagError("broken")),
+            ("other.mp3", create_track(1, release_title="other")),
+            create_track(2),
+        ])
+
+        assert [x.release_title for x in releases] == ["release", "other"]
+        assert releases[0].paths == ["1.mp3", None]
+        assert len(releases[1]) == 1
+
+    def test_from_directory(self):
+        with tempfile.TemporaryDirectory() as root:
+            for i in range(1, 4):
+                corpus.make_mp3(os.path.join(root, "{0}.mp3".format(i)), corpus.xing_payload(),
+                                tags={"album": ["release"], "albumartist": ["artist"],
+                                      "tracknumber": ["{0}/3".format(i)]})
+
+            releases = Release.from_directory(root)
+
+            assert len(releases) == 1
+            assert [os.path.basename(x) for x in releases[0].paths] == ["1.mp3", "2.mp3", "3.mp3"]
+            assert releases[0].missing_track_numbers == []
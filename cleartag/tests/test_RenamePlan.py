@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.Release import Release
+from cleartag.RenamePlan import RenamePlan, TEMP_SUFFIX
+from cleartag.StreamInfo import StreamInfo
+from cleartag.Track import Track
+from cleartag.enums.TagType import TagType
+
+
+def create_track(track_number, title):
+    return Track(artists=["artist"], track_title=title, track_number=track_number, total_tracks=9, disc_number=1,
+                 total_discs=1, stream_info=StreamInfo(TagType.FLAC, 100.0, 900000, 16))
+
+
+class TestRenamePlan(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def touch(self, name, content=b""):
+        with open(self.path(name), "wb") as f:
+            f.write(content)
+        return self.path(name)
+
+    def read(self, name):
+        with open(self.path(name), "rb") as f:
+            return f.read()
+
+    def test_plan(self):
+        items = [
+            (self.touch("a.flac"), create_track(1, "one")),
+            (self.touch("01 - one.flac"), create_track(2, "one")),
+            (self.touch("02 - already.flac"), create_track(2, "already")),
+            (self.touch("c.flac"), create_track(3, "same")),
+            (self.touch("d.flac"), create_track(3, "same")),
+            (self.touch("e.flac"), Track()),
+        ]
+        self.touch("05 - taken.flac")
+        items.append((self.touch("f.flac"), create_track(5, "taken")))
+
+        plan = RenamePlan.build(items)
+
+        # the occupant of a target moves first
+        assert plan.operations == [(self.path("01 - one.flac"), self.path("02 - one.flac")),
+                                   (self.path("a.flac"), self.path("01 - one.flac"))]
+        assert plan.unchanged == [self.path("02 - already.flac")]
+        assert plan.skipped == [self.path("e.flac")]
+        assert plan.collisions == [(self.path("03 - same.flac"), [self.path("c.flac"), self.path("d.flac")]),
+                                   (self.path("05 - taken.flac"), [self.path("f.flac")])]
+
+        describe = plan.describe()
+        assert plan.apply(dry_run=True) == plan.operations
+        assert os.path.exists(self.path("a.flac"))
+        assert len(describe) == 5
+
+        plan.apply()
+        assert os.path.exists(self.path("01 - one.flac"))
+        assert os.path.exists(self.path("02 - one.flac"))
+        assert not os.path.exists(self.path("a.flac"))
+
+    def test_cycle(self):
+        # two tracks with swapped numbers
+        one = self.touch("02 - title.flac", b"one")
+        two = self.touch("01 - title.flac", b"two")
+        release = Release([create_track(1, "title"), create_track(2, "title")], [one, two])
+
+        plan = RenamePlan.build([release])
+
+        assert len(plan) == 3
+        plan.apply()
+        assert self.read("01 - title.flac") == b"one"
+        assert self.read("02 - title.flac") == b"two"
+        assert sorted(os.listdir(self.dir.name)) == ["01 - title.flac", "02 - title.flac"]
+
+    def test_chain_collision(self):
+        # a -> 01 is planned before 01 -> 02, which collides with a file outside the plan, so 01 stays and a must too
+        self.touch("a.flac", b"a")
+        self.touch("01 - one.flac", b"one")
+        self.touch("02 - two.flac", b"two")
+        items = [(self.path("a.flac"), create_track(1, "one")), (self.path("01 - one.flac"), create_track(2, "two"))]
+
+        plan = RenamePlan.build(items)
+
+        assert plan.operations == []
+        assert sorted(plan.collisions) == [(self.path("01 - one.flac"), [self.path("a.flac")]),
+                                           (self.path("02 - two.flac"), [self.path("01 - one.flac")])]
+        plan.apply()
+        assert (self.read("a.flac"), self.read("01 - one.flac"), self.read("02 - two.flac")) == (b"a", b"one", b"two")
+
+    def test_apply_checks_first(self):
+        # a file appears at a cycle's temporary name, or at the last target of a chain, after the plan is built: the
+        # first rename would succeed, but nothing is renamed. Nor is anything if a source has gone
+        one = self.touch("02 - title.flac", b"one")
+        two = self.touch("01 - title.flac", b"two")
+        cycle = RenamePlan.build([Release([create_track(1, "title"), create_track(2, "title")], [one, two])])
+        self.touch("a.flac", b"a")
+        self.touch("03 - three.flac", b"three")
+        chain = RenamePlan.build([(self.path("a.flac"), create_track(3, "three")),
+                                  (self.path("03 - three.flac"), create_track(4, "four"))])
+        assert len(chain) == 2
+
+        names = sorted(os.listdir(self.dir.name))
+        for plan, name in ((cycle, cycle.operations[0][1]), (chain, self.path("04 - four.flac"))):
+            with open(name, "wb"):
+                pass
+            with self.assertRaises(ClearTagError):
+                plan.apply()
+            os.remove(name)
+            assert sorted(os.listdir(self.dir.name)) == names
+
+        assert cycle.operations[0][1].endswith(TEMP_SUFFIX)
+        os.remove(self.path("a.flac"))
+        with self.assertRaises(ClearTagError):
+            chain.apply()
+        assert self.read("03 - three.flac") == b"three"
@@ -19,6 +19,8 @@ class TestStreamInfo(unittest.TestCase):
         assert StreamInfo(TagType.ID3, 100.123, 128000, 16, Mp3Method.VBR).get_ext() == "mp3"
         assert StreamInfo(TagType.FLAC, 100.123, 128000, 16, Mp3Method.VBR).get_ext() == "flac"
         assert StreamInfo(TagType.MP4, 100.123, 128000, 16, Mp3Method.VBR).get_ext() == "mp4"
+        assert StreamInfo(TagType.VORBIS, 100.123, 128000, codec="vorbis").get_ext() == "ogg"
+        assert StreamInfo(TagType.VORBIS, 100.123, 128000, codec="opus").get_ext() == "opus"
 
     def test_eq(self):
         stream_info1 = create_test_streaminfo()
@@ -31,6 +33,35 @@ class TestStreamInfo(unittest.TestCase):
 
         assert stream_info1 != stream_info2
 
+    def test_dict(self):
+        stream_info = create_test_streaminfo()
+        copy = StreamInfo.from_dict(stream_info.to_dict())
+
+        assert copy == stream_info
+        assert copy.length == stream_info.length
+        assert copy.mp3_method == stream_info.mp3_method
+
+        stream_info = StreamInfo(TagType.MP4, 100.123, 128000, codec="mp4a.40.2")
+        assert StreamInfo.from_dict(stream_info.to_dict()).codec == "mp4a.40.2"
+
+    def test_xing_loader(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            return test_Xing.create_xing()
+
+        stream_info = StreamInfo(TagType.ID3, 100.123, 128000, xing_loader=load)
+
+        assert not stream_info.is_xing_loaded()
+        assert stream_info.get_ext() == "mp3"
+        assert not calls
+
+        assert stream_info.mp3_method == test_Xing.create_xing().method
+        assert stream_info.xing == test_Xing.create_xing()
+        assert stream_info.is_xing_loaded()
+        assert len(calls) == 1
+
     def test_repr(self):
         stream_info = create_test_streaminfo()
         assert "Header type:" in stream_info.__repr__()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from cleartag.ClearTag import read_tags, write_tags, read_tags_many
+from cleartag.Timings import Timings, FileTiming
+from cleartag.tests import corpus
+
+
+class TestTimings(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "track.mp3")
+        corpus.make_mp3(self.path, corpus.xing_payload(), tags={"artist": ["artist"], "title": ["title"]})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_write(self):
+        with Timings() as timings:
+            track = read_tags(self.path)
+            track.track_title = "new title"
+            write_tags(self.path, track)
+
+        read, write = timings.records
+        assert read.operation == "read"
+        assert list(read.phases) == ["open", "tag_parse", "tag_extract", "xing_parse", "track_build"]
+        assert read.size == os.path.getsize(self.path)
+        assert read.format == "EasyMP3"
+        assert list(write.phases) == ["tag_parse", "compare", "save"]
+
+        read_tags(self.path)
+        assert len(timings.records) == 2
+
+    def test_callback(self):
+        received = []
+
+        with Timings(received.append, keep=False) as timings:
+            for result in read_tags_many([self.path] * 3, workers=2, executor="thread"):
+                assert result.ok
+
+        assert not timings.records
+        assert len(received) == 3
+
+    def test_summary(self):
+        timings = Timings()
+        for i in range(1, 101):
+            timing = FileTiming(timings, str(i), "read")
+            timing.phases = {"open": i / 1000, "tag_parse": 0.001}
+            timing.finish()
+
+        summary = timings.summary()
+
+        assert summary["read.open"]["count"] == 100
+        assert summary["read.open"]["p50"] == 0.05
+        assert summary["read.open"]["p99"] == 0.099
+        assert summary["read.open"]["max"] == 0.1
+        assert summary["read.total"]["p90"] == 0.091
+        assert "read.open" in Timings.format_summary(summary)
@@ -74,6 +74,21 @@ class TestTrack(unittest.TestCase):
         track.stream_info.tag_type = TagType.MP4
         assert track.get_codec_setting_str() == "UNKNOWN"
 
+        track.stream_info.codec = "mp4a.40.2"
+        assert track.get_codec_setting_str(short=False) == "AAC LC"
+
+        track.stream_info.codec = "alac"
+        assert track.get_codec_setting_str() == "24bit ALAC"
+        assert track.get_codec() == "24bit ALAC"
+
+        track.stream_info.bits_per_sample = 16
+        assert track.get_codec_setting() == ("ALAC", None)
+
+        track.stream_info.tag_type = TagType.VORBIS
+        track.stream_info.codec = "opus"
+        assert track.get_codec_setting() == ("Opus", None)
+        assert track.get_codec_setting_str(short=False) == "Opus"
+
 
 
     def test_get_filename(self):
@@ -94,6 +109,33 @@ class TestTrack(unittest.TestCase):
         assert track1 != track2
 
 
+    def test_dict(self):
+        track = create_test_track()
+        copy = Track.from_dict(track.to_dict())
+
+        assert copy == track
+        assert copy.stream_info == track.stream_info
+
+    def test_sort_key(self):
+        tracks = [Track(disc_number=2, track_number=1), Track(disc_number=1), Track(disc_number=1, track_number=2),
+                  Track(track_number=5), Track(disc_number=1, track_number=1)]
+
+        ordered = sorted(tracks)
+
+        assert [(x.disc_number, x.track_number) for x in ordered] == [(None, 5), (1, 1), (1, 2), (1, None), (2, 1)]
+        assert sorted(tracks, key=Track.sort_key) == ordered
+        assert not tracks[0] < tracks[0]
+
+    def test_compact(self):
+        track = create_test_track()
+        other = Track(artists=["".join(["art", "ist"])], stream_info=track.stream_info)
+
+        assert not hasattr(track, "__dict__")
+        assert not hasattr(track.stream_info, "__dict__")
+        assert not hasattr(track.stream_info.xing, "__dict__")
+        assert other.stream_info is track.stream_info
+        assert other.artists[0] is track.artists[0]
+
     def test_repr(self):
         track = create_test_track()
 
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+
+from cleartag.Exceptions import ClearTagError
+from cleartag.ReadResult import ReadResult
+from cleartag.StreamInfo import StreamInfo
+from cleartag.Track import Track
+from cleartag.TrackTable import TrackTable
+from cleartag.enums.Mp3Method import Mp3Method
+from cleartag.enums.TagType import TagType
+from cleartag.tests import test_Xing
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def create_tracks():
+    mp3 = StreamInfo(TagType.ID3, 200.5, 245000, None, Mp3Method.VBR, test_Xing.create_xing())
+    flac = StreamInfo(TagType.FLAC, 180.25, 900000, 24)
+
+    return [
+        Track(artists=["artist"], release_title="release", track_title="two", track_number=2, disc_number=1,
+              genres=["a", "b"], stream_info=mp3),
+        Track(artists=["artist"], release_title="release", track_title="one", track_number=1, disc_number=1,
+              genres=["a", "b"], stream_info=mp3),
+        Track(artists=["other"], release_title="other release", track_title="three", track_number=3,
+              disc_number=2, comment="comment", stream_info=flac, picture_count=0, picture_size=0),
+    ]
+
+
+class TestTrackTable(unittest.TestCase):
+
+    def setUp(self):
+        results = [ReadResult("{0}.mp3".format(i), track) for i, track in enumerate(create_tracks())]
+        results.append(ReadResult("broken.mp3", error=ClearTagError("broken")))
+        self.table = TrackTable.from_results(results)
+
+    def test_from_results(self):
+        assert len(self.table) == 3
+        assert self.table.errors[0][0] == "broken.mp3"
+        assert self.table.paths == ["0.mp3", "1.mp3", "2.mp3"]
+
+        table = TrackTable.from_results([("a.mp3", create_tracks()[0]), ("b.mp3", ClearTagError("broken"))])
+        assert len(table) == 1 and len(table.errors) == 1
+
+    def test_get_track(self):
+        for track, row in zip(create_tracks(), range(len(self.table))):
+            copy = self.table[row]
+            assert copy == track
+            assert copy.stream_info == track.stream_info
+            assert copy.get_codec_setting() == track.get_codec_setting()
+            assert (copy.picture_count, copy.picture_size) == (track.picture_count, track.picture_size)
+
+    def test_dictionary_encoding(self):
+        codes, values = self.table.codes("artists")
+
+        assert list(codes) == [0, 0, 1]
+        assert values == [("artist",), ("other",)]
+        assert self.table.column("release_title") == ["release", "release", "other release"]
+
+    def test_filter(self):
+        assert self.table.indices("artists", ["artist"]) == [0, 1]
+        assert self.table.indices("artists", ["missing"]) == []
+        assert self.table.indices("tag_type", TagType.FLAC) == [2]
+        assert self.table.indices_in_range("length", minimum=190) == [0, 1]
+
+        flac = self.table.filter_codec("FLAC")
+        assert len(flac) == 1
+        assert flac[0].track_title == "three"
+        assert len(self.table.filter_codec("MP3", "APS")) == 2
+
+    def test_sort(self):
+        assert self.table.sort_order() == [1, 0, 2]
+        assert self.table.sort_order(["track_title"]) == [1, 2, 0]
+        assert [x.track_title for x in [self.table.sort()[i] for i in range(3)]] == ["one", "two", "three"]
+
+    def test_sort_mixed(self):
+        mp3 = StreamInfo(TagType.ID3, 200.5, 245000, None, Mp3Method.VBR, test_Xing.create_xing())
+        table = TrackTable.from_results([
+            ("0.flac", Track(artists=["b"], genres=["g"], stream_info=StreamInfo(TagType.FLAC, 1.0, 900000, 24))),
+            ("1.flac", Track()),
+            ("2.mp3", Track(artists=["a", "c"], stream_info=mp3, unloaded_fields=["comment"])),
+            ("3.ogg", Track(artists=["a"], stream_info=StreamInfo(TagType.VORBIS, 1.0, 160000, None))),
+        ])
+
+        # empty tuples, None among tuples and frozensets, with NumPy and without
+        for module in (numpy, None):
+            with patch("cleartag.TrackTable.numpy", module):
+                assert table.sort_order(["artists"]) == [1, 3, 2, 0]
+                assert table.sort_order(["genres"]) == [1, 2, 3, 0]
+                assert table.sort_order(["codec"]) == [0, 2, 3, 1]
+                assert table.sort_order(["xing"]) == [2, 0, 1, 3]
+                assert table.sort_order(["unloaded_fields", "artists"]) == [1, 3, 0, 2]
+                assert table.sort_order(["date", "bitrate"]) == [1, 3, 2, 0]
+                assert table.sort_order() == [0, 1, 2, 3]
+                assert table.indices_in_range("length", 1.0, 100.0) == [0, 3]
+                assert table.indices_in_range("length", maximum=100.0) == [0, 1, 3]
+                assert table.indices_in_range("length") == [0, 1, 2, 3]
+                assert table.indices("artists", []) == [1]
+                assert [x.paths for x in (table.filter_codec("Vorbis"), table.take([]).filter_codec("FLAC"))] \
+                    == [["3.ogg"], []]
+
+    def test_aggregate(self):
+        assert sum(self.table.column("length")) == 200.5 * 2 + 180.25
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_to_numpy(self):
+        arrays = self.table.to_numpy()
+
+        assert arrays["bitrate"].sum() == 245000 * 2 + 900000
+        assert list(arrays["artists"]) == [0, 0, 1]
@@ -24,6 +24,12 @@ class TestStreamHeader(unittest.TestCase):
         assert xing1 != xing2
 
 
+    def test_dict(self):
+        xing = create_xing()
+
+        assert Xing.from_dict(xing.to_dict()) == xing
+        assert Xing.from_dict(Xing().to_dict()) == Xing()
+
     def test_repr(self):
         xing = create_xing()
 
@@ -0,0 +1,103 @@
+import io
+import os
+import tempfile
+import unittest
+
+from mutagen.flac import FLAC
+
+from cleartag.ClearTag import read_tags
+from cleartag.IOStats import IOStats
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.enums.TagType import TagType
+from cleartag.flac import is_flac, read_flac
+from cleartag.tests import corpus
+
+
+class TestFlac(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "test.flac")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_flac(self):
+        corpus.make_flac(self.path, 24, seconds=5, tags={"ARTIST": ["a", "b"], "title": ["t=1"],
+                                                         "comment": ["c"]}, art_size=4096)
+
+        with open(self.path, "rb") as f:
+            native = read_flac(f)
+        mutagen_file = FLAC(self.path)
+
+        assert native.tag_type == TagType.FLAC
+        assert native.tags == {"artist": ["a", "b"], "title": ["t=1"], "comment": ["c"]}
+        assert native.comment == "c"
+        assert native.pictures == [4096]
+        assert native.bits_per_sample == 24
+        assert native.length == mutagen_file.info.length == 5.0
+        assert native.bitrate == mutagen_file.info.bitrate
+
+    def test_untagged(self):
+        corpus.make_flac(self.path)
+
+        with open(self.path, "rb") as f:
+            native = read_flac(f)
+
+        assert native.tags == {}
+        assert native.comment is None
+
+    def test_not_flac(self):
+        assert not is_flac(b"OggS")
+        assert is_flac(b"fLaC\x00")
+        assert read_flac(io.BytesIO(b"OggS" + bytes(100))) is None
+
+    def test_truncated(self):
+        corpus.make_flac(self.path, tags={"title": ["t"]})
+        with open(self.path, "rb") as f:
+            data = f.read(60)
+
+        assert read_flac(io.BytesIO(data)) is None
+
+    def test_corrupt_block_length(self):
+        corpus.make_flac(self.path, tags={"title": ["t"]}, art_size=4096)
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+
+        # mutagen parses comments and pictures whatever their block lengths say, so such files are left to it
+        for block_type in (4, 6):
+            corrupt = self.path + str(block_type)
+            pos = 4
+            while data[pos] & 0x7F != block_type:
+                pos += 4 + int.from_bytes(data[pos + 1:pos + 4], "big")
+            length = int.from_bytes(data[pos + 1:pos + 4], "big") + 100
+            with open(corrupt, "wb") as f:
+                f.write(data[:pos + 1] + length.to_bytes(3, "big") + data[pos + 4:])
+
+            with open(corrupt, "rb") as f:
+                assert read_flac(f) is None
+            mutagen_track = read_tags(corrupt)
+            assert mutagen_track.track_title == "t"
+            assert read_tags(corrupt, backend=ReadBackend.NATIVE).to_dict() == mutagen_track.to_dict()
+            assert read_tags(corrupt, skip_artwork=True).to_dict() == mutagen_track.to_dict()
+
+    def test_skips_pictures(self):
+        corpus.make_flac(self.path, tags={"title": ["t"]}, art_size=1024 * 1024)
+
+        io_stats = IOStats()
+        track = read_tags(self.path, io_stats=io_stats, backend=ReadBackend.NATIVE)
+
+        assert track.track_title == "t"
+        assert io_stats.bytes_read < 64 * 1024
+
+    def test_matches_mutagen(self):
+        library = corpus.make_library(self.dir.name, files_per_kind=2, art_size=64 * 1024)
+
+        for paths in library.values():
+            for path in paths:
+                mutagen_track = read_tags(path, backend=ReadBackend.MUTAGEN)
+                native_track = read_tags(path, backend=ReadBackend.NATIVE)
+
+                assert native_track.to_dict() == mutagen_track.to_dict(), path
+                assert native_track.stream_info.length == mutagen_track.stream_info.length
+                assert native_track.stream_info.bitrate == mutagen_track.stream_info.bitrate
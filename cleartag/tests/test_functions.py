@@ -18,3 +18,4 @@ class TestFunctions(unittest.TestCase):
     def test_normalize_path_chars(self):
 
         assert normalize_path_chars("release title: something") == "release title： something"
+        assert normalize_path_chars('a/b\\c*d?e"f<g>h|i') == "a∕b⧵c٭d？eˮf〈g〉h⏐i"
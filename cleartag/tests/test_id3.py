@@ -0,0 +1,165 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from mutagen.id3._util import unsynch
+
+from cleartag.ClearTag import read_tags
+from cleartag.FileReader import FileReader
+from cleartag.IOStats import IOStats
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.id3 import read_mp3, get_id3_comment
+from cleartag.tests import corpus
+
+
+def syncsafe(value: int) -> bytes:
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+
+def text_frame(name: bytes, text: str, version: int = 4, encoding: int = 3, flags: int = 0,
+               int_size: bool = False) -> bytes:
+    data = bytes([encoding]) + text.encode({0: "latin-1", 3: "utf-8"}[encoding])
+    return raw_frame(name, data, version, flags, int_size)
+
+
+def raw_frame(name: bytes, data: bytes, version: int = 4, flags: int = 0, int_size: bool = False) -> bytes:
+    size = struct.pack(">I", len(data)) if version == 3 or int_size else syncsafe(len(data))
+    return name + size + struct.pack(">H", flags) + data
+
+
+def id3_tag(frames: bytes, version: int = 4, flags: int = 0, padding: int = 64) -> bytes:
+    frames += bytes(padding)
+    return b"ID3" + bytes([version, 0, flags]) + syncsafe(len(frames)) + frames
+
+
+class TestId3(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "test.mp3")
+        self.audio = corpus.mp3_frame(corpus.xing_payload()) + corpus.mp3_frame() * 50
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, tag: bytes) -> None:
+        with open(self.path, "wb") as f:
+            f.write(tag + self.audio)
+
+    def assert_matches_mutagen(self) -> None:
+        mutagen_track = read_tags(self.path, backend=ReadBackend.MUTAGEN)
+        native_track = read_tags(self.path, backend=ReadBackend.NATIVE)
+
+        assert native_track.to_dict() == mutagen_track.to_dict()
+        assert native_track.always_write == mutagen_track.always_write
+        assert native_track.stream_info.length == mutagen_track.stream_info.length
+        assert native_track.stream_info.bitrate == mutagen_track.stream_info.bitrate
+
+    def read_native(self):
+        with FileReader(self.path, prefetch_tag=False) as reader:
+            return read_mp3(reader)
+
+    def test_read_mp3(self):
+        art = raw_frame(b"APIC", b"\x00image/jpeg\x00\x03\x00" + corpus.art_bytes(64 * 1024))
+        self.write(id3_tag(text_frame(b"TPE1", "a\x00b") + art + text_frame(b"TIT2", "title") +
+                           text_frame(b"TRCK", "3/9") + text_frame(b"TCON", "(17)") +
+                           raw_frame(b"COMM", b"\x03eng\x00comment")))
+
+        native = self.read_native()
+
+        assert native.tags == {"artist": ["a", "b"], "title": ["title"], "tracknumber": ["3/9"], "genre": ["Rock"]}
+        assert native.comment == "comment"
+        assert not native.always_write
+        self.assert_matches_mutagen()
+
+    def test_v23_dates(self):
+        self.write(id3_tag(text_frame(b"TYER", "2001", 3, 0) + text_frame(b"TDAT", "3112", 3, 0), 3))
+
+        assert self.read_native().tags == {"date": ["2001-12-31"]}
+        self.assert_matches_mutagen()
+
+    def test_tag_unsynchronisation(self):
+        frames = text_frame(b"TIT2", "\xff\xe0\xff", 3, 0) + raw_frame(b"APIC", b"\x00\xff\xfb" + bytes(300), 3)
+        self.write(id3_tag(unsynch.encode(frames), 3, flags=0x80))
+
+        assert self.read_native().tags == {"title": ["\xff\xe0\xff"]}
+        self.assert_matches_mutagen()
+
+    def test_frame_unsynchronisation(self):
+        frame = text_frame(b"TIT2", "\xff\xe0\xff", 4, 0)
+        data = unsynch.encode(frame[10:])
+        self.write(id3_tag(raw_frame(b"TIT2", data, 4, flags=0x0002)))
+
+        assert self.read_native().tags == {"title": ["\xff\xe0\xff"]}
+        self.assert_matches_mutagen()
+
+    def test_integer_frame_sizes(self):
+        # some writers store v2.4 frame sizes as v2.3 integers
+        self.write(id3_tag(text_frame(b"TPE1", "a" * 300, int_size=True) + text_frame(b"TIT2", "t", int_size=True)))
+
+        assert self.read_native().tags == {"artist": ["a" * 300], "title": ["t"]}
+        self.assert_matches_mutagen()
+
+    def test_comments(self):
+        comments = raw_frame(b"COMM", b"\x03eng\x00one") + raw_frame(b"COMM", b"\x03fra\x00two")
+        v1 = b"TAG" + b"title".ljust(30, b"\x00") + bytes(60) + b"2001" + b"v1 comment".ljust(28, b"\x00") + \
+            b"\x00\x01\xff"
+
+        self.write(id3_tag(comments))
+        native = self.read_native()
+        assert (native.comment, native.always_write) == ("one", True)
+        self.assert_matches_mutagen()
+
+        self.write(id3_tag(raw_frame(b"COMM", b"\x03eng\x00one")))
+        with open(self.path, "ab") as f:
+            f.write(v1)
+        native = self.read_native()
+        assert (native.comment, native.always_write) == ("one", True)
+        assert native.tags["title"] == ["title"]
+        self.assert_matches_mutagen()
+
+        assert get_id3_comment({}) == (None, False)
+
+    def test_pictures(self):
+        def apic(description: bytes, size: int, encoding: int = 0) -> bytes:
+            return raw_frame(b"APIC", bytes([encoding]) + b"image/png\x00\x03" + description + corpus.art_bytes(size))
+
+        # a description running past the leading fields read, and a repeated description
+        long_description = "d".encode("utf-16") * 1000 + b"\x00\x00"
+        self.write(id3_tag(apic(b"front\x00", 100) + apic(long_description, 200, encoding=1) +
+                           apic(b"front\x00", 300) + apic(b"\x00", 5000)))
+
+        assert self.read_native().pictures == [100, 200, 300, 5000]
+        self.assert_matches_mutagen()
+
+    def test_untagged(self):
+        with open(self.path, "wb") as f:
+            f.write(self.audio)
+
+        assert self.read_native().tags == {}
+        self.assert_matches_mutagen()
+
+    def test_unhandled(self):
+        # ID3v2.2, a frame overrunning its tag, and audio which does not follow the tag, are left to mutagen
+        self.write(b"ID3\x02\x00\x00" + syncsafe(16) + b"TT2\x00\x00\x02\x00t" + bytes(8))
+        assert self.read_native() is None
+        self.assert_matches_mutagen()
+
+        self.write(id3_tag(text_frame(b"TIT2", "t")[:-1], padding=0))
+        assert self.read_native() is None
+
+        self.write(id3_tag(text_frame(b"TIT2", "t")) + bytes(10))
+        assert self.read_native() is None
+        self.assert_matches_mutagen()
+
+    def test_skips_artwork(self):
+        io_stats = {}
+        for art_size in (0, 4 * 1024 * 1024):
+            corpus.make_mp3(self.path, corpus.xing_payload(), 100, {"title": ["t"], "artist": ["a"]},
+                            art_size=art_size)
+            io_stats[art_size] = IOStats()
+            track = read_tags(self.path, io_stats=io_stats[art_size], backend=ReadBackend.NATIVE)
+            assert track.track_title == "t"
+
+        assert io_stats[4 * 1024 * 1024].bytes_read < 2 * io_stats[0].bytes_read
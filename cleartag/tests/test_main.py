@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+
+from cleartag.__main__ import main, load_completed
+from cleartag.tests import corpus
+
+
+class TestMain(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.dir.name, "library")
+        os.makedirs(self.root)
+        for i in range(3):
+            corpus.make_mp3(os.path.join(self.root, "{0}.mp3".format(i)), corpus.xing_payload(),
+                            tags={"title": ["title {0}".format(i)]})
+        with open(os.path.join(self.root, "corrupt.mp3"), "wb") as f:
+            f.write(b"not audio")
+
+        self.output = os.path.join(self.dir.name, "scan.jsonl")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def scan(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = main(["scan", self.root, "--executor", "thread", "--workers", "2"] + list(args))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_scan(self):
+        code, stdout, stderr = self.scan()
+
+        lines = [json.loads(x) for x in stdout.splitlines()]
+        tracks = sorted((x for x in lines if "track" in x), key=lambda x: x["path"])
+
+        assert code == 1
+        assert len(lines) == 4
+        assert [x["track"]["track_title"] for x in tracks] == ["title 0", "title 1", "title 2"]
+        assert tracks[0]["codec"] == "MP3 V2"
+        assert tracks[0]["track"]["stream_info"]["xing"]["lame_version"] == "3.99r"
+        assert [os.path.basename(x["path"]) for x in lines if "error" in x] == ["corrupt.mp3"]
+        assert "done: 4 files, 1 errors" in stderr
+
+    def test_quiet(self):
+        code, stdout, stderr = self.scan("--quiet", "--progress-interval", "0")
+
+        assert code == 1
+        assert len(stdout.splitlines()) == 4
+        assert stderr == ""
+
+    def test_rerun(self):
+        self.scan("--output", self.output)
+        self.scan("--output", self.output)
+
+        with open(self.output) as f:
+            assert len(f.readlines()) == 4
+
+    def test_resume(self):
+        self.scan("--output", self.output)
+
+        # simulate an interruption: drop the last result, and leave a partial line. The error record comes first
+        with open(self.output) as f:
+            lines = sorted(f.readlines(), key=lambda x: "error" not in x)
+        with open(self.output, "w") as f:
+            f.writelines(lines[:3])
+            f.write(lines[3][:10])
+
+        # the error record is removed, so the corrupt file is retried
+        assert len(load_completed(self.output)) == 2
+        assert os.path.getsize(self.output) == len("".join(lines[1:3]).encode("utf-8"))
+
+        code, stdout, stderr = self.scan("--output", self.output, "--resume")
+
+        with open(self.output) as f:
+            paths = sorted(json.loads(x)["path"] for x in f)
+        assert paths == sorted(os.path.join(self.root, x) for x in os.listdir(self.root))
+        assert "2 skipped" in stderr
+        assert stdout == ""
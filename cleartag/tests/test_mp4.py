@@ -0,0 +1,143 @@
+import io
+import os
+import tempfile
+import unittest
+
+from mutagen.easymp4 import EasyMP4
+from mutagen.mp4 import MP4Cover
+from mutagen.mp4._atom import Atoms
+
+from cleartag.ClearTag import read_tags
+from cleartag.IOStats import IOStats
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.enums.TagType import TagType
+from cleartag.mp4 import is_mp4, read_mp4, get_aac_profile
+from cleartag.tests import corpus
+
+TAGS = {"\xa9ART": ["a", "b"], "aART": ["aa"], "\xa9day": ["2001"], "\xa9alb": ["album"], "\xa9nam": ["title"],
+        "trkn": [(3, 12)], "disk": [(1, 0)], "\xa9gen": ["genre"], "\xa9cmt": ["comment"], "tmpo": [120]}
+
+
+def move_moov_to_end(path: str) -> None:
+    """rewrite an MP4 with its moov atom after mdat"""
+
+    with open(path, "rb") as f:
+        atoms = Atoms(f)
+        data = {}
+        for atom in atoms.atoms:
+            f.seek(atom.offset)
+            data[atom.name] = f.read(atom.length)
+
+    with open(path, "wb") as f:
+        f.write(data[b"ftyp"] + data[b"mdat"] + data[b"moov"])
+
+
+class TestMp4(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "test.m4a")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_mp4(self):
+        corpus.make_mp4(self.path, "aac", tags=dict(TAGS, covr=[MP4Cover(corpus.art_bytes(4096))]))
+
+        with open(self.path, "rb") as f:
+            native = read_mp4(f)
+        mutagen_file = EasyMP4(self.path)
+
+        assert native.tag_type == TagType.MP4
+        assert native.tags == {key: mutagen_file.tags[key] for key in mutagen_file.tags if key != "bpm"}
+        assert native.tags["tracknumber"] == ["3/12"] and native.tags["discnumber"] == ["1"]
+        assert native.comment == "comment"
+        assert native.pictures == [4096]
+        assert native.codec == mutagen_file.info.codec == "mp4a.40.2"
+        assert native.bits_per_sample is None
+        assert native.length == mutagen_file.info.length == 10.0
+        assert native.bitrate == mutagen_file.info.bitrate
+
+    def test_alac(self):
+        corpus.make_mp4(self.path, "alac", 24, tags={"\xa9nam": ["title"]})
+
+        track = read_tags(self.path, backend=ReadBackend.NATIVE)
+
+        assert track.stream_info.codec == "alac"
+        assert track.stream_info.bits_per_sample == 24
+        assert track.get_codec_setting() == ("ALAC", "24bit")
+        assert track.to_dict() == read_tags(self.path).to_dict()
+
+    def test_genre_id(self):
+        # mutagen cannot write gnre, so the file is built by hand: an mvhd and a tag, with no track
+        data_atom = corpus.atom(b"data", bytes(8) + b"\x00\x12")
+        ilst = corpus.atom(b"ilst", corpus.atom(b"gnre", data_atom))
+        mvhd = corpus.full_atom(b"mvhd", bytes(8) + bytes.fromhex("0000ac44") + bytes.fromhex("000ac440") + bytes(80))
+        moov = corpus.atom(b"moov", mvhd + corpus.atom(b"udta", corpus.full_atom(b"meta", ilst)))
+        with open(self.path, "wb") as f:
+            f.write(corpus.atom(b"ftyp", b"M4A " + bytes(4)) + moov)
+
+        with open(self.path, "rb") as f:
+            native = read_mp4(f)
+        mutagen_file = EasyMP4(self.path)
+
+        assert native.tags == {"genre": mutagen_file.tags["genre"]} == {"genre": ["Rock"]}
+        assert native.length == mutagen_file.info.length == 16.0
+
+    def test_moov_at_end(self):
+        corpus.make_mp4(self.path, tags=dict(TAGS, covr=[MP4Cover(corpus.art_bytes(1024 * 1024))]),
+                        audio_size=1024 * 1024)
+        move_moov_to_end(self.path)
+
+        io_stats = IOStats()
+        track = read_tags(self.path, io_stats=io_stats, backend=ReadBackend.NATIVE)
+
+        assert track.track_title == "title"
+        assert (track.picture_count, track.picture_size) == (1, 1024 * 1024)
+        assert io_stats.bytes_read < 64 * 1024
+        assert track.to_dict() == read_tags(self.path).to_dict()
+
+    def test_untagged(self):
+        corpus.make_mp4(self.path)
+
+        with open(self.path, "rb") as f:
+            native = read_mp4(f)
+
+        assert native.tags == {}
+        assert native.pictures == []
+        assert native.length == 10.0
+
+    def test_not_mp4(self):
+        assert not is_mp4(b"fLaC\x00\x00\x00\x00")
+        assert is_mp4(corpus.atom(b"ftyp", b"M4A "))
+        assert read_mp4(io.BytesIO(corpus.atom(b"ftyp", b"M4A ") + corpus.atom(b"mdat", bytes(100)))) is None
+        assert read_mp4(io.BytesIO(corpus.atom(b"ftyp", b"M4A ") + b"\x00\x00\x00\x04moov")) is None
+
+    def test_get_aac_profile(self):
+        assert get_aac_profile("mp4a.40.2") == "LC"
+        assert get_aac_profile("mp4a.40.5") == "HE"
+        assert get_aac_profile("mp4a.67.2") == "LC"
+        assert get_aac_profile("mp4a.40") == "UNKNOWN"
+        assert get_aac_profile("mp4a.6B") is None
+        assert get_aac_profile("alac") is None
+        assert get_aac_profile(None) is None
+
+    def test_matches_mutagen(self):
+        library = corpus.make_library(self.dir.name, files_per_kind=2, art_size=64 * 1024)
+
+        # a title whose data atom is flagged implicit rather than UTF-8
+        corpus.make_mp4(self.path, tags={"\xa9nam": ["title"], "\xa9ART": ["artist"]})
+        with open(self.path, "rb") as f:
+            data = bytearray(f.read())
+        index = data.index(b"\xa9nam")
+        data[index + 12:index + 16] = bytes(4)
+        with open(self.path, "wb") as f:
+            f.write(data)
+        assert read_tags(self.path, backend=ReadBackend.NATIVE).track_title == "title"
+
+        for path in library["m4a_aac"] + library["m4a_alac"] + library["m4a_art"] + [self.path]:
+            mutagen_track = read_tags(path, backend=ReadBackend.MUTAGEN)
+            native_track = read_tags(path, backend=ReadBackend.NATIVE)
+
+            assert native_track.to_dict() == mutagen_track.to_dict(), path
+            assert native_track.get_codec_setting() == mutagen_track.get_codec_setting()
@@ -0,0 +1,92 @@
+import io
+import unittest
+
+from cleartag.ClearTag import parse_xing
+from cleartag.enums.XingHeader import XingHeader
+from cleartag.enums.XingParser import XingParser
+from cleartag.mpeg import get_xing_search_range, get_xing_offset, locate_xing, get_frame_length, \
+    find_frame_sync, read_xing_window, XING_SEARCH_SIZE
+from cleartag.tests import corpus
+
+try:
+    import bitstring
+except ImportError:
+    bitstring = None
+
+
+def create_headers():
+    return [
+        corpus.mp3_frame(corpus.xing_payload()),
+        corpus.mp3_frame(corpus.xing_payload(vbr_quality=0, vbr_method=3, encoding_flags=0b1010)),
+        corpus.mp3_frame(corpus.xing_payload(lame_version=b"LAME3.100", tag_revision=1, vbr_method=1)),
+        corpus.mp3_frame(corpus.xing_payload(lame_version=None)),
+        corpus.mp3_frame(corpus.xing_payload(header=b"Info")),
+        corpus.mp3_frame(corpus.vbri_payload(), payload_offset=36),
+        corpus.mp3_frame(),
+        b"ID3\x03\x00\x00\x00\x00\x01\x00" + bytes(128) + corpus.mp3_frame(corpus.xing_payload()),
+    ]
+
+
+class TestMpeg(unittest.TestCase):
+
+    def test_parse_xing(self):
+        xing = parse_xing(corpus.mp3_frame(corpus.xing_payload(encoding_flags=0b1001)))
+
+        assert xing.header_type == XingHeader.LAME
+        assert xing.lame_version == "3.99r"
+        assert xing.lame_vbr_method == 4
+        assert xing.xing_vbr_v == 2
+        assert xing.xing_vbr_q == 2
+        assert xing.lame_nspsytune
+        assert not xing.lame_nssafejoint
+        assert not xing.lame_nogap_next
+        assert xing.lame_nogap_previous
+
+        assert parse_xing(memoryview(corpus.mp3_frame(corpus.vbri_payload()))).header_type == XingHeader.VBRI
+        assert parse_xing(b"").header_type == XingHeader.NONE
+
+    def test_truncated(self):
+        assert parse_xing(b"Xing").header_type == XingHeader.XING
+        assert parse_xing(corpus.xing_payload()[:130]).header_type == XingHeader.XING
+
+    @unittest.skipIf(bitstring is None, "bitstring is not installed")
+    def test_matches_bitstring(self):
+        for data in create_headers():
+            assert parse_xing(data, XingParser.BYTES) == parse_xing(data, XingParser.BITSTRING)
+
+    def test_search_range(self):
+        data = b"ID3\x03\x00\x00\x00\x00\x01\x00" + bytes(20000)
+
+        assert get_xing_search_range(data) == (138, 10138, True)
+        assert get_xing_search_range(bytes(100)) == (0, 100, False)
+
+    def test_anchored_offsets(self):
+        mono = corpus.mp3_frame(corpus.xing_payload(header=b"Info"), mono=True)
+        assert get_xing_offset(mono) == 21
+        assert locate_xing(mono, 0, len(mono)).header_type == XingHeader.INFO
+
+        mpeg2_header = bytes([0xFF, 0xF3, 0x90, 0x00])
+        assert get_xing_offset(mpeg2_header) == 21
+        assert get_frame_length(mpeg2_header) == 72 * 80000 // 22050  # bitrate index 9 is 80kbps for MPEG-2
+
+        # header strings outside the first frame's Xing/VBRI offsets are audio data, not headers
+        data = corpus.mp3_frame() + corpus.mp3_frame(corpus.xing_payload()) + corpus.mp3_frame()
+        assert locate_xing(data, 0, len(data)).header_type == XingHeader.NONE
+
+    def test_frame_sync(self):
+        data = b"\xFF\xFB\x00\x00" + bytes(100) + corpus.mp3_frame() * 2
+
+        assert find_frame_sync(data, 0, len(data)) == 104
+        assert find_frame_sync(bytes(1000), 0, 1000) is None
+        assert get_frame_length(b"\xFF\xFB\xF0\x00") is None
+
+    def test_read_xing_window(self):
+        id3 = b"ID3\x03\x00\x00\x00\x01\x00\x00" + bytes(16384)
+        data = id3 + corpus.mp3_frame(corpus.xing_payload()) + corpus.mp3_frame() * 5000
+        fileobj = io.BytesIO(data)
+
+        window = read_xing_window(fileobj)
+
+        assert len(window) == XING_SEARCH_SIZE
+        assert fileobj.tell() == len(id3) + XING_SEARCH_SIZE
+        assert locate_xing(window, 0, len(window)).header_type == XingHeader.LAME
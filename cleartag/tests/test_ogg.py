@@ -0,0 +1,117 @@
+import base64
+import io
+import os
+import tempfile
+import unittest
+
+from mutagen.flac import Picture
+from mutagen.oggopus import OggOpus
+from mutagen.oggvorbis import OggVorbis
+
+from cleartag.ClearTag import read_tags
+from cleartag.IOStats import IOStats
+from cleartag.enums.ReadBackend import ReadBackend
+from cleartag.enums.TagType import TagType
+from cleartag.ogg import is_ogg, read_ogg, get_picture_size
+from cleartag.tests import corpus
+
+
+class TestOgg(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "test.ogg")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_read_vorbis(self):
+        corpus.make_ogg(self.path, "vorbis", seconds=5, tags={"ARTIST": ["a", "b"], "title": ["t=1"],
+                                                              "comment": ["c"]})
+
+        with open(self.path, "rb") as f:
+            native = read_ogg(f)
+        mutagen_file = OggVorbis(self.path)
+
+        assert native.tag_type == TagType.VORBIS
+        assert native.codec == "vorbis"
+        assert native.tags == {"artist": ["a", "b"], "title": ["t=1"], "comment": ["c"]}
+        assert native.comment == "c"
+        assert native.length == mutagen_file.info.length == 5.0
+        assert native.bitrate == mutagen_file.info.bitrate
+
+    def test_read_opus(self):
+        corpus.make_ogg(self.path, "opus", seconds=5, tags={"title": ["t"]})
+
+        with open(self.path, "rb") as f:
+            native = read_ogg(f)
+        mutagen_file = OggOpus(self.path)
+
+        assert native.codec == "opus"
+        assert native.tags == {"title": ["t"]}
+        assert native.length == mutagen_file.info.length == 5.0
+        assert native.bitrate == mutagen_file.info.bitrate
+
+        track = read_tags(self.path, backend=ReadBackend.NATIVE)
+        assert track.stream_info.get_ext() == "opus"
+        assert track.get_codec_setting() == ("Opus", None)
+
+    def test_pictures(self):
+        corpus.make_ogg(self.path, "vorbis", audio_size=1024 * 1024,
+                        tags={"title": ["t"], "metadata_block_picture": [corpus.picture_comment(1024 * 1024),
+                                                                         corpus.picture_comment(1000, "d" * 2000)]})
+
+        io_stats = IOStats()
+        track = read_tags(self.path, io_stats=io_stats, skip_artwork=True)
+
+        assert track.track_title == "t"
+        assert (track.picture_count, track.picture_size) == (2, 1024 * 1024 + 1000)
+        assert io_stats.bytes_read < 128 * 1024
+        assert track.to_dict() == read_tags(self.path).to_dict()
+
+    def test_get_picture_size(self):
+        for size, description in ((1024 * 1024, "cover"), (1000, "d" * 2000), (0, "")):
+            value = corpus.picture_comment(size, description)
+            assert get_picture_size(value) == len(Picture(base64.b64decode(value)).data) == size
+
+        # as mutagen, truncated pictures and values which are not base64 are skipped
+        assert get_picture_size(corpus.picture_comment(10)[:-4]) is None
+        assert get_picture_size(corpus.picture_comment(10)[:-1]) is None
+        assert get_picture_size("\xe9" * 8) is None
+        assert get_picture_size("") is None
+
+    def test_untagged(self):
+        corpus.make_ogg(self.path, "vorbis")
+
+        with open(self.path, "rb") as f:
+            native = read_ogg(f)
+
+        assert native.tags == {}
+        assert native.comment is None
+        assert native.length == 10.0
+
+    def test_unhandled(self):
+        assert is_ogg(b"OggS\x00")
+        assert not is_ogg(b"fLaC")
+
+        corpus.make_ogg(self.path, "vorbis")
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        # another stream's page at the end of the file, as in a multiplexed file, is left to mutagen
+        last = data.rindex(b"OggS")
+        assert read_ogg(io.BytesIO(data[:last + 14] + b"\xff" + data[last + 15:])) is None
+
+        assert read_ogg(io.BytesIO(data[:last])) is not None
+        assert read_ogg(io.BytesIO(b"OggS" + bytes(100))) is None
+
+    def test_matches_mutagen(self):
+        library = corpus.make_library(self.dir.name, files_per_kind=2, art_size=64 * 1024)
+
+        for path in library["ogg_vorbis"] + library["ogg_opus"] + library["ogg_art"]:
+            mutagen_track = read_tags(path, backend=ReadBackend.MUTAGEN)
+            native_track = read_tags(path, backend=ReadBackend.NATIVE)
+
+            assert native_track.to_dict() == mutagen_track.to_dict(), path
+            assert native_track.stream_info.length == mutagen_track.stream_info.length
+            assert native_track.stream_info.bitrate == mutagen_track.stream_info.bitrate
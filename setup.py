@@ -8,9 +8,12 @@ setup(
     download_url = 'https://github.com/spiritualized/cleartag/archive/v1.2.1.tar.gz',
     keywords = ['metadata', 'mp3', 'flac', 'lame', 'python', 'library'],
     install_requires = [
-                    'bitstring>=3.1.6',
                     'mutagen>=1.42.0',
                 ],
+    extras_require = {
+                    'bitstring': ['bitstring>=3.1.6'],
+                    'numpy': ['numpy'],
+                },
 
     classifiers = [
         'Development Status :: 5 - Production/Stable',